@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 import shutil
 from PyQt6.QtWidgets import QApplication
 from src.ui.main_window import MainWindow
@@ -43,4 +44,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Needed for the batch report process pool in the frozen executable
+    multiprocessing.freeze_support()
     main()
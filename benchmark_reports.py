@@ -0,0 +1,85 @@
+"""
+Benchmark for report generation across a large team.
+
+Builds a synthetic data file with one week of entries for each of --users callers
+(150 by default) and times, per caller report:
+  - collecting the data (entry scan for notes + prefix-sum totals)
+  - rendering with the cached compiled templates, for each format
+  - rendering while recompiling the template every time, for comparison
+
+Run with: python benchmark_reports.py [--users N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from src.data.data_manager import DataManager
+from src.data.schema import TABS, section_metric_paths, set_metric
+from src.reports.report_engine import collect_report_data
+from src.reports.renderer import REPORT_FORMATS, CompiledReportTemplate, render_report
+
+WEEK = ["2025-03-03", "2025-03-04", "2025-03-05", "2025-03-06", "2025-03-07"]
+
+def build_data_file(temp_dir, user_count):
+    data_file = os.path.join(temp_dir, "tally_data.json")
+    dm = DataManager(data_file)
+    rng = random.Random(42)
+    users = [f"Caller {number:03d}" for number in range(user_count)]
+    data = {"users": users, "entries": []}
+    for user in users:
+        for day in WEEK:
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = user
+            entry["date"] = day
+            for tab_key, _ in TABS:
+                for path in section_metric_paths():
+                    set_metric(entry[tab_key], path, rng.randint(0, 20))
+            entry["comments"] = f"Follow up with {rng.randint(1, 99)} leads" if rng.random() < 0.3 else ""
+            data["entries"].append(entry)
+    dm._save_data(data)
+    return data_file, users
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark team report generation")
+    parser.add_argument("--users", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file, users = build_data_file(temp_dir, args.users)
+        dm = DataManager(data_file)
+        start_date, end_date = WEEK[0], "2025-03-09"
+        
+        def collect_all():
+            return [collect_report_data(dm, start_date, end_date, user) for user in users]
+        
+        collect_seconds, collected = timed(collect_all, args.repeat)
+        print(f"{len(users)} callers, {len(users) * len(WEEK)} entries\n")
+        print(f"{'step':<34}{'total ms':>10}{'per user us':>14}")
+        print(f"{'collect data':<34}{collect_seconds * 1000:>10.2f}{collect_seconds / len(users) * 1e6:>14.1f}")
+        
+        for fmt in REPORT_FORMATS:
+            def render_all():
+                return [render_report(name, start_date, end_date, totals, notes, fmt)
+                        for name, totals, notes in collected]
+            
+            def render_all_uncompiled():
+                return [CompiledReportTemplate(fmt).render(name, start_date, end_date, totals, notes)
+                        for name, totals, notes in collected]
+            
+            render_seconds, _ = timed(render_all, args.repeat)
+            uncompiled_seconds, _ = timed(render_all_uncompiled, args.repeat)
+            print(f"{'render ' + fmt + ' (compiled)':<34}{render_seconds * 1000:>10.2f}"
+                  f"{render_seconds / len(users) * 1e6:>14.1f}")
+            print(f"{'render ' + fmt + ' (recompiled each)':<34}{uncompiled_seconds * 1000:>10.2f}"
+                  f"{uncompiled_seconds / len(users) * 1e6:>14.1f}")
+
+if __name__ == "__main__":
+    main()
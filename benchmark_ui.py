@@ -0,0 +1,155 @@
+"""
+Offscreen latency benchmark for the main window's edit hot path.
+
+Drives MainWindow programmatically against synthetic data files of increasing
+size and reports p50/p95/p99 latency for each interaction. Every interaction is
+timed end to end: the widget change, signal handling, recalculation, restyling,
+the autosave to disk and processing of the resulting events.
+
+Interactions:
+  spinbox tick    one step of a metric spinbox
+  comment typing  one character typed into the notes field
+  date flip       moving the date picker to another day
+  user switch     selecting another caller
+
+Run with: python benchmark_ui.py [--sizes 1000 5000 10000] [--users 5] [--samples 100]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QDate
+from src.data.data_manager import DataManager
+from src.data.schema import TABS, section_metric_paths, set_metric
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_dataset(data_dir, entry_count, user_count, seed=1):
+    """Write a data file with entry_count entries spread over user_count callers, ending today.
+    Comments go straight to the comment store, as the app keeps them, so no timed save
+    has to migrate inline comments first."""
+    os.makedirs(data_dir, exist_ok=True)
+    data_manager = DataManager(os.path.join(data_dir, "tally_data.json"))
+    rng = random.Random(seed)
+    users = [f"Caller {number}" for number in range(1, user_count + 1)]
+    entries = []
+    comments = {}
+    days = -(-entry_count // user_count)
+    first_day = date.today() - timedelta(days=days - 1)
+    for offset in range(days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        for user in users:
+            if len(entries) == entry_count:
+                break
+            entry = data_manager.create_empty_entry_structure()
+            entry["user"] = user
+            entry["date"] = day
+            for tab_key, _ in TABS:
+                for path in section_metric_paths():
+                    set_metric(entry[tab_key], path, rng.randint(0, 9))
+            if rng.random() < 0.2:
+                comments[(user, day)] = "Follow up"
+            del entry["comments"]
+            entries.append(entry)
+    data_manager.comments.set_many(comments)
+    data_manager._save_data({"users": users, "entries": entries})
+    return users
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(app, action, samples):
+    """Time action() plus the event processing it triggers, returning sorted milliseconds"""
+    timings = []
+    for sample in range(samples):
+        started = time.perf_counter()
+        action(sample)
+        app.processEvents()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings
+
+
+def benchmark_window(app, users, samples):
+    # Imported here so the window picks up the data/ folder of the current directory
+    from src.ui.main_window import MainWindow
+    
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+    window.user_combo.setCurrentText(users[0])
+    window.date_edit.setDate(QDate.currentDate())
+    app.processEvents()
+    
+    editors = [editor for tab_editors in window.metric_editors.values()
+               for path, editor in tab_editors.items() if editor.isEnabled() and not editor.isReadOnly()]
+    # Non-total editors only: ticking them exercises the recalculation of dependent totals
+    editors = [editor for editor in editors if editor.objectName() not in ("total-field", "grand-total")]
+    
+    def spin_tick(sample):
+        editor = editors[sample % len(editors)]
+        editor.stepBy(1 if editor.value() < editor.maximum() else -1)
+    
+    def type_character(sample):
+        window.comments_edit.insertPlainText("x" if sample % 40 else "\n")
+    
+    today = QDate.currentDate()
+    
+    def flip_date(sample):
+        window.date_edit.setDate(today.addDays(-(sample % 60)))
+    
+    def switch_user(sample):
+        window.user_combo.setCurrentIndex(sample % window.user_combo.count())
+    
+    results = {}
+    results["spinbox tick"] = measure(app, spin_tick, samples)
+    results["comment typing"] = measure(app, type_character, samples)
+    results["date flip"] = measure(app, flip_date, samples)
+    results["user switch"] = measure(app, switch_user, samples)
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main window interaction latency offscreen")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000], help="entries per dataset")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=100, help="timed repetitions per interaction")
+    args = parser.parse_args()
+    
+    app = QApplication(sys.argv)
+    qss_file = os.path.join(REPO_DIR, "styles.qss")
+    if os.path.exists(qss_file):
+        with open(qss_file, 'r') as f:
+            app.setStyleSheet(f.read())
+    
+    original_dir = os.getcwd()
+    print(f"{'entries':>8}  {'interaction':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            users = build_dataset(os.path.join(temp_dir, "data"), size, args.users)
+            os.chdir(temp_dir)
+            try:
+                results = benchmark_window(app, users, args.samples)
+            finally:
+                os.chdir(original_dir)
+        for interaction, timings in results.items():
+            print(f"{size:>8}  {interaction:<16}{percentile(timings, 0.50):>9.2f}{percentile(timings, 0.95):>9.2f}"
+                  f"{percentile(timings, 0.99):>9.2f}{timings[-1]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Random sample datasets shared by the test scripts
+"""
+import os
+import random
+from datetime import date, timedelta
+from src.data.data_manager import DataManager
+from src.data.schema import set_metric
+
+# Metrics filled in by default, with the largest random value each can take
+SAMPLE_METRICS = {
+    "current_leads.call_connects.paid_lead": 9,
+    "current_leads.call_connects.total": 20,
+    "current_leads.quotes": 5,
+    "prospects.call_connects.paid_lead": 9,
+    "prospects.quotes": 5,
+}
+
+def make_data_manager(temp_dir, seed=1, users=("Ann", "Bob"), start_date="2025-03-01", end_date="2025-03-05",
+                      coverage=1.0, metrics=SAMPLE_METRICS, comment="note", comment_rate=0.2):
+    """Write tally_data.json in temp_dir and return a fresh DataManager for it.
+    Each user logs each day from start_date to end_date with probability coverage; a logged day gets
+    a random value for each metric in metrics and, with probability comment_rate, the comment.
+    The same seed always gives the same data."""
+    dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+    rng = random.Random(seed)
+    data = {"users": list(users), "entries": []}
+    day, last_day = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    while day <= last_day:
+        for user in users:
+            if rng.random() < coverage:
+                entry = dm.create_empty_entry_structure()
+                entry["user"] = user
+                entry["date"] = day.isoformat()
+                for path, maximum in metrics.items():
+                    set_metric(entry, path, rng.randint(0, maximum))
+                entry["comments"] = comment if rng.random() < comment_rate else ""
+                data["entries"].append(entry)
+        day += timedelta(days=1)
+    dm._save_data(data)
+    return DataManager(dm.file_path)
@@ -0,0 +1,279 @@
+"""
+Cold storage for old entries.
+
+Entries dated before a cutoff are moved out of the live data file into one
+gzip-compressed JSON archive per year, plus a small summary index (index.json)
+holding per-user monthly totals of every metric. The live file and the archives
+never hold the same (user, date) entry, so totals over a range are the live
+totals plus the archived totals.
+
+Range totals over whole archived months come straight from the summary index;
+an archive is only decompressed when a query needs individual entries or days
+(partial months, daily values, trends), and is then kept in memory.
+
+Run with: python -m src.data.archive [--data FILE] (--before YYYY-MM-DD | --keep-months N)
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+from datetime import date, timedelta
+from src.data.schema import entry_metric_paths
+from src.data.indexes import PrefixSumIndex, ENTRY_COUNT, entry_vector
+
+ARCHIVE_VERSION = 1
+
+
+def archive_dir_for(data_file):
+    """Folder holding the archives of a data file, e.g. data/tally_data_archive"""
+    return os.path.splitext(data_file)[0] + "_archive"
+
+
+def _month_key(date_str):
+    return date_str[:7]
+
+
+def _months_between(start_date, end_date):
+    """Yield (month key, first day, last day, whole month) for each month overlapping an
+    inclusive range, clipped to the range. Dates are "YYYY-MM-DD" strings."""
+    current = date.fromisoformat(start_date)
+    last = date.fromisoformat(end_date)
+    while current <= last:
+        next_month = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        month_end = next_month - timedelta(days=1)
+        whole = current.day == 1 and month_end <= last
+        yield current.strftime("%Y-%m"), current.isoformat(), min(month_end, last).isoformat(), whole
+        current = next_month
+
+
+class ArchiveStore:
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.index_path = os.path.join(archive_dir, "index.json")
+        self.metric_paths = tuple(entry_metric_paths()) + (ENTRY_COUNT,)
+        self._index = None
+        self._index_signature = None
+        # Decompressed archives and a prefix-sum index over them, filled on demand
+        self._year_entries = {}
+        self._prefix_index = PrefixSumIndex()
+        # Snapshots let other threads read the archive, so loading is serialised
+        self._lock = threading.RLock()
+    
+    def _empty_index(self):
+        return {"version": ARCHIVE_VERSION, "archived_before": None, "metrics": list(self.metric_paths), "years": {}}
+    
+    def _load_index(self):
+        """Return the summary index, re-reading it if another instance changed it"""
+        try:
+            stat = os.stat(self.index_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        if self._index is None or signature != self._index_signature:
+            index = self._empty_index()
+            if signature is not None:
+                try:
+                    with open(self.index_path, 'r') as f:
+                        loaded = json.load(f)
+                    if loaded.get("version") == ARCHIVE_VERSION and loaded.get("metrics") == list(self.metric_paths):
+                        index = loaded
+                except Exception as e:
+                    print("Error reading archive index:", e)
+            with self._lock:
+                self._index = index
+                self._index_signature = signature
+                self._year_entries = {}
+                self._prefix_index = PrefixSumIndex()
+        return self._index
+    
+    def cutoff(self):
+        """First date that is not archived, or None if nothing has been archived"""
+        return self._load_index()["archived_before"]
+    
+    def is_archived(self, date_str):
+        cutoff = self.cutoff()
+        return cutoff is not None and isinstance(date_str, str) and date_str < cutoff
+    
+    def years(self):
+        return sorted(int(year) for year in self._load_index()["years"])
+    
+    def year_summary(self, year):
+        return self._load_index()["years"].get(str(year))
+    
+    def users(self):
+        users = set()
+        for summary in self._load_index()["years"].values():
+            users.update(summary["monthly"])
+        return sorted(users)
+    
+    def _archived_range(self, start_date, end_date):
+        """Clip an inclusive range to the archived period; None if it does not overlap"""
+        cutoff = self.cutoff()
+        if cutoff is None or start_date >= cutoff:
+            return None
+        last_archived = (date.fromisoformat(cutoff) - timedelta(days=1)).isoformat()
+        return start_date, min(end_date, last_archived)
+    
+    def _year_file(self, year):
+        return os.path.join(self.archive_dir, f"tally_{year}.json.gz")
+    
+    def year_entries(self, year):
+        """Entries of one archived year, sorted by date then user (decompressed on first use)"""
+        entries = self._year_entries.get(year)
+        if entries is not None:
+            return entries
+        with self._lock:
+            entries = self._year_entries.get(year)
+            if entries is None:
+                entries = []
+                if self.year_summary(year) is not None:
+                    with gzip.open(self._year_file(year), 'rt', encoding='utf-8') as f:
+                        entries = json.load(f)["entries"]
+                    for entry in entries:
+                        self._prefix_index.update_entry(None, entry)
+                self._year_entries[year] = entries
+        return entries
+    
+    def _load_years(self, start_date, end_date):
+        for year in range(int(start_date[:4]), int(end_date[:4]) + 1):
+            self.year_entries(year)
+    
+    def entries(self, start_date=None, end_date=None, users=None):
+        """Archived entries in an inclusive range, ordered by date then user"""
+        user_filter = set(users) if users else None
+        for year in self.years():
+            if start_date is not None and year < int(start_date[:4]):
+                continue
+            if end_date is not None and year > int(end_date[:4]):
+                break
+            for entry in self.year_entries(year):
+                date_val = entry["date"]
+                if start_date is not None and date_val < start_date:
+                    continue
+                if end_date is not None and date_val > end_date:
+                    continue
+                if user_filter is not None and entry["user"] not in user_filter:
+                    continue
+                yield entry
+    
+    def get_entry(self, user, date_str):
+        if not self.is_archived(date_str):
+            return None
+        for entry in self.entries(date_str, date_str, [user]):
+            return entry
+        return None
+    
+    def range_totals(self, user, start_date, end_date):
+        """Archived totals of every metric (and the entry count) over an inclusive range, keyed by path.
+        If user is None the totals cover every user. Whole months are read from the summary index."""
+        totals = dict.fromkeys(self.metric_paths, 0)
+        archived = self._archived_range(start_date, end_date)
+        if archived is None:
+            return totals
+        index = self._load_index()
+        users = self.users() if user is None else [user]
+        for month, first_day, last_day, whole in _months_between(*archived):
+            if whole:
+                summary = index["years"].get(month[:4])
+                if summary is None:
+                    continue
+                for name in users:
+                    vector = summary["monthly"].get(name, {}).get(month)
+                    if vector:
+                        for path, value in zip(self.metric_paths, vector):
+                            totals[path] += value
+            else:
+                # Partial month: needs the days themselves
+                self.year_entries(int(month[:4]))
+                for name in users:
+                    for path, value in self._prefix_index.range_totals(name, first_day, last_day).items():
+                        totals[path] += value
+        return totals
+    
+    def prefix_index(self, start_date, end_date):
+        """Prefix-sum index covering the archived part of an inclusive range, or None if it has none.
+        Only the archives overlapping the range are decompressed."""
+        archived = self._archived_range(start_date, end_date)
+        if archived is None:
+            return None
+        self._load_years(*archived)
+        return self._prefix_index
+    
+    def add_entries(self, entries, cutoff_date):
+        """Merge validated entries dated before cutoff_date into the per-year archives and
+        update the summary index. An archived (user, date) entry is replaced by a newer one."""
+        index = self._load_index()
+        by_year = {}
+        for entry in entries:
+            by_year.setdefault(int(entry["date"][:4]), []).append(entry)
+        
+        os.makedirs(self.archive_dir, exist_ok=True)
+        paths = self.metric_paths[:-1]
+        for year, new_entries in by_year.items():
+            merged = {(entry["user"], entry["date"]): entry for entry in self.year_entries(year)}
+            for entry in new_entries:
+                merged[(entry["user"], entry["date"])] = entry
+            year_entries = sorted(merged.values(), key=lambda entry: (entry["date"], entry["user"]))
+            
+            monthly = {}
+            for entry in year_entries:
+                months = monthly.setdefault(entry["user"], {})
+                vector = entry_vector(entry, paths)
+                month = _month_key(entry["date"])
+                if month in months:
+                    vector = [a + b for a, b in zip(months[month], vector)]
+                months[month] = vector
+            
+            file_path = self._year_file(year)
+            temp_path = file_path + ".tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump({"year": year, "entries": year_entries}, f, separators=(",", ":"))
+            os.replace(temp_path, file_path)
+            index["years"][str(year)] = {
+                "file": os.path.basename(file_path),
+                "entries": len(year_entries),
+                "first_date": year_entries[0]["date"],
+                "last_date": year_entries[-1]["date"],
+                "monthly": monthly
+            }
+        
+        if index["archived_before"] is None or cutoff_date > index["archived_before"]:
+            index["archived_before"] = cutoff_date
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(temp_path, self.index_path)
+        # Re-read everything from disk on next use
+        self._index = None
+
+
+def cutoff_for_months(keep_months, today=None):
+    """First day of the month keep_months - 1 months before today's month, so that
+    keep_months calendar months (including the current one) stay in the live file"""
+    today = today or date.today()
+    month_index = today.year * 12 + today.month - 1 - (keep_months - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1).isoformat()
+
+
+def main():
+    from src.data.data_manager import DataManager
+    
+    parser = argparse.ArgumentParser(description="Move old entries into compressed per-year archives")
+    parser.add_argument("--data", default="data/tally_data.json", help="path to tally_data.json")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--before", help="archive entries dated before this day (YYYY-MM-DD)")
+    group.add_argument("--keep-months", type=int, help="keep this many calendar months, including the current one, live")
+    args = parser.parse_args()
+    
+    cutoff_date = args.before or cutoff_for_months(args.keep_months)
+    data_manager = DataManager(args.data)
+    moved = data_manager.archive_before(cutoff_date)
+    print(f"Archived {moved} entries dated before {cutoff_date} to {data_manager.archive.archive_dir}")
+    for year in data_manager.archive.years():
+        summary = data_manager.archive.year_summary(year)
+        print(f"  {year}: {summary['entries']} entries ({summary['first_date']} to {summary['last_date']})")
+
+
+if __name__ == "__main__":
+    main()
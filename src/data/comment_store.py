@@ -0,0 +1,181 @@
+"""
+Side store for entry comments.
+
+Comments are the only free-text field of an entry, so they live outside the
+main data file: saving a counter never rewrites comment text, loading or
+aggregating counters never parses it, and saving a comment never rewrites the
+counters. Comments are sharded by year into <stem>_comments/comments_<year>.json,
+each holding {"comments": {user: {date: text}}}, and a shard is only read when
+a comment from that year is needed.
+
+Writers must hold the data file lock (see DataManager).
+"""
+import json
+import os
+import weakref
+
+COMMENTS_VERSION = 1
+
+
+def comments_dir_for(data_file):
+    """Folder holding the comment shards of a data file, e.g. data/tally_data_comments"""
+    return os.path.splitext(data_file)[0] + "_comments"
+
+
+def shard_name(date_str):
+    """Shard holding comments for a date: its year, or "undated" for malformed dates"""
+    if isinstance(date_str, str) and date_str[:4].isdigit():
+        return date_str[:4]
+    return "undated"
+
+
+class CommentStore:
+    def __init__(self, comments_dir):
+        self.comments_dir = comments_dir
+        # shard -> {user: {date: text}}, and the file signature each was read at
+        self._shards = {}
+        self._signatures = {}
+        # (user, date) -> (old text, new text) for changes found when re-reading shards
+        self._changes = {}
+        # Views from frozen() that may still need a shard's contents from before a save
+        self._frozen_views = weakref.WeakSet()
+    
+    def _shard_path(self, shard):
+        return os.path.join(self.comments_dir, f"comments_{shard}.json")
+    
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    
+    def _read_shard(self, shard):
+        path = self._shard_path(shard)
+        signature = self._signature(path)
+        comments = {}
+        if signature is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    comments = json.load(f)["comments"]
+            except Exception as e:
+                print("Error reading comments:", e)
+        return comments, signature
+    
+    def _shard(self, shard):
+        """Comments of one shard, re-read if another writer changed it since it was loaded"""
+        cached = self._shards.get(shard)
+        if cached is not None and self._signatures.get(shard) == self._signature(self._shard_path(shard)):
+            return cached
+        comments, signature = self._read_shard(shard)
+        if cached is not None:
+            self._record_changes(cached, comments)
+        self._shards[shard] = comments
+        self._signatures[shard] = signature
+        return comments
+    
+    def _record_changes(self, old, new):
+        for user in set(old) | set(new):
+            old_days, new_days = old.get(user, {}), new.get(user, {})
+            for date_str in set(old_days) | set(new_days):
+                old_text, new_text = old_days.get(date_str, ""), new_days.get(date_str, "")
+                if old_text != new_text:
+                    key = (user, date_str)
+                    first_old = self._changes.get(key, (old_text, None))[0]
+                    self._changes[key] = (first_old, new_text)
+    
+    def shards(self):
+        """Names of the shards on disk, oldest first"""
+        if not os.path.isdir(self.comments_dir):
+            return []
+        names = []
+        for file_name in os.listdir(self.comments_dir):
+            if file_name.startswith("comments_") and file_name.endswith(".json"):
+                names.append(file_name[len("comments_"):-len(".json")])
+        return sorted(names)
+    
+    def signature(self):
+        """File signatures of every shard on disk; changes whenever any comment is saved"""
+        return tuple((shard, self._signature(self._shard_path(shard))) for shard in self.shards())
+    
+    def frozen(self):
+        """Read-only view of every comment as it is now. It shares the shards already loaded
+        (saving replaces a shard's dict rather than changing it) and reads others on first use.
+        A save through this store hands the view the shard as it was, so the view stays as it
+        was; a shard another writer changes before the view reads it is seen with that change."""
+        for shard in list(self._shards):
+            self._shard(shard)
+        view = FrozenComments(self, dict(self._shards))
+        self._frozen_views.add(view)
+        return view
+    
+    def get(self, user, date_str):
+        """Comment for a user and date, or "" if there is none"""
+        return self._shard(shard_name(date_str)).get(user, {}).get(date_str, "")
+    
+    def refresh(self):
+        """Re-read loaded shards that another writer changed.
+        Returns {(user, date): (old text, new text)} of every change seen since the last call."""
+        for shard in list(self._shards):
+            self._shard(shard)
+        changes, self._changes = self._changes, {}
+        return {key: change for key, change in changes.items() if change[0] != change[1]}
+    
+    def set_many(self, comments):
+        """Store {(user, date): text} comments, removing those whose text is empty.
+        Each affected shard is re-read and written once. Returns True on success."""
+        by_shard = {}
+        for (user, date_str), text in comments.items():
+            by_shard.setdefault(shard_name(date_str), []).append((user, date_str, text))
+        try:
+            os.makedirs(self.comments_dir, exist_ok=True)
+            for shard, items in by_shard.items():
+                # A new dict per shard, as frozen views may share the current one
+                old_comments = self._shard(shard)
+                shard_comments = {user: dict(days) for user, days in old_comments.items()}
+                for user, date_str, text in items:
+                    if text:
+                        shard_comments.setdefault(user, {})[date_str] = text
+                    elif date_str in shard_comments.get(user, {}):
+                        del shard_comments[user][date_str]
+                        if not shard_comments[user]:
+                            del shard_comments[user]
+                path = self._shard_path(shard)
+                if not shard_comments and not os.path.exists(path):
+                    continue
+                temp_path = path + ".tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"version": COMMENTS_VERSION, "comments": shard_comments}, f, indent=2)
+                for view in list(self._frozen_views):
+                    view._keep(shard, old_comments)
+                os.replace(temp_path, path)
+                self._shards[shard] = shard_comments
+                self._signatures[shard] = self._signature(path)
+            return True
+        except Exception as e:
+            print("Error saving comments:", e)
+            # Force a re-read so the cache never diverges from the files
+            self._shards.clear()
+            self._signatures.clear()
+            return False
+
+
+class FrozenComments:
+    """Comments as of CommentStore.frozen(); answers get() like the store"""
+    
+    def __init__(self, store, shards):
+        self._store = store
+        # Private to this view: shards shared at freezing time plus those read since
+        self._shards = shards
+    
+    def _keep(self, shard, comments):
+        """Called before the store replaces a shard this view has not read yet"""
+        self._shards.setdefault(shard, comments)
+    
+    def get(self, user, date_str):
+        shard = shard_name(date_str)
+        comments = self._shards.get(shard)
+        if comments is None:
+            # Read straight from the file so the store's own cache is left alone
+            comments = self._shards.setdefault(shard, self._store._read_shard(shard)[0])
+        return comments.get(user, {}).get(date_str, "")
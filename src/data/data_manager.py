@@ -1,55 +1,63 @@
+import hashlib
+import itertools
 import json
 import os
+import pickle
+import shutil
+import time
 from datetime import datetime
+from src.data.indexes import PrefixSumIndex, CommentIndex
+from src.data.file_lock import FileLock, LockTimeout
+from src.data.archive import ArchiveStore, archive_dir_for
+from src.data.comment_store import CommentStore, comments_dir_for
+from src.data.reader import EntryReader, DataSnapshot, ArchiveView
+from src.data.schema import entry_metric_paths, get_metric, set_metric
 
-class DataManager:
+# Bump when the layout of the cached snapshot changes so old sidecar files are ignored
+SNAPSHOT_VERSION = 2
+
+# How often a save retries when another instance holds the data file lock
+LOCK_RETRIES = 3
+
+class DataManager(EntryReader):
     def __init__(self, file_path):
         self.file_path = file_path
+        # Parsed file contents and indexes, kept until the file changes on disk
+        self._data = None
+        self._prefix_index = None
+        # Word index over comments, built on the first search; _comment_cutoff is the
+        # archive cutoff it was built with, since archived comments are indexed too
+        self._comment_index = None
+        self._comment_cutoff = None
+        # (user, date) -> entry, for direct lookups and for diffing reloads
+        self._entry_map = {}
+        # Changes picked up from other writers, delivered to listeners by reload_if_changed()
+        self._pending_changes = set()
+        self._pending_users_changed = False
+        self._listeners = []
+        # Binary sidecar snapshot of the parsed data and indexes, used for fast startup.
+        # It is only ever a cache of the JSON file, never the source of truth.
+        self.snapshot_path = file_path + ".cache"
+        # Lock file serialising read-modify-write cycles across instances
+        self.lock_path = file_path + ".lock"
+        # Read-only per-year archives of entries older than the archive cutoff
+        self.archive = ArchiveStore(archive_dir_for(file_path))
+        # Comments live in per-year side files, so counters and comments are saved independently.
+        # _inline_comments is set when the data file still holds comments written by older versions.
+        self.comments = CommentStore(comments_dir_for(file_path))
+        self._inline_comments = False
+        # Set while a snapshot shares the entry list, user list and entry map; the next
+        # save copies them first (see snapshot())
+        self._shared = False
+        self._file_hash = None
+        self._snapshot_stale = False
+        self.loaded_from_snapshot = False
+        # Fingerprints of what was last persisted, used to skip no-op writes
+        self._file_fingerprint = None
+        self._entry_fingerprints = {}
+        self.skipped_writes = 0
         self._ensure_data_file()
     
-    def create_empty_section_structure(self):
-        """Create an empty section structure with new schema"""
-        return {
-            "call_connects": {
-                "paid_lead": 0,
-                "organic_lead": 0,
-                "agents": 0,
-                "total": 0
-            },
-            "call_nonconnects": {
-                "paid_lead": 0,
-                "organic_lead": 0,
-                "agents": 0,
-                "total": 0
-            },
-            "call_inbetweens": {
-                "paid_lead": 0,
-                "organic_lead": 0,
-                "agents": 0,
-                "total": 0
-            },
-            "other": {
-                "sms": 0,
-                "email": 0,
-                "total": 0
-            },
-            "grand_total": 0,
-            "enrolment_packs": 0,
-            "quotes": 0,
-            "cpd_booked": 0,
-            "grand_total_2": 0
-        }
-    
-    def create_empty_entry_structure(self):
-        """Create an empty entry structure with new schema"""
-        return {
-            "user": "",
-            "date": "",
-            "current_leads": self.create_empty_section_structure(),
-            "prospects": self.create_empty_section_structure(),
-            "comments": ""
-        }
-    
     def _ensure_data_file(self):
         """Create the data file with default structure if it doesn't exist"""
         if not os.path.exists(self.file_path):
@@ -62,124 +70,546 @@ class DataManager:
                 json.dump(default_data, f, indent=2)
     
     def _load_data(self):
-        """Load data from the JSON file"""
-        with open(self.file_path, 'r') as f:
-            return json.load(f)
+        """Load data from the JSON file.
+        The parsed data is cached and only re-read when the file changes on disk,
+        so callers must treat it as read-only unless they save it back."""
+        signature = self._file_signature()
+        if self._data is None or signature != self._file_fingerprint:
+            with open(self.file_path, 'rb') as f:
+                raw = f.read()
+            self._file_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+            # File changed since we last saw it; indexes and entry fingerprints are stale
+            self._file_fingerprint = signature
+            self._entry_fingerprints.clear()
+            previous_data, previous_map = self._data, self._entry_map
+            snapshot = self._read_snapshot(signature)
+            self.loaded_from_snapshot = snapshot is not None
+            if snapshot is not None:
+                self._data, index = snapshot
+                self._snapshot_stale = False
+            else:
+                self._data = json.loads(raw)
+                index = None
+                self._snapshot_stale = True
+            self._entry_map = self._build_entry_map(self._data)
+            self._inline_comments = any("comments" in entry for entry in self._data.get("entries", []))
+            if previous_data is None:
+                self._prefix_index = index
+            else:
+                self._merge_reload(previous_data, previous_map, index)
+        return self._data
+    
+    def _build_entry_map(self, data):
+        """Map (user, date) to entry; the first entry wins if the file holds duplicates"""
+        entry_map = {}
+        for entry in data.get("entries", []):
+            entry_map.setdefault((entry.get("user"), entry.get("date")), entry)
+        return entry_map
+    
+    def _merge_reload(self, previous_data, previous_map, index):
+        """Work out which (user, date) entries another writer changed and update the
+        prefix-sum index for just those entries instead of rebuilding it."""
+        changed = set()
+        for key, entry in self._entry_map.items():
+            if previous_map.get(key) != entry:
+                changed.add(key)
+        for key in previous_map:
+            if key not in self._entry_map:
+                changed.add(key)
+        
+        if index is not None:
+            self._prefix_index = index
+        elif self._prefix_index is not None:
+            has_duplicates = (len(self._entry_map) != len(self._data.get("entries", [])) or
+                              len(previous_map) != len(previous_data.get("entries", [])))
+            if has_duplicates:
+                self._prefix_index = None  # Rebuilt on demand
+            else:
+                for key in changed:
+                    self._prefix_index.update_entry(previous_map.get(key), self._entry_map.get(key))
+        if self._comment_index is not None:
+            for key in changed:
+                # Entries another writer removed take their comments with them
+                if key not in self._entry_map:
+                    self._comment_index.update_entry({"user": key[0], "date": key[1]}, None)
+        
+        self._pending_changes.update(changed)
+        if previous_data.get("users") != self._data.get("users"):
+            self._pending_users_changed = True
+    
+    def subscribe(self, callback):
+        """Call callback(changed_keys, users_changed) when reload_if_changed() finds changes
+        made by another writer. changed_keys is a set of (user, date) tuples."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def reload_if_changed(self):
+        """Re-read the data file if another writer changed it and notify listeners.
+        Returns the set of (user, date) keys that changed."""
+        self._load_data()
+        for (user, date_str), (_, text) in self.comments.refresh().items():
+            self._pending_changes.add((user, date_str))
+            if self._comment_index is not None and (user, date_str) in self._entry_map:
+                self._comment_index.update_entry(None, {"user": user, "date": date_str, "comments": text})
+        changes, users_changed = self._pending_changes, self._pending_users_changed
+        self._pending_changes = set()
+        self._pending_users_changed = False
+        if changes or users_changed:
+            for callback in list(self._listeners):
+                callback(changes, users_changed)
+        return changes
     
     def _save_data(self, data):
+        """Write data to the JSON file. Returns True on success."""
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Write to a temporary file first so a crash never leaves a truncated data file
+            temp_path = self.file_path + ".tmp"
+            text = json.dumps(data, indent=2)
+            with open(temp_path, 'w') as f:
+                f.write(text)
+            os.replace(temp_path, self.file_path)
+            self._data = data
+            self._inline_comments = any("comments" in entry for entry in data.get("entries", []))
+            self._file_fingerprint = self._file_signature()
+            # json.dumps output is ASCII, so the hash matches the bytes on disk
+            self._file_hash = hashlib.blake2b(text.encode("ascii"), digest_size=16).hexdigest()
+            self._snapshot_stale = True
             # print("Data saved successfully to", self.file_path)
+            return True
         except Exception as e:
             print("Error saving data:", e)
+            # Force a re-read so the cache never diverges from the file
+            self._data = None
+            return False
     
-    def get_users(self):
-        """Get the list of users"""
+    def _file_signature(self):
+        """Cheap fingerprint of the data file as a whole (size, modification time and inode)"""
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    
+    def _snapshot_key(self, signature):
+        """Key identifying the file contents a snapshot was taken from: size, mtime and hash"""
+        return (SNAPSHOT_VERSION, signature[0], signature[1], self._file_hash)
+    
+    def _read_snapshot(self, signature):
+        """Return (data, prefix_index) from the sidecar snapshot if it matches the file, else None"""
+        if signature is None or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                # The key is stored first so a stale snapshot is rejected without unpickling the data
+                if pickle.load(f) != self._snapshot_key(signature):
+                    return None
+                return pickle.load(f)
+        except Exception:
+            return None
+    
+    def save_snapshot(self):
+        """Write the parsed data and indexes to the sidecar snapshot if it is out of date.
+        Called on shutdown so the next startup can skip parsing and indexing the JSON file."""
+        self._load_data()
+        if not self._snapshot_stale:
+            return
+        signature = self._file_signature()
+        if signature is None:
+            return
+        index = self.get_prefix_index()
+        try:
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(self._snapshot_key(signature), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump((self._data, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.snapshot_path)
+            self._snapshot_stale = False
+        except Exception as e:
+            print("Error saving snapshot:", e)
+    
+    def get_prefix_index(self):
+        """Return the prefix-sum index for the current data, building it if needed"""
         data = self._load_data()
-        return data.get("users", [])
+        if self._prefix_index is None:
+            index = PrefixSumIndex()
+            index.rebuild(data.get("entries", []))
+            self._prefix_index = index
+        return self._prefix_index
+    
+    def get_comment_index(self):
+        """Return the word index over live and archived comments, building it if needed"""
+        self._load_data()
+        if self._comment_index is None or self._comment_cutoff != self.archive.cutoff():
+            index = CommentIndex()
+            live = ({"user": user, "date": date_str, "comments": self._stored_comment(entry)}
+                    for (user, date_str), entry in self._entry_map.items())
+            index.rebuild(itertools.chain(self.archive.entries(), live))
+            self._comment_index = index
+            self._comment_cutoff = self.archive.cutoff()
+        return self._comment_index
+    
+    def search_comments(self, text, user=None, limit=200):
+        """Return [(date, user, comment)] of comments containing every word of text, newest first"""
+        return self.get_comment_index().search(text, [user] if user else None, limit)
+    
+    def _entry_fingerprint(self, validated_entry):
+        """Content hash of a validated entry's counters (comments are saved separately)"""
+        counters = {key: value for key, value in validated_entry.items() if key != "comments"}
+        payload = json.dumps(counters, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def _is_unchanged(self, key, fingerprint):
+        """True if the entry was last persisted with this fingerprint and the file is untouched since"""
+        return (self._entry_fingerprints.get(key) == fingerprint and
+                self._file_fingerprint is not None and
+                self._file_fingerprint == self._file_signature())
+    
+    def _locked(self, action):
+        """Run action() holding the data file lock, retrying while another instance holds it.
+        Returns what action returns, or False if the lock could not be taken."""
+        for attempt in range(LOCK_RETRIES):
+            try:
+                with FileLock(self.lock_path):
+                    return action()
+            except LockTimeout:
+                time.sleep(0.1 * (attempt + 1))
+        print("Error saving data: the data file is locked by another instance")
+        return False
+    
+    def _update_data(self, update):
+        """Apply update(data) to the latest file contents and save, holding the file lock.
+        Re-reading under the lock picks up (and merges) anything another instance saved
+        since we last looked, so only the records touched by update are overwritten.
+        update returns False when there is nothing to write. Returns True on success."""
+        def action():
+            data = self._load_data()
+            self._unshare(data)
+            migrated = self._inline_comments and self._migrate_comments(data)
+            if update(data) is False and not migrated:
+                return True
+            return self._save_data(data)
+        return self._locked(action)
+    
+    def _migrate_comments(self, data):
+        """Move comments written inline by older versions into the comment store.
+        The store is written first, so a failed save leaves them inline to be moved next time.
+        Comments of duplicate entries are appended, as compact() merges them.
+        Returns True if entries changed and the data file needs saving."""
+        moved = {}
+        for entry in data.get("entries", []):
+            if "comments" not in entry or not isinstance(entry.get("date"), str):
+                continue
+            comment = entry["comments"] if isinstance(entry["comments"], str) else ""
+            key = (entry.get("user"), entry["date"])
+            if key not in moved:
+                moved[key] = comment
+            elif comment.strip() and comment.strip() not in moved[key]:
+                moved[key] = f"{moved[key]}\n{comment.strip()}".strip()
+        if moved and not self.comments.set_many(moved):
+            return False
+        # New entries rather than changed ones, which snapshots may share
+        data["entries"] = [
+            {key: value for key, value in entry.items() if key != "comments"}
+            if isinstance(entry.get("date"), str) else entry
+            for entry in data.get("entries", [])
+        ]
+        self._entry_map = self._build_entry_map(data)
+        self._inline_comments = False
+        return bool(moved)
+    
+    def _unshare(self, data):
+        """Copy the containers a snapshot shares before they are changed (copy-on-write)"""
+        if self._shared:
+            data["entries"] = list(data.get("entries", []))
+            data["users"] = list(data.get("users", []))
+            self._entry_map = dict(self._entry_map)
+            self._shared = False
+    
+    def _replace_entry(self, data, key, old_entry, new_entry):
+        """Put new_entry where old_entry is stored; stored entries are never changed in place"""
+        entries = data["entries"]
+        for position, entry in enumerate(entries):
+            if entry is old_entry:
+                entries[position] = new_entry
+                break
+        self._entry_map[key] = new_entry
+    
+    def snapshot(self):
+        """Return an immutable DataSnapshot of the entries, indexes and comments as they are now,
+        for reading on another thread while saves continue. Nothing is copied up front; the next
+        save copies what it changes instead of changing what the snapshot shares."""
+        data = self._load_data()
+        index = self.get_prefix_index()
+        self._shared = True
+        return DataSnapshot(self.get_version(), data.get("users", []), data.get("entries", []), self._entry_map,
+                            index.frozen_copy(), self.comments.frozen(),
+                            ArchiveView(self.archive, self.archive.cutoff()))
     
     def add_user(self, name):
         """Add a new user if they don't already exist"""
-        data = self._load_data()
-        if name not in data["users"]:
+        def update(data):
+            if name in data["users"]:
+                return False
             data["users"].append(name)
-            self._save_data(data)
+        return self._update_data(update)
     
     def save_entry(self, entry):
-        """Save a new entry, overwriting existing stats if an entry exists for the same date and user"""
-        data = self._load_data()
-        
+        """Save a new entry, overwriting existing stats if an entry exists for the same date and user.
+        Counters go to the data file and comments to the comment store; each is only written if it
+        changed, and an entry without a "comments" key leaves the stored comment as it is.
+        Returns True if the entry is persisted, False if it could not be saved."""
         # Validate and ensure entry has proper structure
         validated_entry = self._validate_entry(entry)
+        if self.archive.is_archived(validated_entry["date"]):
+            print(f"Error saving data: {validated_entry['date']} is archived and read-only")
+            return False
+        saved = self._save_counters(validated_entry)
+        if saved and "comments" in entry:
+            saved = self._save_comment(validated_entry)
+        return saved
+    
+    def _save_counters(self, validated_entry):
+        """Write an entry's counters to the data file unless they are already persisted"""
+        key = (validated_entry["user"], validated_entry["date"])
+        fingerprint = self._entry_fingerprint(validated_entry)
+        if self._is_unchanged(key, fingerprint):
+            self.skipped_writes += 1
+            return True
+        stored_entry = {k: v for k, v in validated_entry.items() if k != "comments"}
         
-        found = False
-        for existing_entry in data["entries"]:
-            if (existing_entry["user"] == validated_entry["user"] and 
-                existing_entry["date"] == validated_entry["date"]):
-                # Overwrite with validated entry
-                existing_entry["current_leads"] = validated_entry["current_leads"]
-                existing_entry["prospects"] = validated_entry["prospects"]
-                existing_entry["comments"] = validated_entry["comments"]
-                found = True
-                break
-        
-        if not found:
-            data["entries"].append(validated_entry)
-        
-        self._save_data(data)
-    
-    def _validate_entry(self, entry):
-        """Validate and normalize entry structure"""
-        validated = self.create_empty_entry_structure()
-        validated["user"] = entry.get("user", "")
-        validated["date"] = entry.get("date", "")
-        validated["comments"] = entry.get("comments", "")
-        
-        # Validate and merge current_leads
-        if "current_leads" in entry:
-            validated["current_leads"] = self._validate_section(entry["current_leads"])
+        # (index, previous entry) captured before the entry is written
+        applied = []
         
-        # Validate and merge prospects
-        if "prospects" in entry:
-            validated["prospects"] = self._validate_section(entry["prospects"])
+        def update(data):
+            applied.clear()
+            index = self.get_prefix_index()
+            existing_entry = self._entry_map.get(key)
+            if existing_entry is not None:
+                previous_entry = self._validate_entry(existing_entry)
+                if self._entry_fingerprint(previous_entry) == fingerprint:
+                    # Nothing changed on disk either; remember it and skip the write
+                    self._entry_fingerprints[key] = fingerprint
+                    self.skipped_writes += 1
+                    return False
+                applied.append((index, previous_entry))
+                # Overwrite with validated entry
+                updated_entry = dict(existing_entry)
+                updated_entry["current_leads"] = validated_entry["current_leads"]
+                updated_entry["prospects"] = validated_entry["prospects"]
+                self._replace_entry(data, key, existing_entry, updated_entry)
+            else:
+                applied.append((index, None))
+                data["entries"].append(stored_entry)
+                self._entry_map[key] = stored_entry
         
-        return validated
+        saved = self._update_data(update)
+        if saved and applied:
+            index, previous_entry = applied[0]
+            self._entry_fingerprints[key] = fingerprint
+            index.update_entry(previous_entry, validated_entry)
+        return saved
     
-    def _validate_section(self, section_data):
-        """Validate and normalize section data"""
-        validated = self.create_empty_section_structure()
+    def _save_comment(self, validated_entry):
+        """Write an entry's comment to the comment store unless it is unchanged; counters are not touched"""
+        user, date_str, text = validated_entry["user"], validated_entry["date"], validated_entry["comments"]
+        if not isinstance(text, str):
+            text = ""
+        if self._inline_comments:
+            # Inline comments take precedence when read, so move them out first
+            self._update_data(lambda data: False)
+        if self.comments.get(user, date_str) == text:
+            return True
         
-        # Validate call sections
-        for call_section in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-            if call_section in section_data:
-                for field in ["paid_lead", "organic_lead", "agents", "total"]:
-                    value = section_data[call_section].get(field, 0)
-                    validated[call_section][field] = self._to_int(value)
+        def action():
+            # Re-read under the lock so comments saved by other instances are kept
+            if self.comments.get(user, date_str) == text:
+                return True
+            return self.comments.set_many({(user, date_str): text})
         
-        # Validate other section
-        if "other" in section_data:
-            for field in ["sms", "email", "total"]:
-                value = section_data["other"].get(field, 0)
-                validated["other"][field] = self._to_int(value)
+        saved = self._locked(action)
+        if saved and self._comment_index is not None:
+            self._comment_index.update_entry(None, {"user": user, "date": date_str, "comments": text})
+        return saved
+    
+    def archive_before(self, cutoff_date):
+        """Move entries dated before cutoff_date ("YYYY-MM-DD") from the data file into the
+        per-year archives. Returns the number of entries moved."""
+        moved = []
         
-        # Validate standalone fields
-        for field in ["grand_total", "enrolment_packs", "quotes", "cpd_booked", "grand_total_2"]:
-            value = section_data.get(field, 0)
-            validated[field] = self._to_int(value)
+        def update(data):
+            moved.clear()
+            keep = []
+            for entry in data.get("entries", []):
+                date_val = entry.get("date")
+                if isinstance(date_val, str) and date_val < cutoff_date:
+                    moved.append(entry)
+                else:
+                    keep.append(entry)
+            if not moved:
+                return False
+            # Write the archives first: if saving the live file then fails, the next run
+            # archives the same entries again, replacing the copies already archived.
+            # Archived entries keep their comments, so the archives stay self-contained.
+            archived = []
+            for entry in moved:
+                validated = self._validate_entry(entry)
+                validated["comments"] = self._stored_comment(entry)
+                archived.append(validated)
+            self.archive.add_entries(archived, cutoff_date)
+            data["entries"] = keep
         
-        return validated
-    
-    def _to_int(self, value):
-        """Safely convert value to integer"""
-        try:
-            return int(value)
-        except (ValueError, TypeError):
+        if not self._update_data(update) or not moved:
             return 0
+        # Only drop the stored comments once the entries are out of the live file
+        self._locked(lambda: self.comments.set_many(
+            {(entry.get("user"), entry.get("date")): "" for entry in moved}))
+        self._reset_indexes()
+        self._pending_changes.update((entry.get("user"), entry.get("date")) for entry in moved)
+        return len(moved)
+    
+    def _reset_indexes(self):
+        """Rebuild lookups after entries were removed or replaced wholesale by a save"""
+        self._entry_map = self._build_entry_map(self._data)
+        self._entry_fingerprints.clear()
+        self._prefix_index = None  # Rebuilt on demand
+        self._comment_index = None
+    
+    def _dead_fields(self, raw, template, prefix=()):
+        """Yield key paths (tuples, as legacy keys may contain dots) of fields in raw
+        that the current schema (template) does not use"""
+        for key, value in raw.items():
+            if key not in template:
+                yield prefix + (key,)
+            elif isinstance(value, dict) and isinstance(template[key], dict):
+                yield from self._dead_fields(value, template[key], prefix + (key,))
+    
+    def _stored_size(self, entry):
+        """Approximate bytes an entry takes in the data file (indent=2, nested two levels deep)"""
+        text = json.dumps(entry, indent=2)
+        return len(text) + 4 * text.count("\n") + 4
     
-    def get_data_for_date_range(self, start_date, end_date):
-        """Get all entries within a date range"""
+    def get_storage_stats(self):
+        """Describe what the data file spends its space on. Returns a dict with the file size,
+        entry and user counts, entries per user per year, duplicate (user, date) entries (with
+        their sorted keys) and approximate bytes used by each field the current schema ignores,
+        keyed by dotted path."""
         data = self._load_data()
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        filtered_entries = []
-        for entry in data["entries"]:
-            # Skip entries whose date is not a string
-            if not isinstance(entry.get("date"), str):
+        entries = data.get("entries", [])
+        per_user_year = {}
+        wasted_bytes = {}
+        seen = set()
+        duplicate_keys = set()
+        duplicates = 0
+        duplicate_bytes = 0
+        for entry in entries:
+            user = entry.get("user", "")
+            date_val = entry.get("date")
+            year = date_val[:4] if isinstance(date_val, str) else "?"
+            years = per_user_year.setdefault(user, {})
+            years[year] = years.get(year, 0) + 1
+            
+            key = (user, date_val)
+            if key in seen:
+                duplicates += 1
+                duplicate_bytes += self._stored_size(entry)
+                duplicate_keys.add(key)
                 continue
-            entry_date = datetime.strptime(entry["date"], "%Y-%m-%d")
-            if start <= entry_date <= end:
-                filtered_entries.append(entry)
+            seen.add(key)
+            
+            dead = list(self._dead_fields(entry, self._validate_entry(entry)))
+            if dead:
+                full_size = self._stored_size(entry)
+                for path in dead:
+                    # Size saved by dropping just this field
+                    trimmed = dict(entry)
+                    node = trimmed
+                    for part in path[:-1]:
+                        node[part] = dict(node[part])
+                        node = node[part]
+                    del node[path[-1]]
+                    name = ".".join(path)
+                    wasted_bytes[name] = wasted_bytes.get(name, 0) + full_size - self._stored_size(trimmed)
         
-        return filtered_entries
-
+        return {
+            "file_path": self.file_path,
+            "file_bytes": os.path.getsize(self.file_path),
+            "entries": len(entries),
+            "users": len(data.get("users", [])),
+            "entries_per_user_year": per_user_year,
+            "duplicates": duplicates,
+            "duplicate_keys": sorted(duplicate_keys, key=lambda key: (str(key[1]), str(key[0]))),
+            "duplicate_bytes": duplicate_bytes,
+            "wasted_bytes": wasted_bytes
+        }
+    
+    def compact(self, backup=True):
+        """Rewrite the data file: duplicate (user, date) entries are merged, fields the schema ignores
+        are dropped and entries are sorted by date and user. The metrics of duplicates are added
+        together, totals included, so no recorded activity is lost; comments left inline by older
+        versions are appended and moved to the comment store.
+        A timestamped copy of the old file is kept if backup is True.
+        Returns a dict describing the result, including the sorted duplicate_keys that were merged,
+        or None if the file could not be written."""
+        result = {}
+        
+        def update(data):
+            result.clear()
+            result["before_bytes"] = os.path.getsize(self.file_path)
+            merged = {}
+            duplicate_keys = set()
+            duplicates = 0
+            for entry in data.get("entries", []):
+                validated = self._validate_entry(entry)
+                del validated["comments"]
+                key = (validated["user"], validated["date"])
+                first = merged.get(key)
+                if first is None:
+                    merged[key] = validated
+                    continue
+                duplicates += 1
+                duplicate_keys.add(key)
+                for path in entry_metric_paths():
+                    set_metric(first, path, get_metric(first, path) + get_metric(validated, path))
+            entries = sorted(merged.values(), key=lambda entry: (str(entry["date"]), str(entry["user"])))
+            users = list(dict.fromkeys(data.get("users", [])))
+            
+            if backup:
+                stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+                result["backup_path"] = f"{self.file_path}.{stamp}.bak"
+                shutil.copy2(self.file_path, result["backup_path"])
+            
+            if users != data.get("users"):
+                self._pending_users_changed = True
+            data.clear()
+            data["users"] = users
+            data["entries"] = entries
+            result["entries"] = len(entries)
+            result["duplicates_merged"] = duplicates
+            result["duplicate_keys"] = sorted(duplicate_keys, key=lambda key: (str(key[1]), str(key[0])))
+        
+        if not self._update_data(update):
+            return None
+        self._reset_indexes()
+        result["after_bytes"] = os.path.getsize(self.file_path)
+        return result
+    
+    def get_version(self):
+        """Return a token that changes whenever the data file's or the comments' contents change"""
+        self._load_data()
+        comment_signature = self.comments.signature()
+        if not comment_signature:
+            return self._file_hash
+        payload = repr((self._file_hash, comment_signature)).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
     def get_entry_for_user_and_date(self, user, date_str):
-        """Return the entry for the specified user and date, or None if not found.
-        Returns a validated entry with proper structure, filling in missing fields with defaults."""
-        data = self._load_data()
-        for entry in data.get("entries", []):
-            if entry.get("user") == user and entry.get("date") == date_str:
-                # Validate and return entry with proper structure
-                return self._validate_entry(entry)
-        return None
\ No newline at end of file
+        entry = super().get_entry_for_user_and_date(user, date_str)
+        # Remember what was shown so saving it back unchanged skips the write
+        if entry is not None and (user, date_str) in self._entry_map:
+            self._entry_fingerprints[(user, date_str)] = self._entry_fingerprint(entry)
+        return entry
+    
@@ -0,0 +1,77 @@
+"""
+Streaming export of entries to CSV or JSON Lines.
+
+Entries are written in fixed-size chunks so memory stays bounded no matter
+how large the selected range is.
+"""
+import csv
+import json
+from src.data.schema import entry_metric_paths, get_metric
+
+EXPORT_FORMATS = {
+    "csv": "CSV (*.csv)",
+    "jsonl": "JSON Lines (*.jsonl)",
+}
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def format_for_path(file_path):
+    """Guess the export format from a file name, defaulting to CSV"""
+    if file_path.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def export_entries(data_manager, file_path, fmt=None, start_date=None, end_date=None,
+                   users=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export entries for a date range and optional user filter.
+    Returns the number of entries written."""
+    fmt = fmt or format_for_path(file_path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    
+    entries = data_manager.query().where(users=users, date_between=(start_date, end_date)).iter()
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            return _write_csv(f, entries, chunk_size)
+        return _write_jsonl(f, entries, chunk_size)
+
+
+def _write_csv(f, entries, chunk_size):
+    """Write one row per entry with a flattened column per metric path"""
+    metric_paths = entry_metric_paths()
+    writer = csv.writer(f)
+    writer.writerow(["user", "date"] + list(metric_paths) + ["comments"])
+    
+    count = 0
+    rows = []
+    for entry in entries:
+        row = [entry["user"], entry["date"]]
+        row.extend(get_metric(entry, path) for path in metric_paths)
+        row.append(entry.get("comments", ""))
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            writer.writerows(rows)
+            count += len(rows)
+            rows = []
+    if rows:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def _write_jsonl(f, entries, chunk_size):
+    """Write one JSON object per line"""
+    count = 0
+    lines = []
+    for entry in entries:
+        lines.append(json.dumps(entry, ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            f.write("\n".join(lines) + "\n")
+            count += len(lines)
+            lines = []
+    if lines:
+        f.write("\n".join(lines) + "\n")
+        count += len(lines)
+    return count
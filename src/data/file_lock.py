@@ -0,0 +1,79 @@
+"""
+Advisory cross-process lock held on a lock file.
+
+The lock is an OS lock on <path>.lock (fcntl.flock on POSIX, msvcrt.locking on
+Windows) rather than the file's existence, so the OS releases it when the holding
+process exits or crashes and no staleness heuristic is needed. The lock file itself
+is left in place between uses; it only records the PID of the last holder.
+"""
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockTimeout(Exception):
+    """Raised when a lock could not be acquired in time"""
+
+
+def _try_lock(fd):
+    """Take an exclusive lock on fd without blocking; True on success"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    def __init__(self, lock_path, timeout=2.0, poll_interval=0.02):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+    
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"Timed out waiting for {self.lock_path}")
+            time.sleep(self.poll_interval)
+        # For diagnostics only; the OS lock is what excludes other writers
+        os.ftruncate(fd, 0)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+    
+    def release(self):
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock(fd)
+            except OSError:
+                pass
+            os.close(fd)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,304 @@
+"""
+In-memory indexes maintained by DataManager.
+
+PrefixSumIndex keeps, per user, a cumulative sum over day ordinals for every
+metric, so the total of any date range is two lookups and a subtraction.
+
+CommentIndex is an inverted index from comment words to the (user, date)
+entries containing them, for searching notes without scanning every entry.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from datetime import date
+from src.data.schema import entry_metric_paths, get_metric
+
+# Pseudo-metric counting entries, for averages over active days
+ENTRY_COUNT = "entry_count"
+
+
+def to_ordinal(date_str):
+    """Convert a "YYYY-MM-DD" string to a day ordinal, or None if it is not a valid date"""
+    if not isinstance(date_str, str):
+        return None
+    try:
+        return date.fromisoformat(date_str).toordinal()
+    except ValueError:
+        return None
+
+
+def entry_vector(entry, metric_paths):
+    """Metric values of an entry in metric_paths order, followed by its entry count of 1"""
+    return [get_metric(entry, path) for path in metric_paths] + [1]
+
+
+class _UserSums:
+    """Cumulative sums for one user over a contiguous run of days starting at base"""
+    
+    def __init__(self, base, width):
+        self.base = base
+        self.length = 0
+        self.sums = [array('q') for _ in range(width)]
+    
+    def copy(self):
+        copied = _UserSums(self.base, 0)
+        copied.length = self.length
+        copied.sums = [array('q', column) for column in self.sums]
+        return copied
+    
+    def ensure_day(self, ordinal):
+        """Grow the arrays so ordinal is covered, returning its position"""
+        if ordinal < self.base:
+            # Prepend zeros; cumulative sums before the old base are all zero
+            pad = self.base - ordinal
+            zeros = array('q', bytes(8 * pad))
+            self.sums = [zeros + column for column in self.sums]
+            self.base = ordinal
+            self.length += pad
+        position = ordinal - self.base
+        if position >= self.length:
+            grow = position + 1 - self.length
+            for column in self.sums:
+                last = column[-1] if len(column) else 0
+                column.extend([last] * grow)
+            self.length += grow
+        return position
+    
+    def add(self, position, deltas):
+        """Add per-metric deltas to a day, shifting every later cumulative sum"""
+        for column, delta in zip(self.sums, deltas):
+            if delta:
+                tail = column[position:]
+                column[position:] = array('q', [value + delta for value in tail])
+    
+    def cumulative(self, metric, ordinal):
+        """Cumulative sum of a metric up to and including ordinal"""
+        position = ordinal - self.base
+        if position < 0:
+            return 0
+        column = self.sums[metric]
+        return column[min(position, self.length - 1)]
+
+
+class PrefixSumIndex:
+    """Per-user prefix sums over day ordinals for every metric path of an entry"""
+    
+    def __init__(self, metric_paths=None):
+        self.metric_paths = tuple(metric_paths or entry_metric_paths()) + (ENTRY_COUNT,)
+        self.metric_positions = {path: i for i, path in enumerate(self.metric_paths)}
+        self._users = {}
+        # Users whose sums a frozen copy shares; they are copied before their next update
+        self._shared = set()
+    
+    def frozen_copy(self):
+        """Return a copy for reading only that shares every user's sums with this index.
+        Updates here copy a user's sums before changing them, so the copy never changes."""
+        frozen = PrefixSumIndex(self.metric_paths[:-1])
+        frozen._users = dict(self._users)
+        self._shared = set(self._users)
+        return frozen
+    
+    def rebuild(self, entries):
+        """Build the index from scratch from an iterable of entries"""
+        self._users = {}
+        self._shared = set()
+        paths = self.metric_paths[:-1]
+        # Collect per-day vectors first so each user's arrays are built in one pass
+        per_user = {}
+        for entry in entries:
+            ordinal = to_ordinal(entry.get("date"))
+            if ordinal is None:
+                continue
+            days = per_user.setdefault(entry.get("user"), {})
+            vector = entry_vector(entry, paths)
+            if ordinal in days:
+                vector = [a + b for a, b in zip(days[ordinal], vector)]
+            days[ordinal] = vector
+        
+        width = len(self.metric_paths)
+        for user, days in per_user.items():
+            first, last = min(days), max(days)
+            sums = _UserSums(first, width)
+            running = [0] * width
+            columns = [[] for _ in range(width)]
+            zero = [0] * width
+            for ordinal in range(first, last + 1):
+                vector = days.get(ordinal, zero)
+                for i in range(width):
+                    running[i] += vector[i]
+                    columns[i].append(running[i])
+            sums.sums = [array('q', column) for column in columns]
+            sums.length = last - first + 1
+            self._users[user] = sums
+    
+    def update_entry(self, old_entry, new_entry):
+        """Apply the difference between the previous and new version of an entry.
+        old_entry is None when the entry is new, new_entry is None when it was removed."""
+        reference = new_entry if new_entry is not None else old_entry
+        ordinal = to_ordinal(reference.get("date"))
+        if ordinal is None:
+            return
+        paths = self.metric_paths[:-1]
+        new_vector = entry_vector(new_entry, paths) if new_entry is not None else [0] * len(self.metric_paths)
+        if old_entry is not None:
+            old_vector = entry_vector(old_entry, paths)
+            deltas = [new - old for new, old in zip(new_vector, old_vector)]
+        else:
+            deltas = new_vector
+        if not any(deltas):
+            return
+        
+        user = reference.get("user")
+        sums = self._users.get(user)
+        if sums is None:
+            sums = self._users[user] = _UserSums(ordinal, len(self.metric_paths))
+        elif user in self._shared:
+            sums = self._users[user] = sums.copy()
+            self._shared.discard(user)
+        sums.add(sums.ensure_day(ordinal), deltas)
+    
+    def users(self):
+        return list(self._users)
+    
+    def range_total(self, user, path, start_date, end_date):
+        """Total of one metric for a user over an inclusive date range; 0 if the range is empty or reversed"""
+        sums = self._users.get(user)
+        start, end = to_ordinal(start_date), to_ordinal(end_date)
+        if sums is None or start > end:
+            return 0
+        metric = self.metric_positions[path]
+        return sums.cumulative(metric, end) - sums.cumulative(metric, start - 1)
+    
+    def range_totals(self, user, start_date, end_date):
+        """Totals of every metric for a user over an inclusive date range, keyed by path.
+        Every total is 0 if the range is empty or reversed."""
+        totals = dict.fromkeys(self.metric_paths, 0)
+        sums = self._users.get(user)
+        start, end = to_ordinal(start_date), to_ordinal(end_date)
+        if sums is None or start > end:
+            return totals
+        for metric, path in enumerate(self.metric_paths):
+            totals[path] = sums.cumulative(metric, end) - sums.cumulative(metric, start - 1)
+        return totals
+    
+    def daily_values(self, user, path, start_date, end_date):
+        """Per-day values of a metric for a user, one per day in the inclusive range"""
+        start, end = to_ordinal(start_date), to_ordinal(end_date)
+        sums = self._users.get(user)
+        if sums is None:
+            return [0] * max(0, end - start + 1)
+        metric = self.metric_positions[path]
+        values = []
+        previous = sums.cumulative(metric, start - 1)
+        for ordinal in range(start, end + 1):
+            current = sums.cumulative(metric, ordinal)
+            values.append(current - previous)
+            previous = current
+        return values
+    
+    def rolling_sums(self, user, path, start_date, end_date, window):
+        """Trailing window sums of a metric and of the entry count, one pair per day in the range.
+        Each window ends on its day and spans window days; computed from prefix sums in O(days)."""
+        start, end = to_ordinal(start_date), to_ordinal(end_date)
+        sums = self._users.get(user)
+        if sums is None:
+            empty = [0] * max(0, end - start + 1)
+            return empty, list(empty)
+        metric = self.metric_positions[path]
+        count = self.metric_positions[ENTRY_COUNT]
+        metric_sums = []
+        entry_counts = []
+        for ordinal in range(start, end + 1):
+            metric_sums.append(sums.cumulative(metric, ordinal) - sums.cumulative(metric, ordinal - window))
+            entry_counts.append(sums.cumulative(count, ordinal) - sums.cumulative(count, ordinal - window))
+        return metric_sums, entry_counts
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased words of a piece of text"""
+    if not isinstance(text, str):
+        return []
+    return _WORD_RE.findall(text.lower())
+
+
+class CommentIndex:
+    """Inverted index of entry comments: word -> set of (user, date) keys"""
+    
+    def __init__(self):
+        self._postings = {}
+        self._comments = {}
+        # Sorted vocabulary for prefix lookups, rebuilt when words are added or dropped
+        self._words = None
+    
+    def rebuild(self, entries):
+        """Build the index from scratch from an iterable of entries"""
+        self._postings = {}
+        self._comments = {}
+        self._words = None
+        for entry in entries:
+            self.update_entry(None, entry)
+    
+    def __len__(self):
+        return len(self._comments)
+    
+    def update_entry(self, old_entry, new_entry):
+        """Apply the difference between the previous and new version of an entry.
+        old_entry is None when the entry is new, new_entry is None when it was removed."""
+        reference = new_entry if new_entry is not None else old_entry
+        key = (reference.get("user"), reference.get("date"))
+        old_comment = self._comments.get(key, "")
+        new_comment = new_entry.get("comments", "") if new_entry is not None else ""
+        if not isinstance(new_comment, str):
+            new_comment = ""
+        if new_comment == old_comment:
+            return
+        old_words, new_words = set(tokenize(old_comment)), set(tokenize(new_comment))
+        for word in old_words - new_words:
+            keys = self._postings[word]
+            keys.discard(key)
+            if not keys:
+                del self._postings[word]
+                self._words = None
+        for word in new_words - old_words:
+            keys = self._postings.get(word)
+            if keys is None:
+                keys = self._postings[word] = set()
+                self._words = None
+            keys.add(key)
+        if new_comment.strip():
+            self._comments[key] = new_comment
+        else:
+            self._comments.pop(key, None)
+    
+    def _matching(self, term):
+        """Keys of comments with a word starting with term"""
+        if self._words is None:
+            self._words = sorted(self._postings)
+        keys = set()
+        position = bisect_left(self._words, term)
+        while position < len(self._words) and self._words[position].startswith(term):
+            keys.update(self._postings[self._words[position]])
+            position += 1
+        return keys
+    
+    def search(self, text, users=None, limit=None):
+        """Return [(date, user, comment)] of comments containing every word of text, newest first.
+        Each word also matches longer words it is the start of, so results appear while typing."""
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not terms:
+            return []
+        keys = None
+        for term in terms:
+            matches = self._matching(term)
+            keys = matches if keys is None else keys & matches
+            if not keys:
+                return []
+        if users:
+            user_filter = set(users)
+            keys = [key for key in keys if key[0] in user_filter]
+        results = sorted(((date_str, user, self._comments[(user, date_str)]) for user, date_str in keys),
+                         key=lambda result: (str(result[0]), str(result[1])), reverse=True)
+        return results[:limit] if limit is not None else results
@@ -0,0 +1,93 @@
+"""
+Storage maintenance for the data file: a size report and compaction.
+
+Run with: python -m src.data.maintenance [--data FILE] report
+          python -m src.data.maintenance [--data FILE] compact [--no-backup]
+"""
+import argparse
+from src.data.data_manager import DataManager
+
+
+def format_bytes(size):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+# Most duplicate (user, date) keys listed in a report
+MAX_LISTED_DUPLICATES = 50
+
+
+def format_duplicate_keys(keys):
+    """List (user, date) keys one per line, indented, up to MAX_LISTED_DUPLICATES"""
+    lines = [f"    {date_val} {user}" for user, date_val in keys[:MAX_LISTED_DUPLICATES]]
+    if len(keys) > MAX_LISTED_DUPLICATES:
+        lines.append(f"    ... and {len(keys) - MAX_LISTED_DUPLICATES} more")
+    return lines
+
+
+def format_storage_report(stats):
+    """Render the dict from DataManager.get_storage_stats() as text"""
+    lines = [
+        f"File: {stats['file_path']}",
+        f"Size: {format_bytes(stats['file_bytes'])}",
+        f"Entries: {stats['entries']}, users: {stats['users']}",
+    ]
+    
+    per_user_year = stats["entries_per_user_year"]
+    years = sorted({year for counts in per_user_year.values() for year in counts})
+    if years:
+        lines.append("\nEntries per user and year:")
+        name_width = max(len(str(user)) for user in per_user_year)
+        name_width = max(name_width, len("User"))
+        lines.append(f"  {'User':<{name_width}}" + "".join(f"{year:>7}" for year in years))
+        for user in sorted(per_user_year, key=str):
+            counts = per_user_year[user]
+            lines.append(f"  {str(user):<{name_width}}" + "".join(f"{counts.get(year, 0):>7}" for year in years))
+    
+    wasted = stats["wasted_bytes"]
+    total_wasted = sum(wasted.values()) + stats["duplicate_bytes"]
+    lines.append(f"\nSpace used by duplicates and unused fields: about {format_bytes(total_wasted)}")
+    if stats["duplicates"]:
+        lines.append(f"  Duplicate entries ({stats['duplicates']}): {format_bytes(stats['duplicate_bytes'])}")
+        lines += format_duplicate_keys(stats["duplicate_keys"])
+    for path, size in sorted(wasted.items(), key=lambda item: -item[1]):
+        lines.append(f"  {path}: {format_bytes(size)}")
+    return "\n".join(lines)
+
+
+def format_compaction_result(result):
+    lines = [
+        f"Compacted: {format_bytes(result['before_bytes'])} -> {format_bytes(result['after_bytes'])}",
+        f"{result['entries']} entries, {result['duplicates_merged']} duplicates merged",
+    ]
+    if result["duplicate_keys"]:
+        lines.append("  Days with duplicates (their metrics were added together):")
+        lines += format_duplicate_keys(result["duplicate_keys"])
+    if result.get("backup_path"):
+        lines.append(f"Backup: {result['backup_path']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on and compact the tally data file")
+    parser.add_argument("--data", default="data/tally_data.json", help="path to tally_data.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("report", help="show size, entry counts and reclaimable space")
+    compact_parser = subparsers.add_parser("compact", help="merge duplicates, drop unused fields and sort entries")
+    compact_parser.add_argument("--no-backup", action="store_true", help="don't keep a copy of the old file")
+    args = parser.parse_args()
+    
+    data_manager = DataManager(args.data)
+    print(format_storage_report(data_manager.get_storage_stats()))
+    if args.command == "compact":
+        result = data_manager.compact(backup=not args.no_backup)
+        if result is None:
+            print("\nCompaction failed; the data file was not changed")
+        else:
+            print("\n" + format_compaction_result(result))
+
+
+if __name__ == "__main__":
+    main()
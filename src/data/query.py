@@ -0,0 +1,235 @@
+"""
+Query layer over DataManager's entries and indexes.
+
+    data_manager.query().where(user="Ann", date_between=("2025-01-01", "2025-03-31")) \\
+        .group_by("user", "week").sum("current_leads.call_connects.*")
+
+Each query picks the cheapest way to answer it:
+  hash    one (user, date) entry, looked up in the entry map
+  prefix  sums and counts over dates, users and day/week/month/year buckets,
+          taken from the prefix-sum indexes and the archive summary
+  scan    everything else (other group keys, predicates, listing entries),
+          a single ordered pass over the matching entries
+
+explain() names the access path a query will use.
+"""
+from datetime import date, timedelta
+from fnmatch import fnmatchcase
+from src.data.schema import entry_metric_paths, get_metric
+from src.data.indexes import ENTRY_COUNT
+
+# Group keys that are periods of the entry date
+TIME_KEYS = ("day", "week", "month", "year")
+# Period lengths supported by get_rollups(); weeks start on Monday
+ROLLUP_PERIODS = ("day", "week", "month")
+# Group keys the prefix-sum path can answer
+INDEXED_KEYS = ("user", "date") + TIME_KEYS
+
+
+def expand_metric_paths(patterns):
+    """Expand metric path patterns ("*" wildcards, e.g. "current_leads.call_connects.*")
+    into metric paths in schema order. ENTRY_COUNT may be requested by name."""
+    available = entry_metric_paths() + (ENTRY_COUNT,)
+    paths = []
+    for pattern in patterns:
+        matches = [path for path in available if fnmatchcase(path, pattern)]
+        if not matches:
+            raise ValueError(f"No metric matches {pattern!r}")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def period_label(date_str, period):
+    """Group label of a "YYYY-MM-DD" date for a period: the day, the Monday of its week,
+    "YYYY-MM" or "YYYY"."""
+    if period in ("day", "date"):
+        return date_str
+    if period == "week":
+        day = date.fromisoformat(date_str)
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if period == "month":
+        return date_str[:7]
+    return date_str[:4]
+
+
+def time_buckets(start_date, end_date, period):
+    """Return [(label, first day, last day)] for each day, week, month or year overlapping an
+    inclusive range, clipped to the range. Weeks start on Monday."""
+    first_day = date.fromisoformat(start_date)
+    last_day = date.fromisoformat(end_date)
+    buckets = []
+    bucket_start = first_day
+    while bucket_start <= last_day:
+        if period in ("day", "date"):
+            bucket_end = bucket_start
+        elif period == "week":
+            bucket_end = bucket_start + timedelta(days=6 - bucket_start.weekday())
+        elif period == "month":
+            bucket_end = (bucket_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        else:
+            bucket_end = bucket_start.replace(month=12, day=31)
+        bucket_end = min(bucket_end, last_day)
+        start_str = bucket_start.isoformat()
+        buckets.append((period_label(start_str, period), start_str, bucket_end.isoformat()))
+        bucket_start = bucket_end + timedelta(days=1)
+    return buckets
+
+
+class Query:
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self._users = None
+        self._date = None
+        self._start_date = None
+        self._end_date = None
+        self._predicates = []
+        self._group_keys = ()
+    
+    def where(self, user=None, users=None, date=None, date_between=None, predicate=None):
+        """Narrow the query. user/users select callers (an empty users list selects all), date one day, date_between an inclusive
+        (start, end) range with either end None for open. predicate(entry) filters anything else."""
+        if user is not None:
+            self._users = [user]
+        if users:
+            self._users = list(users)
+        if date is not None:
+            self._date = date
+            self._start_date = self._end_date = date
+        if date_between is not None:
+            self._start_date, self._end_date = date_between
+        if predicate is not None:
+            self._predicates.append(predicate)
+        return self
+    
+    def group_by(self, *keys):
+        """Group sums and counts by "user", "date"/"day", "week", "month", "year" or any entry field path"""
+        self._group_keys = keys
+        return self
+    
+    def explain(self, aggregate=True):
+        """Name the access path used for an aggregate (sum/count) or, with aggregate=False, for listing entries"""
+        if self._predicates:
+            return "scan"
+        if not aggregate:
+            if self._date is not None and self._users is not None and len(self._users) == 1:
+                return "hash"
+            return "scan"
+        time_keys = [key for key in self._group_keys if key != "user"]
+        if self._start_date is not None and self._end_date is not None and len(time_keys) <= 1 and \
+                all(key in INDEXED_KEYS for key in self._group_keys):
+            return "prefix"
+        return "scan"
+    
+    def sum(self, *patterns):
+        """Total the metrics matching patterns. Returns {path: total} without group keys, otherwise
+        {group: {path: total}} for each group with at least one entry. A group is the key's value,
+        or a tuple of values when grouping by several keys."""
+        paths = expand_metric_paths(patterns or ("*",))
+        if self._start_date is not None and self._end_date is not None and self._start_date > self._end_date:
+            # A reversed range matches nothing; prefix sums would subtract into negative totals
+            groups = {}
+        elif self.explain() == "prefix":
+            groups = self._sum_from_indexes(paths)
+        else:
+            groups = self._sum_from_scan(paths)
+        if not self._group_keys:
+            return groups.get((), dict.fromkeys(paths, 0))
+        if len(self._group_keys) == 1:
+            return {key[0]: totals for key, totals in groups.items()}
+        return groups
+    
+    def count(self):
+        """Number of matching entries, per group if grouped"""
+        result = self.sum(ENTRY_COUNT)
+        if not self._group_keys:
+            return result[ENTRY_COUNT]
+        return {key: totals[ENTRY_COUNT] for key, totals in result.items()}
+    
+    def iter(self, with_comments=True):
+        """Yield matching validated entries ordered by date then user.
+        With with_comments=False comments are left empty and never read."""
+        if self.explain(aggregate=False) == "hash":
+            entry = self.data_manager.get_entry_for_user_and_date(self._users[0], self._date)
+            if entry is not None:
+                yield entry
+            return
+        for entry in self.data_manager.iter_entries(self._start_date, self._end_date, self._users, with_comments):
+            if all(predicate(entry) for predicate in self._predicates):
+                yield entry
+    
+    def entries(self):
+        return list(self.iter())
+    
+    def first(self):
+        """The first matching entry, or None"""
+        return next(self.iter(), None)
+    
+    def _group_value(self, entry, key):
+        if key == "user":
+            return entry["user"]
+        if key == "date" or key in TIME_KEYS:
+            return period_label(entry["date"], key)
+        value = entry
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+    
+    def _sum_from_scan(self, paths):
+        groups = {}
+        metric_paths = [path for path in paths if path != ENTRY_COUNT]
+        # Sums only read comment text if a predicate or group key might look at it
+        with_comments = bool(self._predicates) or any(key.startswith("comments") for key in self._group_keys)
+        for entry in self.iter(with_comments):
+            key = tuple(self._group_value(entry, group_key) for group_key in self._group_keys)
+            totals = groups.get(key)
+            if totals is None:
+                totals = groups[key] = dict.fromkeys(paths, 0)
+                totals[ENTRY_COUNT] = 0
+            for path in metric_paths:
+                totals[path] += get_metric(entry, path)
+            totals[ENTRY_COUNT] += 1
+        return self._drop_count(groups, paths)
+    
+    def _sum_from_indexes(self, paths):
+        start_date, end_date = self._start_date, self._end_date
+        index = self.data_manager.get_prefix_index()
+        archive = self.data_manager.archive
+        use_archive = archive.cutoff() is not None and start_date < archive.cutoff()
+        users = self._users
+        if users is None:
+            users = set(index.users())
+            if use_archive:
+                users.update(archive.users())
+            users = sorted(users, key=str)
+        
+        time_key = next((key for key in self._group_keys if key != "user"), None)
+        buckets = time_buckets(start_date, end_date, time_key) if time_key else [(None, start_date, end_date)]
+        wanted = list(paths) if ENTRY_COUNT in paths else list(paths) + [ENTRY_COUNT]
+        groups = {}
+        for user in users:
+            for label, first_day, last_day in buckets:
+                if len(wanted) == 2:
+                    totals = {path: index.range_total(user, path, first_day, last_day) for path in wanted}
+                else:
+                    totals = index.range_totals(user, first_day, last_day)
+                if use_archive:
+                    # Whole archived months come from the summary without opening the archive
+                    archived = archive.range_totals(user, first_day, last_day)
+                    for path in wanted:
+                        totals[path] += archived[path]
+                if not totals[ENTRY_COUNT]:
+                    continue
+                key = tuple(user if group_key == "user" else label for group_key in self._group_keys)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = {path: totals[path] for path in wanted}
+                else:
+                    for path in wanted:
+                        group[path] += totals[path]
+        return self._drop_count(groups, paths)
+    
+    def _drop_count(self, groups, paths):
+        if ENTRY_COUNT not in paths:
+            for totals in groups.values():
+                del totals[ENTRY_COUNT]
+        return groups
@@ -0,0 +1,288 @@
+"""
+Read access to entries, shared by DataManager and the snapshots it hands out.
+
+EntryReader holds every query that only reads: entry lookups, iteration and
+totals. It works on _load_data(), _entry_map, get_prefix_index(), archive and
+comments, which DataManager keeps up to date and DataSnapshot freezes.
+
+A DataSnapshot is an immutable, versioned view of the data at one moment, so
+reports, exports and the HTTP server can read on another thread while the app
+keeps saving. Taking one is cheap because nothing is copied up front: the
+snapshot shares the manager's entry list, user list, entry map, prefix-sum
+arrays and comment shards, and the manager copies a structure (copy-on-write)
+the first time it changes it after a snapshot was taken. Stored entries are
+never changed in place, only replaced, so a snapshot never sees a later or
+half-applied save.
+"""
+import heapq
+from datetime import datetime, timedelta
+from src.data.schema import TABS, section_metric_paths, get_metric, set_metric
+from src.data.indexes import PrefixSumIndex
+from src.data.query import Query, ROLLUP_PERIODS, time_buckets
+
+
+class EntryReader:
+    """Read-only queries over _load_data(), _entry_map, get_prefix_index(), archive and comments"""
+    
+    def create_empty_section_structure(self):
+        """Create an empty section structure with new schema"""
+        section = {}
+        for path in section_metric_paths():
+            set_metric(section, path, 0)
+        return section
+    
+    def create_empty_entry_structure(self):
+        """Create an empty entry structure with new schema"""
+        return {
+            "user": "",
+            "date": "",
+            "current_leads": self.create_empty_section_structure(),
+            "prospects": self.create_empty_section_structure(),
+            "comments": ""
+        }
+    
+    def _validate_entry(self, entry):
+        """Validate and normalize entry structure"""
+        validated = self.create_empty_entry_structure()
+        validated["user"] = entry.get("user", "")
+        validated["date"] = entry.get("date", "")
+        validated["comments"] = entry.get("comments", "")
+        
+        # Validate and merge current_leads
+        if "current_leads" in entry:
+            validated["current_leads"] = self._validate_section(entry["current_leads"])
+        
+        # Validate and merge prospects
+        if "prospects" in entry:
+            validated["prospects"] = self._validate_section(entry["prospects"])
+        
+        return validated
+    
+    def _validate_section(self, section_data):
+        """Validate and normalize section data"""
+        validated = {}
+        for path in section_metric_paths():
+            set_metric(validated, path, get_metric(section_data, path))
+        return validated
+    
+    def _stored_comment(self, entry):
+        """Comment of an entry in the data file: inline text left by an older version, else the stored one"""
+        if "comments" in entry:
+            return entry["comments"] if isinstance(entry["comments"], str) else ""
+        return self.comments.get(entry.get("user"), entry.get("date"))
+    
+    def get_users(self):
+        """Get the list of users"""
+        data = self._load_data()
+        return data.get("users", [])
+    
+    def query(self):
+        """Start a query over the entries, e.g.
+        query().where(user="Ann", date_between=(start, end)).group_by("week").sum("current_leads.*")"""
+        return Query(self)
+    
+    def get_data_for_date_range(self, start_date, end_date):
+        """Get all entries within a date range, including archived ones"""
+        return self.query().where(date_between=(start_date, end_date)).entries()
+    
+    def get_range_totals(self, user, start_date, end_date):
+        """Return metric totals over an inclusive date range in entry shape (one section per tab).
+        If user is None the totals cover every user. Served from prefix sums,
+        so the cost does not depend on the length of the range."""
+        query = self.query().where(date_between=(start_date, end_date))
+        if user is not None:
+            query.where(user=user)
+        totals = query.sum("*")
+        result = {}
+        for tab_key, _ in TABS:
+            section = {}
+            for path in section_metric_paths():
+                set_metric(section, path, totals[f"{tab_key}.{path}"])
+            result[tab_key] = section
+        return result
+    
+    def get_range_total(self, user, path, start_date, end_date):
+        """Return the total of one metric path (e.g. "current_leads.quotes") over an inclusive date range"""
+        return self.query().where(user=user, date_between=(start_date, end_date)).sum(path)[path]
+    
+    def _prefix_indexes(self, start_date, end_date):
+        """Prefix-sum indexes covering an inclusive range: the live one, plus the archived one if the
+        range reaches back into archived years. Their results add up since no entry is in both."""
+        indexes = [self.get_prefix_index()]
+        archive_index = self.archive.prefix_index(start_date, end_date)
+        if archive_index is not None:
+            indexes.append(archive_index)
+        return indexes
+    
+    def get_daily_totals(self, user, path, start_date, end_date):
+        """Return {date: value} of a metric path for each day in an inclusive range that has an entry.
+        Values are prefix-sum differences, so only the requested days are computed."""
+        daily = self.query().where(user=user, date_between=(start_date, end_date)).group_by("date").sum(path)
+        return {day: totals[path] for day, totals in daily.items()}
+    
+    def get_trend(self, user, path, start_date, end_date, window):
+        """Return one row per day in an inclusive range for a metric path:
+        (date, value, window sum, window average). The window trails each day and the
+        average is taken over days in the window that have an entry."""
+        values = window_sums = entry_counts = None
+        for index in self._prefix_indexes(start_date, end_date):
+            index_values = index.daily_values(user, path, start_date, end_date)
+            index_sums, index_counts = index.rolling_sums(user, path, start_date, end_date, window)
+            if values is None:
+                values, window_sums, entry_counts = index_values, index_sums, index_counts
+            else:
+                values = [a + b for a, b in zip(values, index_values)]
+                window_sums = [a + b for a, b in zip(window_sums, index_sums)]
+                entry_counts = [a + b for a, b in zip(entry_counts, index_counts)]
+        first_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+        rows = []
+        for offset, value in enumerate(values):
+            day = (first_day + timedelta(days=offset)).strftime("%Y-%m-%d")
+            count = entry_counts[offset]
+            average = window_sums[offset] / count if count else 0.0
+            rows.append((day, value, window_sums[offset], average))
+        return rows
+    
+    def get_rollups(self, user, path, start_date, end_date, period):
+        """Return [(period start, period end, total)] of a metric path for each day, week or month
+        overlapping an inclusive date range, clipped to the range. If user is None the totals
+        cover every user. Each bucket is one prefix-sum difference per user."""
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Unknown rollup period: {period}")
+        query = self.query().where(date_between=(start_date, end_date))
+        if user is not None:
+            query.where(user=user)
+        totals = query.group_by(period).sum(path)
+        return [(first_day, last_day, totals.get(label, {}).get(path, 0))
+                for label, first_day, last_day in time_buckets(start_date, end_date, period)]
+    
+    def get_leaderboard(self, path, start_date, end_date, top=5):
+        """Return the top callers by a metric path over an inclusive date range as [(user, total)],
+        highest first; ties are listed alphabetically. Only callers with entries in the range rank.
+        Totals are prefix-sum differences per caller and only the top entries are ordered."""
+        totals = self.query().where(date_between=(start_date, end_date)).group_by("user").sum(path)
+        # Groups come out in user order and nlargest keeps that order between equal totals
+        return heapq.nlargest(top, ((user, values[path]) for user, values in totals.items()),
+                              key=lambda item: item[1])
+    
+    def is_archived(self, date_str):
+        """True if a date is before the archive cutoff, so its entries are read-only"""
+        return self.archive.is_archived(date_str)
+    
+    def iter_entries(self, start_date=None, end_date=None, users=None, with_comments=True):
+        """Yield validated entries ordered by date then user.
+        Dates are inclusive "YYYY-MM-DD" strings; None leaves that end of the range open.
+        If users is given, only entries for those users are returned.
+        Archived entries in the range come first, read from the archives that overlap it.
+        With with_comments=False live entries have empty comments and the comment store is not read."""
+        # Held from the start: a save may replace the manager's list while this generator is paused
+        entries = self._load_data().get("entries", [])
+        user_filter = set(users) if users else None
+        
+        # Archived entries are stored validated and sorted, and all predate the live ones
+        for entry in self.archive.entries(start_date, end_date, users):
+            yield entry
+        
+        # Sort lightweight keys rather than copies of the entries
+        keys = []
+        for index, entry in enumerate(entries):
+            date_val = entry.get("date")
+            if not isinstance(date_val, str):
+                continue
+            if start_date is not None and date_val < start_date:
+                continue
+            if end_date is not None and date_val > end_date:
+                continue
+            if user_filter is not None and entry.get("user") not in user_filter:
+                continue
+            keys.append((date_val, str(entry.get("user", "")), index))
+        keys.sort()
+        
+        for _, _, index in keys:
+            validated = self._validate_entry(entries[index])
+            if with_comments:
+                validated["comments"] = self._stored_comment(entries[index])
+            yield validated
+
+    def get_entry_for_user_and_date(self, user, date_str):
+        """Return the entry for the specified user and date, or None if not found.
+        Returns a validated entry with proper structure, filling in missing fields with defaults."""
+        self._load_data()
+        entry = self._entry_map.get((user, date_str))
+        if entry is None:
+            # Older days may have been moved to the (read-only) archives
+            return self.archive.get_entry(user, date_str)
+        # Validate and return entry with proper structure
+        validated_entry = self._validate_entry(entry)
+        validated_entry["comments"] = self._stored_comment(entry)
+        return validated_entry
+
+
+class ArchiveView:
+    """The archive as it was when a snapshot was taken. Entries archived since then are
+    still among the snapshot's live entries, so everything from its cutoff on is hidden."""
+    
+    def __init__(self, archive, cutoff):
+        self._archive = archive
+        self._cutoff = cutoff
+        self.metric_paths = archive.metric_paths
+    
+    def cutoff(self):
+        return self._cutoff
+    
+    def is_archived(self, date_str):
+        return self._cutoff is not None and isinstance(date_str, str) and date_str < self._cutoff
+    
+    def _clip(self, end_date):
+        """Last day of an inclusive range that was archived when the snapshot was taken"""
+        last_archived = (datetime.strptime(self._cutoff, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        return last_archived if end_date is None else min(end_date, last_archived)
+    
+    def users(self):
+        return self._archive.users() if self._cutoff is not None else []
+    
+    def entries(self, start_date=None, end_date=None, users=None):
+        if self._cutoff is None:
+            return iter(())
+        return self._archive.entries(start_date, self._clip(end_date), users)
+    
+    def get_entry(self, user, date_str):
+        if not self.is_archived(date_str):
+            return None
+        return self._archive.get_entry(user, date_str)
+    
+    def range_totals(self, user, start_date, end_date):
+        if self._cutoff is None or start_date >= self._cutoff:
+            return dict.fromkeys(self.metric_paths, 0)
+        return self._archive.range_totals(user, start_date, self._clip(end_date))
+    
+    def prefix_index(self, start_date, end_date):
+        if self._cutoff is None or start_date >= self._cutoff:
+            return None
+        if self._archive.cutoff() == self._cutoff:
+            return self._archive.prefix_index(start_date, end_date)
+        # More has been archived since: index only what was archived at the time
+        index = PrefixSumIndex()
+        index.rebuild(self.entries(start_date, end_date))
+        return index
+
+
+class DataSnapshot(EntryReader):
+    """Immutable view of the data as of DataManager.snapshot(); safe to read from any thread"""
+    
+    def __init__(self, version, users, entries, entry_map, prefix_index, comments, archive):
+        self.version = version
+        self._data = {"users": users, "entries": entries}
+        self._entry_map = entry_map
+        self._prefix_index = prefix_index
+        self.comments = comments
+        self.archive = archive
+    
+    def _load_data(self):
+        return self._data
+    
+    def get_prefix_index(self):
+        return self._prefix_index
+    
+    def get_version(self):
+        return self.version
@@ -0,0 +1,108 @@
+"""
+Metric schema shared by the data layer, exports and reports.
+
+Describes the fields that make up a section (Current Leads / Prospects) so
+callers can walk an entry without hard-coding every field name.
+"""
+from functools import lru_cache
+
+# Tabs in display order: (entry key, display name)
+TABS = [
+    ("current_leads", "Current Leads"),
+    ("prospects", "Prospects"),
+]
+
+# CALL sections share the same input fields plus a total
+CALL_SECTIONS = [
+    ("call_connects", "CALL - Connects"),
+    ("call_nonconnects", "CALL - Non-Connects"),
+    ("call_inbetweens", "CALL - In Betweens"),
+]
+
+CALL_FIELDS = [
+    ("paid_lead", "Paid Lead"),
+    ("organic_lead", "Organic Lead"),
+    ("agents", "Agents"),
+]
+
+OTHER_FIELDS = [
+    ("sms", "SMS"),
+    ("email", "Email"),
+]
+
+ADDITIONAL_METRICS = [
+    ("enrolment_packs", "Enrolment Packs"),
+    ("quotes", "Quotes"),
+    ("cpd_booked", "CPD Booked"),
+]
+
+
+@lru_cache(maxsize=None)
+def section_metric_paths():
+    """Return the dotted path of every numeric field in a section, in schema order"""
+    paths = []
+    for section_key, _ in CALL_SECTIONS:
+        for field, _ in CALL_FIELDS:
+            paths.append(f"{section_key}.{field}")
+        paths.append(f"{section_key}.total")
+    for field, _ in OTHER_FIELDS:
+        paths.append(f"other.{field}")
+    paths.append("other.total")
+    paths.append("grand_total")
+    for field, _ in ADDITIONAL_METRICS:
+        paths.append(field)
+    paths.append("grand_total_2")
+    return tuple(paths)
+
+
+@lru_cache(maxsize=None)
+def entry_metric_paths():
+    """Return the dotted path of every numeric field in an entry, prefixed by tab"""
+    section_paths = section_metric_paths()
+    return tuple(f"{tab_key}.{path}" for tab_key, _ in TABS for path in section_paths)
+
+
+def section_total_rules():
+    """Return (total path, component paths) pairs in dependency order.
+    Each total is the sum of its components; later totals may depend on earlier ones."""
+    rules = []
+    for section_key, _ in CALL_SECTIONS:
+        rules.append((f"{section_key}.total", [f"{section_key}.{field}" for field, _ in CALL_FIELDS]))
+    rules.append(("other.total", [f"other.{field}" for field, _ in OTHER_FIELDS]))
+    rules.append(("grand_total", [f"{section_key}.total" for section_key, _ in CALL_SECTIONS] + ["other.total"]))
+    rules.append(("grand_total_2", [field for field, _ in ADDITIONAL_METRICS]))
+    return rules
+
+
+def set_metric(data, path, value):
+    """Write a dotted metric path into a section or entry, creating nested dicts as needed"""
+    parts = path.split(".")
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    data[parts[-1]] = value
+
+
+@lru_cache(maxsize=None)
+def metric_label(path):
+    """Human readable name for a dotted metric path, e.g. Current Leads - CALL - Connects - Total"""
+    labels = dict(TABS)
+    labels.update(CALL_SECTIONS)
+    labels.update(CALL_FIELDS)
+    labels.update(OTHER_FIELDS)
+    labels.update(ADDITIONAL_METRICS)
+    labels.update({"other": "OTHER", "total": "Total", "grand_total": "Grand Total",
+                   "grand_total_2": "Grand Total 2"})
+    return " - ".join(labels.get(part, part) for part in path.split("."))
+
+
+def get_metric(data, path):
+    """Read a dotted metric path from an entry or section, returning 0 if missing or invalid"""
+    value = data
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return 0
+        value = value.get(part, 0)
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
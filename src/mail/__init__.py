@@ -0,0 +1 @@
+# Mail module initialization
\ No newline at end of file
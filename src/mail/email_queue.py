@@ -0,0 +1,202 @@
+"""
+Background SMTP delivery for reports.
+
+Messages are queued and sent by a single worker thread. Everything queued at the
+time a batch starts goes out over one SMTP connection; connection or transient
+server errors reconnect and retry the unsent messages with exponential backoff.
+Progress is reported through each job's on_status(status, detail) callback, which
+is called from the worker thread.
+
+For local testing point the settings at a debugging server, e.g.
+python -m aiosmtpd -n -l localhost:8025 (host localhost, port 8025, TLS off).
+"""
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+
+# Job states passed to on_status
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+RETRYING = "retrying"
+FAILED = "failed"
+
+
+class SmtpConfig:
+    def __init__(self, enabled=False, host="", port=587, use_tls=True, username="", password="", sender=""):
+        self.enabled = enabled
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.sender = sender
+    
+    @classmethod
+    def from_settings(cls, settings_manager):
+        return cls(
+            enabled=bool(settings_manager.get('smtp_enabled')),
+            host=settings_manager.get('smtp_host').strip(),
+            port=int(settings_manager.get('smtp_port')),
+            use_tls=bool(settings_manager.get('smtp_use_tls')),
+            username=settings_manager.get('smtp_username'),
+            password=settings_manager.get('smtp_password'),
+            sender=settings_manager.get('smtp_from').strip()
+        )
+    
+    def is_usable(self):
+        """True if SMTP delivery is switched on and has enough details to connect"""
+        return self.enabled and bool(self.host) and bool(self.sender or self.username)
+
+
+class EmailJob:
+    def __init__(self, recipients, subject, body, on_status=None, html_body=None):
+        self.recipients = list(recipients)
+        self.subject = subject
+        self.body = body
+        self.html_body = html_body
+        self.on_status = on_status
+
+
+class EmailQueue:
+    def __init__(self, config_provider, max_attempts=3, backoff=2.0, timeout=30, smtp_factory=smtplib.SMTP):
+        # config_provider is called once per batch so settings changes apply to the next send
+        self.config_provider = config_provider
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def send(self, recipients, subject, body, on_status=None, html_body=None):
+        """Queue a message for delivery and return its job.
+        If html_body is given it is sent as an HTML alternative to the plain text body."""
+        job = EmailJob(recipients, subject, body, on_status, html_body)
+        self._report(job, QUEUED, "")
+        self._queue.put(job)
+        self._ensure_worker()
+        return job
+    
+    def join(self):
+        """Block until every queued message has been sent or has failed"""
+        self._queue.join()
+    
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="EmailQueue", daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Anything else already waiting shares the connection
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._send_batch(batch)
+            except Exception as e:
+                for job in batch:
+                    self._report(job, FAILED, str(e))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _send_batch(self, batch):
+        config = self.config_provider()
+        pending = list(batch)
+        attempt = 0
+        while pending:
+            try:
+                with self._connect(config) as smtp:
+                    while pending:
+                        job = pending[0]
+                        self._report(job, SENDING, "")
+                        try:
+                            smtp.send_message(self._build_message(config, job))
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+                            # Permanent for this message; keep going with the rest
+                            pending.pop(0)
+                            self._report(job, FAILED, self._describe(e))
+                            continue
+                        except smtplib.SMTPResponseException as e:
+                            if e.smtp_code < 500:
+                                raise
+                            pending.pop(0)
+                            self._report(job, FAILED, self._describe(e))
+                            continue
+                        pending.pop(0)
+                        self._report(job, SENT, f"Sent to {len(job.recipients)} recipient(s)")
+            except smtplib.SMTPAuthenticationError as e:
+                # Retrying with the same credentials will not help
+                for job in pending:
+                    self._report(job, FAILED, self._describe(e))
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                if not pending:
+                    return  # Everything was sent; only closing the connection failed
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    for job in pending:
+                        self._report(job, FAILED, self._describe(e))
+                    return
+                delay = self.backoff * 2 ** (attempt - 1)
+                for job in pending:
+                    self._report(job, RETRYING, f"{self._describe(e)}; retrying in {delay:g}s")
+                time.sleep(delay)
+    
+    def _connect(self, config):
+        smtp = self.smtp_factory(config.host, config.port, timeout=self.timeout)
+        try:
+            if config.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+            if config.username:
+                smtp.login(config.username, config.password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+    
+    def _build_message(self, config, job):
+        message = EmailMessage()
+        message["From"] = config.sender or config.username
+        message["To"] = ", ".join(job.recipients)
+        message["Subject"] = job.subject
+        message.set_content(job.body)
+        if job.html_body:
+            message.add_alternative(job.html_body, subtype="html")
+        return message
+    
+    def _describe(self, error):
+        if isinstance(error, smtplib.SMTPResponseException):
+            message = error.smtp_error
+            if isinstance(message, bytes):
+                message = message.decode("utf-8", "replace")
+            return f"{error.smtp_code} {message}"
+        return str(error) or error.__class__.__name__
+    
+    def _report(self, job, status, detail):
+        if job.on_status is not None:
+            try:
+                job.on_status(status, detail)
+            except Exception as e:
+                print("Error reporting email status:", e)
+
+
+# One shared queue so a single worker serves every dialog, see get_email_queue()
+_shared_queue = None
+
+def get_email_queue(settings_manager):
+    """Return the process-wide EmailQueue, reading SMTP settings from settings_manager"""
+    global _shared_queue
+    if _shared_queue is None:
+        _shared_queue = EmailQueue(lambda: SmtpConfig.from_settings(settings_manager))
+    return _shared_queue
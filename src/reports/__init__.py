@@ -0,0 +1 @@
+# Reports module initialization
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Batch report generation: one report per caller, per data file, written to a folder.
+
+Run with: python -m src.reports.batch [--data FILE ...] [--start DATE --end DATE] [--output DIR]
+                                      [--format text|html|markdown] [--workers N]
+
+The period defaults to last week (Monday to Sunday). Reports are generated in a
+process pool and a timing summary is printed at the end.
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from src.data.data_manager import DataManager
+from src.reports.report_engine import generate_report
+from src.reports.renderer import REPORT_FORMATS
+
+DEFAULT_DATA_FILE = "data/tally_data.json"
+DEFAULT_OUTPUT_DIR = "reports"
+FILE_EXTENSIONS = {"text": ".txt", "html": ".html", "markdown": ".md"}
+
+# DataManagers opened by this worker process, reused across the jobs it runs
+_worker_data_managers = {}
+
+class ReportResult:
+    def __init__(self, data_file, user, output_path, seconds, error=None):
+        self.data_file = data_file
+        self.user = user
+        self.output_path = output_path  # None if there was no data or it failed
+        self.seconds = seconds
+        self.error = error
+
+def last_week_range(today=None):
+    """Return (monday, sunday) of the week before the one containing today, as "YYYY-MM-DD" strings"""
+    today = today or date.today()
+    monday = today - timedelta(days=today.weekday() + 7)
+    return monday.strftime("%Y-%m-%d"), (monday + timedelta(days=6)).strftime("%Y-%m-%d")
+
+def report_file_name(user, start_date, end_date, fmt="text"):
+    safe_user = re.sub(r'[^\w\- ]', '_', user).strip() or "user"
+    return f"{safe_user} {start_date} to {end_date}{FILE_EXTENSIONS[fmt]}"
+
+def _get_worker_data_manager(data_file):
+    data_manager = _worker_data_managers.get(data_file)
+    if data_manager is None:
+        data_manager = DataManager(data_file)
+        _worker_data_managers[data_file] = data_manager
+    return data_manager
+
+def _generate_user_report(data_file, user, start_date, end_date, output_dir, fmt):
+    """Generate and write one caller's report (runs in a worker process)"""
+    started = time.perf_counter()
+    try:
+        report_text = generate_report(_get_worker_data_manager(data_file), start_date, end_date, user, fmt)
+        output_path = None
+        if report_text is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, report_file_name(user, start_date, end_date, fmt))
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(report_text)
+        return ReportResult(data_file, user, output_path, time.perf_counter() - started)
+    except Exception as e:
+        return ReportResult(data_file, user, None, time.perf_counter() - started, str(e))
+
+def _output_dir_for(data_file, data_files, output_dir):
+    # Several data files get a sub-folder each so callers with the same name don't collide
+    if len(data_files) == 1:
+        return output_dir
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(data_file))[0])
+
+def run_batch(data_files, start_date, end_date, output_dir, workers=None, fmt="text"):
+    """Generate a report for every user of every data file. Returns a list of ReportResult."""
+    jobs = []
+    for data_file in data_files:
+        data_manager = DataManager(data_file)
+        # Write the sidecar snapshot once so every worker process starts from it
+        data_manager.save_snapshot()
+        target_dir = _output_dir_for(data_file, data_files, output_dir)
+        for user in data_manager.get_users():
+            jobs.append((data_file, user, start_date, end_date, target_dir, fmt))
+    if not jobs:
+        return []
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_generate_user_report, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+def format_summary(results, elapsed):
+    """Describe a batch run: one line per report plus totals"""
+    lines = []
+    for result in results:
+        if result.error:
+            outcome = f"FAILED: {result.error}"
+        elif result.output_path:
+            outcome = result.output_path
+        else:
+            outcome = "no data"
+        lines.append(f"{result.user:<24} {result.seconds * 1000:8.1f} ms  {outcome}")
+    written = sum(1 for result in results if result.output_path)
+    failed = sum(1 for result in results if result.error)
+    worker_time = sum(result.seconds for result in results)
+    lines.append(f"\n{written} report(s) written, {failed} failed, "
+                 f"{len(results) - written - failed} without data")
+    lines.append(f"Wall time {elapsed:.2f} s, report time {worker_time:.2f} s across workers")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a report for every caller")
+    parser.add_argument("--data", nargs="+", default=[DEFAULT_DATA_FILE], help="one or more tally_data.json files")
+    parser.add_argument("--start", help="first day (YYYY-MM-DD), defaults to last Monday week")
+    parser.add_argument("--end", help="last day (YYYY-MM-DD), defaults to the following Sunday")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="folder to write reports to")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="text", help="report format")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    start_date, end_date = last_week_range()
+    start_date = args.start or start_date
+    end_date = args.end or end_date
+    
+    started = time.perf_counter()
+    results = run_batch(args.data, start_date, end_date, args.output, args.workers, args.format)
+    print(f"Reports for {start_date} to {end_date}\n")
+    print(format_summary(results, time.perf_counter() - started))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Report rendering from compiled templates.
+
+The report layout is walked from the metric schema (report_layout()) and
+compiled per output format into a single str.format template plus the list of metric paths that fill it, so
+rendering a report is one format call over the aggregated totals. Compiled
+templates are cached and reused across users and periods. Comparison reports
+use the same layout with each value showing the previous period and the change.
+"""
+import html
+from functools import lru_cache
+from src.data.schema import TABS, CALL_SECTIONS, CALL_FIELDS, OTHER_FIELDS, ADDITIONAL_METRICS, get_metric
+
+REPORT_FORMATS = ("text", "html", "markdown")
+
+
+def report_layout():
+    """Per-tab report layout walked from the schema, in the order of section_metric_paths():
+    ("group", title, [(label, path)]), ("total", label, path) or ("lines", [(label, path)])"""
+    layout = []
+    for section_key, title in CALL_SECTIONS:
+        rows = [(label, f"{section_key}.{field}") for field, label in CALL_FIELDS]
+        layout.append(("group", title, rows + [("Total", f"{section_key}.total")]))
+    rows = [(label, f"other.{field}") for field, label in OTHER_FIELDS]
+    layout.append(("group", "OTHER", rows + [("Total", "other.total")]))
+    layout.append(("total", "GRAND TOTAL", "grand_total"))
+    layout.append(("lines", [(label, field) for field, label in ADDITIONAL_METRICS]))
+    layout.append(("total", "GRAND TOTAL", "grand_total_2"))
+    return layout
+
+
+def _literal(text):
+    """Escape text so str.format leaves it unchanged"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def compare_value(current, previous):
+    """Format a value against the previous period's, e.g. "12 vs 10 (+2, +20.0%)" """
+    delta = current - previous
+    if previous:
+        return f"{current} vs {previous} ({delta:+d}, {delta / previous:+.1%})"
+    return f"{current} vs {previous} ({delta:+d})"
+
+
+class _TextStyle:
+    """Plain text, identical to the original report layout"""
+    escape = staticmethod(lambda text: text)
+    title = "Touch-Point Tracker Report for {user}"
+    untitled = "Touch-Point Tracker Report"
+    period = "Period: {start} to {end}"
+    compared = "Compared with: {start} to {end}"
+    begin = ""
+    end = ""
+    separator = "\n"
+    
+    def tab(self, label):
+        return f"\n=== {label} ==="
+    
+    def group(self, title, rows):
+        return [f"\n{title}:"] + [f"  {label}: {value}" for label, value in rows]
+    
+    def total(self, label, value):
+        return [f"\n{label}: {value}"]
+    
+    def lines(self, rows):
+        lines = [f"{label}: {value}" for label, value in rows]
+        lines[0] = "\n" + lines[0]
+        return lines
+    
+    notes_heading = "\n=== Notes ==="
+    note = "\n{date}:\n  {comment}"
+
+
+class _HtmlStyle:
+    """HTML for the report preview and rich email bodies"""
+    escape = staticmethod(lambda text: html.escape(text).replace("\n", "<br>"))
+    title = "<h3>Touch-Point Tracker Report for {user}</h3>"
+    untitled = "<h3>Touch-Point Tracker Report</h3>"
+    period = "<p>Period: {start} to {end}</p>"
+    compared = "<p>Compared with: {start} to {end}</p>"
+    begin = "<html><body>"
+    end = "</body></html>"
+    separator = "\n"
+    # Comparison values ("12 vs 10 (+2, +20.0%)") need wider tables
+    comparison = False
+    
+    def tab(self, label):
+        return f"<h4>{label}</h4>"
+    
+    def group(self, title, rows):
+        table_width, value_width = (400, 240) if self.comparison else (220, 60)
+        lines = [f"<table width=\"{table_width}\" cellspacing=\"0\" cellpadding=\"2\">", f"<tr><th colspan=\"2\" align=\"left\">{title}</th></tr>"]
+        lines += [f"<tr><td>{label}</td><td width=\"{value_width}\" align=\"right\">{value}</td></tr>" for label, value in rows]
+        lines.append("</table>")
+        return lines
+    
+    def total(self, label, value):
+        return [f"<p><b>{label}: {value}</b></p>"]
+    
+    def lines(self, rows):
+        return ["<p>" + "<br>".join(f"{label}: {value}" for label, value in rows) + "</p>"]
+    
+    notes_heading = "<h4>Notes</h4>"
+    note = "<p><b>{date}</b><br>{comment}</p>"
+
+
+class _MarkdownStyle:
+    """Markdown for wikis and chat tools"""
+    escape = staticmethod(lambda text: text.replace("|", "\\|").replace("*", "\\*").replace("_", "\\_"))
+    title = "# Touch-Point Tracker Report for {user}"
+    untitled = "# Touch-Point Tracker Report"
+    period = "\nPeriod: {start} to {end}"
+    compared = "\nCompared with: {start} to {end}"
+    begin = ""
+    end = ""
+    separator = "\n"
+    
+    def tab(self, label):
+        return f"\n## {label}"
+    
+    def group(self, title, rows):
+        lines = [f"\n### {title}", "", "| Metric | Value |", "|---|---:|"]
+        lines += [f"| {label} | {value} |" for label, value in rows]
+        return lines
+    
+    def total(self, label, value):
+        return [f"\n**{label}: {value}**"]
+    
+    def lines(self, rows):
+        return [""] + [f"- {label}: {value}" for label, value in rows]
+    
+    notes_heading = "\n## Notes"
+    note = "\n**{date}:** {comment}"
+
+
+_STYLES = {"text": _TextStyle, "html": _HtmlStyle, "markdown": _MarkdownStyle}
+
+
+class CompiledReportTemplate:
+    """A report layout compiled for one output format, optionally as a period comparison"""
+    
+    def __init__(self, fmt, comparison=False):
+        if fmt not in _STYLES:
+            raise ValueError(f"Unknown report format: {fmt}")
+        style = _STYLES[fmt]()
+        style.comparison = comparison
+        self.format = fmt
+        self.comparison = comparison
+        self.escape = style.escape
+        self.title = style.title
+        self.untitled = style.untitled
+        self.period = style.period
+        self.compared = style.compared
+        self.begin = style.begin
+        self.end = style.end
+        self.separator = style.separator
+        self.notes_heading = style.notes_heading
+        self.note = style.note
+        
+        # Body: every metric becomes a positional field, filled in layout order
+        self.fields = []
+        body = []
+        layout = report_layout()
+        for tab_key, tab_label in TABS:
+            body.append(style.tab(_literal(style.escape(tab_label))))
+            for block in layout:
+                kind = block[0]
+                if kind == "group":
+                    _, title, rows = block
+                    body += style.group(_literal(style.escape(title)),
+                                        [(_literal(style.escape(label)), self._field(tab_key, path)) for label, path in rows])
+                elif kind == "total":
+                    _, label, path = block
+                    body += style.total(_literal(style.escape(label)), self._field(tab_key, path))
+                else:
+                    body += style.lines([(_literal(style.escape(label)), self._field(tab_key, path)) for label, path in block[1]])
+        self.body = style.separator.join(body)
+    
+    def _field(self, tab_key, path):
+        self.fields.append((tab_key, path))
+        return f"{{{len(self.fields) - 1}}}"
+    
+    def _header(self, user_name, start_date_str, end_date_str):
+        escape = self.escape
+        parts = []
+        if self.begin:
+            parts.append(self.begin)
+        if user_name:
+            parts.append(self.title.format(user=escape(user_name)))
+        else:
+            parts.append(self.untitled)
+        parts.append(self.period.format(start=escape(start_date_str), end=escape(end_date_str)))
+        return parts
+    
+    def render(self, user_name, start_date_str, end_date_str, totals, notes):
+        """Render aggregated totals (entry shape, one section per tab) and [(date, comment)] notes"""
+        escape = self.escape
+        parts = self._header(user_name, start_date_str, end_date_str)
+        parts.append(self.body.format(*[get_metric(totals[tab_key], path) for tab_key, path in self.fields]))
+        if notes:
+            parts.append(self.notes_heading)
+            note = self.note
+            parts.extend(note.format(date=escape(date), comment=escape(comment)) for date, comment in notes)
+        if self.end:
+            parts.append(self.end)
+        return self.separator.join(parts)
+    
+    def render_comparison(self, user_name, period, previous_period, totals, previous_totals):
+        """Render totals for period against previous_totals; periods are inclusive (start, end) pairs"""
+        parts = self._header(user_name, *period)
+        parts.append(self.compared.format(start=self.escape(previous_period[0]), end=self.escape(previous_period[1])))
+        parts.append(self.body.format(*[compare_value(get_metric(totals[tab_key], path),
+                                                      get_metric(previous_totals[tab_key], path))
+                                        for tab_key, path in self.fields]))
+        if self.end:
+            parts.append(self.end)
+        return self.separator.join(parts)
+
+
+@lru_cache(maxsize=None)
+def get_template(fmt="text", comparison=False):
+    """Return the compiled template for a format, compiling it on first use"""
+    return CompiledReportTemplate(fmt, comparison)
+
+
+def render_report(user_name, start_date_str, end_date_str, totals, notes, fmt="text"):
+    return get_template(fmt).render(user_name, start_date_str, end_date_str, totals, notes)
+
+
+def render_comparison(user_name, period, previous_period, totals, previous_totals, fmt="text"):
+    return get_template(fmt, True).render_comparison(user_name, period, previous_period, totals, previous_totals)
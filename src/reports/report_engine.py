@@ -0,0 +1,85 @@
+"""
+Report engine shared by the report dialog and the batch report job.
+"""
+import calendar
+from datetime import date, timedelta
+from src.reports.renderer import render_report
+
+def collect_report_data(data_manager, start_date, end_date, user=None):
+    """Gather what a report needs for an inclusive date range.
+    Returns (user_name, totals, notes) or None if there are no entries in the range.
+    If user is None the report covers every caller and is titled after the earliest entry's user."""
+    query = data_manager.query().where(date_between=(start_date, end_date))
+    if user is not None:
+        query.where(user=user)
+    data = query.entries()
+    if not data:
+        return None
+    user_name = user if user is not None else data[0].get("user", None)
+    
+    # Totals come from the prefix-sum index rather than re-aggregating entries
+    totals = data_manager.get_range_totals(user, start_date, end_date)
+    
+    # Comments/notes, sorted by date
+    notes = []
+    for entry in data:
+        comment = entry.get("comments", "").strip()
+        if comment:
+            date = entry.get("date", "")
+            notes.append((date, comment))
+    notes.sort(key=lambda x: x[0])
+    return user_name, totals, notes
+
+def generate_report(data_manager, start_date_str, end_date_str, user=None, fmt="text"):
+    """Return the report for an inclusive date range in one of REPORT_FORMATS, or None if there is no data"""
+    report_data = collect_report_data(data_manager, start_date_str, end_date_str, user)
+    if report_data is None:
+        return None
+    user_name, totals, notes = report_data
+    return render_report(user_name, start_date_str, end_date_str, totals, notes, fmt)
+
+def _shift_months(day, months):
+    """Move a date by whole months, keeping month ends at month ends"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    last_day = calendar.monthrange(year, month + 1)[1]
+    if day.day == calendar.monthrange(day.year, day.month)[1]:
+        return date(year, month + 1, last_day)
+    return date(year, month + 1, min(day.day, last_day))
+
+def previous_period(start_date_str, end_date_str):
+    """The inclusive period just before a range: the same number of whole calendar months
+    if the range is whole months (so a month is compared with the month before), else the same number of days"""
+    start, end = date.fromisoformat(start_date_str), date.fromisoformat(end_date_str)
+    if start.day == 1 and end == _shift_months(end.replace(day=1), 1) - timedelta(days=1):
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        previous_start = _shift_months(start, -months)
+    else:
+        previous_start = start - (end - start) - timedelta(days=1)
+    return previous_start.isoformat(), (start - timedelta(days=1)).isoformat()
+
+def same_period_last_year(start_date_str, end_date_str):
+    """The same inclusive range one year earlier"""
+    start, end = date.fromisoformat(start_date_str), date.fromisoformat(end_date_str)
+    return _shift_months(start, -12).isoformat(), _shift_months(end, -12).isoformat()
+
+def collect_comparison_data(data_manager, period, previous_period, user=None):
+    """Gather totals for an inclusive (start, end) period and the period it is compared with.
+    Returns (user_name, totals, previous_totals) or None if neither period has entries.
+    Both periods are served from prefix sums, so no entries are aggregated.
+    Raises ValueError if either period starts after it ends."""
+    queries = []
+    for start_date, end_date in (period, previous_period):
+        if start_date > end_date:
+            raise ValueError(f"Reversed date range: {start_date} to {end_date}")
+        query = data_manager.query().where(date_between=(start_date, end_date))
+        if user is not None:
+            query.where(user=user)
+        queries.append(query)
+    # Stops at the first entry found, like collect_report_data titles all-caller reports
+    first_entry = next(filter(None, (query.first() for query in queries)), None)
+    if first_entry is None:
+        return None
+    user_name = user if user is not None else first_entry.get("user", None)
+    return (user_name, data_manager.get_range_totals(user, *period),
+            data_manager.get_range_totals(user, *previous_period))
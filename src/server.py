@@ -0,0 +1,245 @@
+"""
+Read-only HTTP/JSON API over the tally data, for dashboards and BI tooling.
+
+Run with: python -m src.server [--host 127.0.0.1] [--port 8765] [--data data/tally_data.json]
+
+Endpoints (all GET, dates are inclusive "YYYY-MM-DD"):
+    /version                                    current data version
+    /users                                      list of callers
+    /entries?start=&end=&user=                  entries, ordered by date then user
+    /totals?start=&end=[&user=]                 metric totals in entry shape
+    /rollups?start=&end=&metric=[&period=][&user=]
+                                                per day/week/month totals of one metric
+    /leaderboard?start=&end=&metric=[&top=5]    callers ranked by one metric
+
+"user" may be repeated on /entries; on /totals and /rollups it is optional and
+the result covers every user when omitted. Every response carries an ETag
+derived from the data version, so pollers can send If-None-Match and get a
+304 until the data file changes; that check comes before any response is built.
+Unexpected errors are printed with their traceback and answered with a 500.
+"""
+import argparse
+import json
+import threading
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from src.data.data_manager import DataManager
+from src.data.query import ROLLUP_PERIODS
+from src.data.indexes import ENTRY_COUNT
+from src.data.schema import entry_metric_paths
+
+DEFAULT_DATA_FILE = "data/tally_data.json"
+DEFAULT_PORT = 8765
+# Rendered responses kept per data version
+RESPONSE_CACHE_SIZE = 256
+
+
+class BadRequest(Exception):
+    """Raised for invalid query parameters; reported as HTTP 400"""
+
+
+class TallyService:
+    """Shared state for all request threads: one DataManager (and its in-memory indexes), a
+    snapshot of the current data version that requests read in parallel, and rendered responses."""
+    
+    def __init__(self, data_file):
+        self.data_manager = DataManager(data_file)
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+        self._responses = {}
+        self.routes = {
+            "/version": self._version_info,
+            "/users": self._users,
+            "/entries": self._entries,
+            "/totals": self._totals,
+            "/rollups": self._rollups,
+            "/leaderboard": self._leaderboard,
+        }
+    
+    def current_snapshot(self):
+        """Pick up changes made by the desktop app and return a snapshot of the current data"""
+        with self._lock:
+            self.data_manager.reload_if_changed()
+            version = self.data_manager.get_version()
+            if version != self._version:
+                self._snapshot = self.data_manager.snapshot()
+                self._version = self._snapshot.version
+                self._responses.clear()
+            return self._snapshot
+    
+    def handle(self, target, if_none_match=""):
+        """Return (status, version, body bytes) for a request target (path plus query).
+        If if_none_match (the request header) names the current version the status is 304
+        with an empty body, without building the response."""
+        try:
+            return self._handle(target, if_none_match)
+        except Exception as e:
+            print(f"Error handling {target}: {e}")
+            traceback.print_exc()
+            return 500, None, self._encode({"error": "Internal server error"})
+    
+    def _handle(self, target, if_none_match):
+        snapshot = self.current_snapshot()
+        version = snapshot.version
+        parts = urlsplit(target)
+        route = self.routes.get(parts.path.rstrip("/") or "/")
+        if route is None:
+            return 404, version, self._encode({"error": f"Unknown endpoint: {parts.path}"})
+        if f'"{version}"' in if_none_match:
+            return 304, version, b""
+        cached = self._responses.get(target)
+        if cached is not None and cached[0] == version:
+            return 200, version, cached[1]
+        
+        try:
+            # Snapshots never change, so requests are answered without holding the lock
+            payload = route(snapshot, parse_qs(parts.query))
+        except BadRequest as e:
+            return 400, version, self._encode({"error": str(e)})
+        body = self._encode(payload)
+        with self._lock:
+            if version == self._version:
+                if len(self._responses) >= RESPONSE_CACHE_SIZE:
+                    self._responses.pop(next(iter(self._responses)))
+                self._responses[target] = (version, body)
+        return 200, version, body
+    
+    def _encode(self, payload):
+        return json.dumps(payload).encode("utf-8")
+    
+    def _param(self, query, name, required=False, default=None):
+        values = query.get(name)
+        if not values:
+            if required:
+                raise BadRequest(f"Missing parameter: {name}")
+            return default
+        return values[0]
+    
+    def _date_param(self, query, name, required=False):
+        value = self._param(query, name, required)
+        if value is not None:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise BadRequest(f"Invalid date for {name}: {value}")
+        return value
+    
+    def _date_range(self, query):
+        start_date = self._date_param(query, "start", required=True)
+        end_date = self._date_param(query, "end", required=True)
+        if start_date > end_date:
+            raise BadRequest("start must not be after end")
+        return start_date, end_date
+    
+    def _version_info(self, snapshot, query):
+        return {"version": snapshot.version}
+    
+    def _users(self, snapshot, query):
+        return {"users": snapshot.get_users()}
+    
+    def _entries(self, snapshot, query):
+        start_date = self._date_param(query, "start")
+        end_date = self._date_param(query, "end")
+        entries = snapshot.query().where(
+            users=query.get("user"), date_between=(start_date, end_date)).entries()
+        return {"entries": entries}
+    
+    def _totals(self, snapshot, query):
+        start_date, end_date = self._date_range(query)
+        user = self._param(query, "user")
+        return {
+            "user": user,
+            "start": start_date,
+            "end": end_date,
+            "totals": snapshot.get_range_totals(user, start_date, end_date)
+        }
+    
+    def _metric_param(self, query):
+        metric = self._param(query, "metric", required=True)
+        if metric != ENTRY_COUNT and metric not in entry_metric_paths():
+            raise BadRequest(f"Unknown metric: {metric}")
+        return metric
+    
+    def _rollups(self, snapshot, query):
+        start_date, end_date = self._date_range(query)
+        user = self._param(query, "user")
+        metric = self._metric_param(query)
+        period = self._param(query, "period", default="month")
+        if period not in ROLLUP_PERIODS:
+            raise BadRequest(f"period must be one of: {', '.join(ROLLUP_PERIODS)}")
+        rollups = snapshot.get_rollups(user, metric, start_date, end_date, period)
+        return {
+            "user": user,
+            "metric": metric,
+            "period": period,
+            "rollups": [{"start": start, "end": end, "total": total} for start, end, total in rollups]
+        }
+    
+    def _leaderboard(self, snapshot, query):
+        start_date, end_date = self._date_range(query)
+        metric = self._metric_param(query)
+        top = self._param(query, "top", default="5")
+        if not top.isdigit() or int(top) < 1:
+            raise BadRequest("top must be a positive whole number")
+        leaders = snapshot.get_leaderboard(metric, start_date, end_date, int(top))
+        return {
+            "metric": metric,
+            "start": start_date,
+            "end": end_date,
+            "leaders": [{"rank": rank, "user": user, "total": total}
+                        for rank, (user, total) in enumerate(leaders, 1)]
+        }
+
+
+class TallyRequestHandler(BaseHTTPRequestHandler):
+    service = None  # Set by make_server()
+    
+    def do_GET(self):
+        status, version, body = self.service.handle(self.path, self.headers.get("If-None-Match", ""))
+        etag = f'"{version}"'
+        if status == 304:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass  # Dashboards poll constantly; keep the console quiet
+
+
+def make_server(data_file=DEFAULT_DATA_FILE, host="127.0.0.1", port=DEFAULT_PORT):
+    """Create a threaded server sharing one TallyService across request threads"""
+    handler = type("Handler", (TallyRequestHandler,), {"service": TallyService(data_file)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve tally data over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="path to tally_data.json")
+    args = parser.parse_args()
+    
+    server = make_server(args.data, args.host, args.port)
+    print(f"Serving {args.data} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Storage for secrets such as the SMTP password, kept out of the settings file.
+
+Secrets go to the system keyring (Windows Credential Manager, macOS Keychain,
+Secret Service) when the optional keyring package is installed and has a working
+backend. Otherwise they are written to a separate JSON file readable only by the
+current user; that file is still plain text, and on Windows the permissions are
+left to the folder it is in.
+"""
+import json
+import os
+
+try:
+    import keyring
+    from keyring.errors import KeyringError
+except ImportError:
+    keyring = None
+
+KEYRING_SERVICE = "Touch-Point Tracker"
+
+
+def secrets_file_for(settings_file):
+    """Fallback file for the secrets of a settings file, e.g. data/app_settings_secrets.json"""
+    return os.path.splitext(settings_file)[0] + "_secrets.json"
+
+
+class SecretStore:
+    def __init__(self, secrets_file):
+        self.secrets_file = secrets_file
+        self._use_keyring = keyring is not None
+        self._keyring_checked = False
+
+    @property
+    def uses_keyring(self):
+        """True if secrets go to the system keyring, checking once that it has a working backend"""
+        if self._use_keyring and not self._keyring_checked:
+            self._keyring_checked = True
+            try:
+                keyring.get_password(KEYRING_SERVICE, "")
+            except KeyringError as e:
+                self._keyring_failed(e)
+        return self._use_keyring
+
+    def get(self, name):
+        """Return a stored secret, or "" if there is none"""
+        if self._use_keyring:
+            try:
+                return keyring.get_password(KEYRING_SERVICE, name) or ""
+            except KeyringError as e:
+                self._keyring_failed(e)
+        return self._read_file().get(name, "")
+
+    def set(self, name, value):
+        """Store a secret; an empty value removes it"""
+        if self._use_keyring:
+            try:
+                if value:
+                    keyring.set_password(KEYRING_SERVICE, name, value)
+                elif keyring.get_password(KEYRING_SERVICE, name) is not None:
+                    keyring.delete_password(KEYRING_SERVICE, name)
+                return
+            except KeyringError as e:
+                self._keyring_failed(e)
+        secrets = self._read_file()
+        if value:
+            secrets[name] = value
+        else:
+            secrets.pop(name, None)
+        self._write_file(secrets)
+
+    def _keyring_failed(self, error):
+        # No usable backend (e.g. a headless Linux session); fall back to the file from now on
+        print(f"Keyring unavailable, keeping secrets in {self.secrets_file}: {error}")
+        self._use_keyring = False
+
+    def _read_file(self):
+        try:
+            with open(self.secrets_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self, secrets):
+        if not secrets:
+            if os.path.exists(self.secrets_file):
+                os.remove(self.secrets_file)
+            return
+        os.makedirs(os.path.dirname(self.secrets_file) or ".", exist_ok=True)
+        temp_file = self.secrets_file + '.tmp'
+        # Created readable by the current user only, before anything is written to it
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(secrets, f, indent=2)
+        os.chmod(temp_file, 0o600)
+        os.replace(temp_file, self.secrets_file)
@@ -1,13 +1,52 @@
 import json
 import os
+from contextlib import contextmanager
+from src.settings.secret_store import SecretStore, secrets_file_for
+
+DEFAULT_SETTINGS_FILE = 'data/app_settings.json'
+
+# Settings kept in the SecretStore (keyring or a user-only file), never in the settings file
+SECRET_KEYS = ('smtp_password',)
+
+# One shared SettingsManager per settings file, see get_settings_manager()
+_shared_managers = {}
+
+def get_settings_manager(settings_file=DEFAULT_SETTINGS_FILE):
+    """Return the process-wide SettingsManager for a settings file, creating it on first use"""
+    key = os.path.abspath(settings_file)
+    if key not in _shared_managers:
+        _shared_managers[key] = SettingsManager(settings_file)
+    return _shared_managers[key]
 
 class SettingsManager:
-    def __init__(self, settings_file='data/app_settings.json'):
+    def __init__(self, settings_file=DEFAULT_SETTINGS_FILE):
         self.settings_file = settings_file
+        # Nesting depth of batch() and whether a write is pending
+        self._batch_depth = 0
+        self._pending_save = False
+        self._pending_changes = {}
+        self._listeners = []
+        self.secrets = SecretStore(secrets_file_for(settings_file))
         self.default_settings = {
             'remember_window_position': False,
             'window_position': {'x': 100, 'y': 100, 'width': 320, 'height': 1024, 'screen_name': ''},
-            'default_emails': ''  # Only default_emails is needed now
+            'default_emails': '',  # Only default_emails is needed now
+            'calendar_heatmap': False,
+            'calendar_heatmap_metric': 'current_leads.grand_total',
+            # Optional SMTP delivery for reports; the email application (mailto) is used otherwise
+            'smtp_enabled': False,
+            'smtp_host': '',
+            'smtp_port': 587,
+            'smtp_use_tls': True,
+            'smtp_username': '',
+            'smtp_password': '',  # Stored through self.secrets, see SECRET_KEYS
+            'smtp_from': '',
+            # Weekly batch reports for every caller, see ReportScheduler
+            'scheduled_reports': False,
+            'scheduled_reports_folder': '',
+            'scheduled_reports_last_week': '',
+            'scheduled_reports_failed_week': '',  # Week whose failure has already been reported
+            'scheduled_reports_retry_after': ''  # No new attempt before this ISO timestamp
         }
         self.settings = self.load_settings()
 
@@ -22,6 +61,13 @@ class SettingsManager:
                 for key in self.default_settings.keys():
                     if key in loaded_settings:
                         settings[key] = loaded_settings[key]
+                # Older versions kept secrets in the settings file; move them out
+                migrated = {key: settings.pop(key) for key in SECRET_KEYS if settings.get(key)}
+                if migrated:
+                    for key, value in migrated.items():
+                        self.secrets.set(key, value)
+                    self.settings = settings
+                    self.save_settings()
                 return settings
             except Exception:
                 return self.default_settings.copy()
@@ -32,23 +78,73 @@ class SettingsManager:
         # Ensure only settings defined in default_settings are saved
         settings_to_save = {}
         for key in self.default_settings.keys():
+            if key in SECRET_KEYS:
+                continue
             if key in self.settings:
                 settings_to_save[key] = self.settings[key]
             else:
                 settings_to_save[key] = self.default_settings[key] # ensure default value if not set
 
-        with open(self.settings_file, 'w') as f:
+        # Write to a temporary file first so a crash never leaves a truncated settings file
+        temp_file = self.settings_file + '.tmp'
+        with open(temp_file, 'w') as f:
             json.dump(settings_to_save, f, indent=2)
+        os.replace(temp_file, self.settings_file)
 
     def get(self, key, default=None):
+        if key in SECRET_KEYS:
+            return self.secrets.get(key)
         # If default is not provided, use the one from default_settings
         effective_default = default if default is not None else self.default_settings.get(key)
         return self.settings.get(key, effective_default)
 
     def set(self, key, value):
-        if key in self.default_settings: # Only allow setting keys that are defined in defaults
+        if key in SECRET_KEYS:
+            if self.secrets.get(key) != value:
+                self.secrets.set(key, value)
+                self._notify(key, value)
+        elif key in self.default_settings: # Only allow setting keys that are defined in defaults
+            if key in self.settings and self.settings[key] == value:
+                return # Unchanged, nothing to write or notify
             self.settings[key] = value
-            self.save_settings()
+            if self._batch_depth > 0:
+                self._pending_save = True # Written once when the outermost batch ends
+            else:
+                self.save_settings()
+            self._notify(key, value)
         else:
             # Optionally, log a warning or raise an error for unknown settings keys
-            print(f"Warning: Attempted to set an unknown setting '{key}'.")
\ No newline at end of file
+            print(f"Warning: Attempted to set an unknown setting '{key}'.")
+
+    @contextmanager
+    def batch(self):
+        """Coalesce several set() calls into a single write when the outermost batch exits.
+        Subscribers are then notified once per changed key, with its final value."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                if self._pending_save:
+                    self._pending_save = False
+                    self.save_settings()
+                changes, self._pending_changes = self._pending_changes, {}
+                for key, value in changes.items():
+                    self._notify(key, value)
+
+    def subscribe(self, callback):
+        """Call callback(key, value) whenever a setting changes"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, key, value):
+        if self._batch_depth > 0:
+            self._pending_changes[key] = value
+            return
+        for callback in list(self._listeners):
+            callback(key, value)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import threading
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QDateEdit, QComboBox,
+                           QPushButton, QFormLayout, QFileDialog, QMessageBox, QSizePolicy)
+from PyQt6.QtCore import QDate, pyqtSignal
+from src.data.exporter import EXPORT_FORMATS, export_entries
+
+class ExportDialog(QDialog):
+    # (entries written, file path, error message or "")
+    export_finished = pyqtSignal(int, str, str)
+    
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        
+        self.setWindowTitle("Export Data")
+        self.setMinimumWidth(300)
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        # Default to the current month
+        current_date = QDate.currentDate()
+        self.start_date = QDateEdit()
+        self.start_date.setDate(QDate(current_date.year(), current_date.month(), 1))
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        form.addRow("Start Date:", self.start_date)
+        
+        self.end_date = QDateEdit()
+        self.end_date.setDate(current_date)
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        form.addRow("End Date:", self.end_date)
+        
+        self.user_combo = QComboBox()
+        self.user_combo.addItem("All Users")
+        self.user_combo.addItems(self.data_manager.get_users())
+        form.addRow("Caller:", self.user_combo)
+        
+        self.format_combo = QComboBox()
+        for fmt, label in EXPORT_FORMATS.items():
+            self.format_combo.addItem(label, fmt)
+        form.addRow("Format:", self.format_combo)
+        
+        layout.addLayout(form)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        
+        self.export_button = QPushButton("Export...")
+        self.export_button.clicked.connect(self.export)
+        buttons_layout.addWidget(self.export_button)
+        
+        done_button = QPushButton("Done")
+        done_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(done_button)
+        
+        layout.addLayout(buttons_layout)
+        
+        self.export_finished.connect(self.on_export_finished)
+    
+    def export(self):
+        fmt = self.format_combo.currentData()
+        start_date_str = self.start_date.date().toString("yyyy-MM-dd")
+        end_date_str = self.end_date.date().toString("yyyy-MM-dd")
+        users = None
+        if self.user_combo.currentIndex() > 0:
+            users = [self.user_combo.currentText()]
+        
+        default_name = f"touch-points_{start_date_str}_{end_date_str}.{fmt}"
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Data", default_name, EXPORT_FORMATS[fmt])
+        if not file_path:
+            return
+        
+        # Large exports run on a background thread over a snapshot, so edits and autosaves
+        # carry on meanwhile without changing what is being written
+        snapshot = self.data_manager.snapshot()
+        self.export_button.setEnabled(False)
+        self.export_button.setText("Exporting...")
+        thread = threading.Thread(target=self._run_export, daemon=True,
+                                  args=(snapshot, file_path, fmt, start_date_str, end_date_str, users))
+        thread.start()
+    
+    def _run_export(self, snapshot, file_path, fmt, start_date_str, end_date_str, users):
+        try:
+            count = export_entries(snapshot, file_path, fmt, start_date_str, end_date_str, users)
+        except Exception as e:
+            self.export_finished.emit(0, file_path, str(e))
+            return
+        self.export_finished.emit(count, file_path, "")
+    
+    def on_export_finished(self, count, file_path, error):
+        self.export_button.setEnabled(True)
+        self.export_button.setText("Export...")
+        if error:
+            QMessageBox.critical(self, "Export Failed", f"Failed to export data: {error}")
+            return
+        QMessageBox.information(self, "Export Complete", f"Exported {count} entries to {file_path}")
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QSpinBox,
+                           QPushButton, QLabel, QTableView, QHeaderView, QSizePolicy)
+from PyQt6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
+from src.data.indexes import ENTRY_COUNT
+from src.data.schema import entry_metric_paths, metric_label
+
+PERIODS = ["Today", "This Week", "Last Week", "This Month", "Last Month", "This Year"]
+
+# How often an open leaderboard re-ranks, so it can stay up on a wallboard
+REFRESH_INTERVAL_MS = 5000
+
+def period_range(period, today=None):
+    """Return the inclusive (start, end) ISO dates of a named period; weeks start on Monday"""
+    today = today or date.today()
+    if period == "Today":
+        start, end = today, today
+    elif period == "This Week":
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+    elif period == "Last Week":
+        end = today - timedelta(days=today.weekday() + 1)
+        start = end - timedelta(days=6)
+    elif period == "This Month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    elif period == "Last Month":
+        end = today.replace(day=1) - timedelta(days=1)
+        start = end.replace(day=1)
+    elif period == "This Year":
+        start, end = today.replace(month=1, day=1), today.replace(month=12, day=31)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return start.isoformat(), end.isoformat()
+
+class LeaderboardModel(QAbstractTableModel):
+    """Read-only table of (rank, user, total) rows"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+    
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
+            return None
+        return ["Rank", "Caller", "Total"][section]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() != 1:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return str(self.rows[index.row()][index.column()])
+
+class LeaderboardDialog(QDialog):
+    """Callers ranked by one metric over a period; re-ranks while open"""
+    
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        
+        self.setWindowTitle("Leaderboard")
+        self.setMinimumSize(420, 400)
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        self.metric_combo = QComboBox()
+        for path in entry_metric_paths():
+            self.metric_combo.addItem(metric_label(path), path)
+        self.metric_combo.addItem("Days Logged", ENTRY_COUNT)
+        self.metric_combo.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        form.addRow("Metric:", self.metric_combo)
+        
+        self.period_combo = QComboBox()
+        self.period_combo.addItems(PERIODS)
+        self.period_combo.setCurrentText("This Week")
+        form.addRow("Period:", self.period_combo)
+        
+        self.top_spin = QSpinBox()
+        self.top_spin.setRange(1, 100)
+        self.top_spin.setValue(5)
+        form.addRow("Show Top:", self.top_spin)
+        
+        layout.addLayout(form)
+        
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.model = LeaderboardModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        done_button = QPushButton("Done")
+        done_button.clicked.connect(self.close)
+        buttons_layout.addWidget(done_button)
+        layout.addLayout(buttons_layout)
+        
+        self.metric_combo.currentIndexChanged.connect(self.refresh)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        self.top_spin.valueChanged.connect(self.refresh)
+        
+        # Ranking reads prefix sums, so a periodic refresh stays cheap; this also rolls
+        # "Today" and "This Week" over at midnight
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        
+        self.refresh()
+    
+    def refresh(self):
+        path = self.metric_combo.currentData()
+        start_date_str, end_date_str = period_range(self.period_combo.currentText())
+        leaders = self.data_manager.get_leaderboard(path, start_date_str, end_date_str,
+                                                    self.top_spin.value())
+        self.model.set_rows([(rank, user, total) for rank, (user, total) in enumerate(leaders, 1)])
+        if leaders:
+            self.summary_label.setText(f"{self.metric_combo.currentText()}, "
+                                       f"{start_date_str} to {end_date_str}")
+        else:
+            self.summary_label.setText(f"No entries between {start_date_str} and {end_date_str}.")
+    
+    def on_data_changed(self, changed_keys, users_changed):
+        self.refresh()
+    
+    def showEvent(self, a0):
+        super().showEvent(a0)
+        self.data_manager.subscribe(self.on_data_changed)
+        self.refresh_timer.start()
+        self.refresh()
+    
+    def hideEvent(self, a0):
+        self.refresh_timer.stop()
+        self.data_manager.unsubscribe(self.on_data_changed)
+        super().hideEvent(a0)
@@ -1,20 +1,30 @@
+import os
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QComboBox, QDateEdit, QTextEdit, QPushButton, QMessageBox, QFormLayout, 
-    QSpinBox, QInputDialog, QSizePolicy, QApplication, QTabWidget, QMenuBar, QGroupBox, QScrollArea)
-from PyQt6.QtGui import QAction, QTextCharFormat, QFont, QGuiApplication
-from PyQt6.QtCore import QDate, Qt
+    QInputDialog, QSizePolicy, QApplication, QTabWidget, QMenuBar, QGroupBox, QScrollArea, QDataWidgetMapper)
+from PyQt6.QtGui import QAction, QTextCharFormat, QFont, QGuiApplication, QColor
+from PyQt6.QtCore import QDate, Qt, QFileSystemWatcher, QTimer
 from src.ui.report_dialog import ReportDialog
+from src.ui.report_scheduler import ReportScheduler
+from src.ui.maintenance_dialog import MaintenanceDialog
+from src.ui.search_dialog import SearchDialog
+from src.ui.export_dialog import ExportDialog
+from src.ui.trends_dialog import TrendsDialog
+from src.ui.leaderboard_dialog import LeaderboardDialog
 from src.data.data_manager import DataManager
-from src.settings.settings_manager import SettingsManager
+from src.settings.settings_manager import get_settings_manager
 from src.ui.settings_dialog import SettingsDialog
+from src.ui.metrics_model import MetricsModel, MetricDelegate, form_blocks
+from src.data.schema import TABS
+from src.data.indexes import ENTRY_COUNT
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         # Autosave on every change; no dirty flag needed.
         
-        # Initialize settings manager
-        self.settings_manager = SettingsManager()
+        # Use the shared settings manager
+        self.settings_manager = get_settings_manager()
         
         # Initialize data manager
         self.data_manager = DataManager('data/tally_data.json')
@@ -36,6 +46,10 @@ class MainWindow(QMainWindow):
         self.main_layout.setContentsMargins(20, 20, 20, 20)
         self.main_layout.setSpacing(15)
         
+        # Created on first use by show_search_dialog() and show_leaderboard_dialog()
+        self.search_dialog = None
+        self.leaderboard_dialog = None
+        
         # Create menus
         self.create_menus()
         
@@ -64,6 +78,33 @@ class MainWindow(QMainWindow):
         self.user_combo.currentIndexChanged.connect(self.load_user_entry)
         self.user_combo.currentIndexChanged.connect(self.update_save_button_state)  # Enable/disable Save
         self.date_edit.dateChanged.connect(self.load_user_entry)
+        
+        # Restyle the calendar when the user pages to another month or changes heatmap settings
+        calendar = self.date_edit.calendarWidget()
+        if calendar:
+            calendar.currentPageChanged.connect(self.update_calendar_styles)
+        self.settings_manager.subscribe(self.on_setting_changed)
+        
+        # Pick up entries saved by other instances sharing the data file
+        self.data_manager.subscribe(self.on_data_changed)
+        self.data_watcher = QFileSystemWatcher(self)
+        self.data_watcher.fileChanged.connect(self.schedule_data_reload)
+        self.data_watcher.directoryChanged.connect(self.schedule_data_reload)
+        self.watch_data_file()
+        # Coalesce bursts of change notifications into one reload
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(300)
+        self.reload_timer.timeout.connect(self.reload_data)
+        # Polling fallback for network shares where change notifications are unreliable
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(5000)
+        self.poll_timer.timeout.connect(self.reload_data)
+        self.poll_timer.start()
+        
+        # Weekly batch reports, if enabled in settings
+        self.report_scheduler = ReportScheduler(self.data_manager.file_path, self.settings_manager, self)
+        self.report_scheduler.report_status.connect(self.on_scheduled_reports_finished)
     
     def create_menus(self):
         # Create menu bar
@@ -92,6 +133,30 @@ class MainWindow(QMainWindow):
             self.generate_report_action.triggered.connect(self.show_report_dialog)
             reports_menu.addAction(self.generate_report_action)
             self.generate_report_action.setEnabled(False)
+            
+            trends_action = QAction("Trends...", self)
+            trends_action.triggered.connect(self.show_trends_dialog)
+            reports_menu.addAction(trends_action)
+            
+            leaderboard_action = QAction("Leaderboard...", self)
+            leaderboard_action.triggered.connect(self.show_leaderboard_dialog)
+            reports_menu.addAction(leaderboard_action)
+            
+            export_action = QAction("Export Data...", self)
+            export_action.triggered.connect(self.show_export_dialog)
+            reports_menu.addAction(export_action)
+        
+        # Tools menu
+        tools_menu = menu_bar.addMenu("Tools")
+        if tools_menu is not None:
+            search_action = QAction("Search Notes...", self)
+            search_action.setShortcut("Ctrl+F")
+            search_action.triggered.connect(self.show_search_dialog)
+            tools_menu.addAction(search_action)
+            
+            maintenance_action = QAction("Storage Maintenance...", self)
+            maintenance_action.triggered.connect(self.show_maintenance_dialog)
+            tools_menu.addAction(maintenance_action)
 
     def show_settings_dialog(self):
         settings_dialog = SettingsDialog(self.settings_manager, self)
@@ -125,25 +190,20 @@ class MainWindow(QMainWindow):
         date_layout.addWidget(self.date_edit)
         self.current_date_str = self.date_edit.date().toString("yyyy-MM-dd")
         
-        # Initialize widget dictionaries for tracking
-        self.current_leads_widgets = {}
-        self.prospects_widgets = {}
-        
-        # Initialize override tracking dictionaries
-        self.current_leads_overrides = {}
-        self.prospects_overrides = {}
+        # Metric values live in a single model; each tab's editors are mapped onto its row
+        self.metrics_model = MetricsModel(self)
+        self.metrics_delegate = MetricDelegate(self)
+        self.metric_editors = {}  # tab_name -> {path: spinbox}
+        self.metric_mappers = {}  # tab_name -> QDataWidgetMapper
+        self.metrics_model.dataChanged.connect(self._on_metrics_changed)
         
         # Create tabs
         tab_widget = QTabWidget()
         tab_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        
-        # Create Current Leads tab
-        current_leads_tab = self._create_metrics_tab("current_leads")
-        tab_widget.addTab(current_leads_tab, "Current Leads")
-        
-        # Create Prospects tab  
-        prospects_tab = self._create_metrics_tab("prospects")
-        tab_widget.addTab(prospects_tab, "Prospects")
+        for tab_name, tab_label in TABS:
+            tab_widget.addTab(self._create_metrics_tab(tab_name), tab_label)
+        # After the mappers' own handlers, which leave them without a current row on reset
+        self.metrics_model.modelReset.connect(self._on_metrics_reset)
         
         self.main_layout.addWidget(tab_widget)
         
@@ -157,7 +217,7 @@ class MainWindow(QMainWindow):
         self.main_layout.addWidget(self.comments_edit)
     
     def _create_metrics_tab(self, tab_name):
-        """Create a metrics tab with the new structure"""
+        """Create a metrics tab, generating one editor per metric from the schema"""
         # Create scroll area
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -169,434 +229,70 @@ class MainWindow(QMainWindow):
         tab_layout.setSpacing(12)
         tab_layout.setContentsMargins(10, 10, 10, 10)
         
-        # Determine which widget dictionary to use
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        
-        # CALL - Connects Section
-        connects_group = self._create_call_section("CALL - Connects", "call_connects", tab_name, widgets_dict, overrides_dict)
-        tab_layout.addWidget(connects_group)
-        
-        # CALL - Non-Connects Section
-        nonconnects_group = self._create_call_section("CALL - Non-Connects", "call_nonconnects", tab_name, widgets_dict, overrides_dict)
-        tab_layout.addWidget(nonconnects_group)
-        
-        # CALL - In Betweens Section
-        inbetweens_group = self._create_call_section("CALL - In Betweens", "call_inbetweens", tab_name, widgets_dict, overrides_dict)
-        tab_layout.addWidget(inbetweens_group)
-        
-        # OTHER Section
-        other_group = self._create_other_section(tab_name, widgets_dict, overrides_dict)
-        tab_layout.addWidget(other_group)
-        
-        # GRAND TOTAL - bold and right-aligned, occupying ~25% width
-        grand_total_layout = QHBoxLayout()
-        grand_total_layout.setSpacing(10)
-        grand_total_layout.addStretch(3)  # More stretch to push further right (75% empty space)
-        grand_total_label = QLabel("<b>GRAND TOTAL:</b>")
-        grand_total_label.setMinimumWidth(90)  # Slightly reduced
-        grand_total_layout.addWidget(grand_total_label)
-        
-        grand_total_spinbox = self._configure_spinbox(QSpinBox(), 0, 99999, min_width=60)  # Reduced min width
-        grand_total_spinbox.setObjectName("grand-total")
-        # Make font bold
-        font = grand_total_spinbox.font()
-        font.setBold(True)
-        grand_total_spinbox.setFont(font)
-        grand_total_spinbox.valueChanged.connect(lambda: self._on_total_manually_changed("grand_total", tab_name))
-        widgets_dict["grand_total"] = grand_total_spinbox
-        overrides_dict["grand_total"] = False
-        grand_total_layout.addWidget(grand_total_spinbox)
-        
-        tab_layout.addLayout(grand_total_layout)
-        
-        # Additional Metrics Section
-        additional_group = QGroupBox("Additional Metrics")
-        additional_layout = QFormLayout()
-        additional_layout.setSpacing(10)
-        additional_layout.setContentsMargins(15, 20, 15, 15)
-        additional_layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow)
-        additional_layout.setLabelAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        for metric_name, display_name in [
-            ("enrolment_packs", "Enrolment Packs"),
-            ("quotes", "Quotes"),
-            ("cpd_booked", "CPD Booked")
-        ]:
-            spinbox = self._configure_spinbox(QSpinBox(), 0, 999)
-            spinbox.valueChanged.connect(lambda val, mn=metric_name, tn=tab_name: self._on_additional_metric_changed(mn, tn))
-            additional_layout.addRow(display_name + ":", spinbox)
-            widgets_dict[metric_name] = spinbox
-        
-        additional_group.setLayout(additional_layout)
-        tab_layout.addWidget(additional_group)
-        
-        # GRAND TOTAL 2 - bold and right-aligned, occupying ~25% width
-        grand_total_2_layout = QHBoxLayout()
-        grand_total_2_layout.setSpacing(10)
-        grand_total_2_layout.addStretch(3)  # More stretch to push further right (75% empty space)
-        grand_total_2_label = QLabel("<b>GRAND TOTAL:</b>")
-        grand_total_2_label.setMinimumWidth(90)  # Slightly reduced
-        grand_total_2_layout.addWidget(grand_total_2_label)
-        
-        grand_total_2_spinbox = self._configure_spinbox(QSpinBox(), 0, 99999, min_width=60)  # Reduced min width
-        grand_total_2_spinbox.setObjectName("grand-total")
-        # Make font bold
-        font = grand_total_2_spinbox.font()
-        font.setBold(True)
-        grand_total_2_spinbox.setFont(font)
-        grand_total_2_spinbox.valueChanged.connect(lambda: self._on_total_manually_changed("grand_total_2", tab_name))
-        widgets_dict["grand_total_2"] = grand_total_2_spinbox
-        overrides_dict["grand_total_2"] = False
-        grand_total_2_layout.addWidget(grand_total_2_spinbox)
-        
-        tab_layout.addLayout(grand_total_2_layout)
-        # Removed addStretch() to eliminate large gap before Notes box
+        self.metric_editors[tab_name] = {}
+        mapper = QDataWidgetMapper(self)
+        mapper.setModel(self.metrics_model)
+        mapper.setItemDelegate(self.metrics_delegate)
+        self.metric_mappers[tab_name] = mapper
+        for title, fields, total_path in form_blocks():
+            if title is None:
+                # GRAND TOTAL - bold and right-aligned, occupying ~25% width
+                tab_layout.addLayout(self._create_total_row(tab_name, total_path, "<b>GRAND TOTAL:</b>", 90, spacing=10))
+                continue
+            
+            group = QGroupBox(title)
+            layout = QFormLayout()
+            layout.setSpacing(10)
+            layout.setContentsMargins(15, 20, 15, 15)
+            layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow)
+            layout.setLabelAlignment(Qt.AlignmentFlag.AlignLeft)
+            for path, display_name in fields:
+                layout.addRow(display_name + ":", self._create_editor(group, tab_name, path))
+            if total_path is not None:
+                # Section total (editable) - bold and right-aligned, occupying ~25% width
+                layout.addRow(self._create_total_row(tab_name, total_path, "<b>Total:</b>", 50, parent=group))
+            group.setLayout(layout)
+            tab_layout.addWidget(group)
+        
+        mapper.setCurrentIndex(self.metrics_model.tabs.index(tab_name))
         
         # Set content widget and return scroll area
         scroll.setWidget(content_widget)
         return scroll
     
-    def _configure_spinbox(self, spinbox, min_val, max_val, min_width=80):
-        """Helper to configure spinbox with appropriate sizing"""
-        spinbox.setMinimum(min_val)
-        spinbox.setMaximum(max_val)
-        spinbox.setMinimumWidth(min_width)
-        spinbox.setMinimumHeight(32)  # Increased to 32 to prevent bottom cutoff
-        spinbox.setMaximumHeight(32)
-        spinbox.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        # Reduce internal padding and adjust alignment for better number visibility
-        spinbox.setStyleSheet("""
-            QSpinBox { 
-                padding: 4px 4px 4px 4px !important; 
-                padding-left: 6px !important;
-            }
-        """)
-        spinbox.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-        return spinbox
-    
-    def _create_call_section(self, title, section_key, tab_name, widgets_dict, overrides_dict):
-        """Create a CALL section (Connects, Non-Connects, or In Betweens)"""
-        group = QGroupBox(title)
-        layout = QFormLayout()
-        layout.setSpacing(10)
-        layout.setContentsMargins(15, 20, 15, 15)
-        layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow)
-        layout.setLabelAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        # Create nested dictionary for this section
-        widgets_dict[section_key] = {}
-        overrides_dict[section_key] = False
-        
-        # Add input fields
-        for field_name, display_name in [
-            ("paid_lead", "Paid Lead"),
-            ("organic_lead", "Organic Lead"),
-            ("agents", "Agents")
-        ]:
-            spinbox = self._configure_spinbox(QSpinBox(), 0, 999)
-            spinbox.valueChanged.connect(lambda val, sk=section_key, tn=tab_name: self._on_section_value_changed(sk, tn))
-            layout.addRow(display_name + ":", spinbox)
-            widgets_dict[section_key][field_name] = spinbox
-        
-        # Add Total field (editable) - bold and right-aligned, occupying ~25% width
+    def _create_total_row(self, tab_name, path, label_text, label_width, spacing=None, parent=None):
+        """Create a right-aligned row holding a label and the editor for a total"""
         total_layout = QHBoxLayout()
+        if spacing is not None:
+            total_layout.setSpacing(spacing)
         total_layout.addStretch(3)  # More stretch to push further right (75% empty space)
-        total_label = QLabel("<b>Total:</b>")
-        total_label.setMinimumWidth(50)  # Reduced from 80
+        total_label = QLabel(label_text)
+        total_label.setMinimumWidth(label_width)
         total_layout.addWidget(total_label)
-        
-        total_spinbox = self._configure_spinbox(QSpinBox(), 0, 9999, min_width=60)  # Reduced min width
-        total_spinbox.setObjectName("total-field")
-        # Make font bold
-        font = total_spinbox.font()
-        font.setBold(True)
-        total_spinbox.setFont(font)
-        total_spinbox.valueChanged.connect(lambda: self._on_section_total_manually_changed(section_key, tab_name))
-        total_layout.addWidget(total_spinbox)
-        
-        layout.addRow(total_layout)
-        widgets_dict[section_key]["total"] = total_spinbox
-        
-        group.setLayout(layout)
-        return group
+        total_layout.addWidget(self._create_editor(parent, tab_name, path))
+        return total_layout
     
-    def _create_other_section(self, tab_name, widgets_dict, overrides_dict):
-        """Create the OTHER section (SMS, Email)"""
-        group = QGroupBox("OTHER")
-        layout = QFormLayout()
-        layout.setSpacing(10)
-        layout.setContentsMargins(15, 20, 15, 15)
-        layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow)
-        layout.setLabelAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        widgets_dict["other"] = {}
-        overrides_dict["other"] = False
-        
-        for field_name, display_name in [("sms", "SMS"), ("email", "Email")]:
-            spinbox = self._configure_spinbox(QSpinBox(), 0, 999)
-            spinbox.valueChanged.connect(lambda val, tn=tab_name: self._on_other_value_changed(tn))
-            layout.addRow(display_name + ":", spinbox)
-            widgets_dict["other"][field_name] = spinbox
-        
-        # Add Total field - bold and right-aligned, occupying ~25% width
-        total_layout = QHBoxLayout()
-        total_layout.addStretch(3)  # More stretch to push further right (75% empty space)
-        total_label = QLabel("<b>Total:</b>")
-        total_label.setMinimumWidth(50)  # Reduced from 80
-        total_layout.addWidget(total_label)
-        
-        total_spinbox = self._configure_spinbox(QSpinBox(), 0, 9999, min_width=60)  # Reduced min width
-        total_spinbox.setObjectName("total-field")
-        # Make font bold
-        font = total_spinbox.font()
-        font.setBold(True)
-        total_spinbox.setFont(font)
-        total_spinbox.valueChanged.connect(lambda: self._on_other_total_manually_changed(tab_name))
-        total_layout.addWidget(total_spinbox)
-        
-        layout.addRow(total_layout)
-        widgets_dict["other"]["total"] = total_spinbox
-        
-        group.setLayout(layout)
-        return group
+    def _create_editor(self, parent, tab_name, path):
+        """Create the spinbox for one metric and map it to its column of the tab's row"""
+        column = self.metrics_model.columns[path]
+        editor = self.metrics_delegate.create_spinbox(parent, self.metrics_model, column)
+        self.metric_mappers[tab_name].addMapping(editor, column)
+        self.metric_editors[tab_name][path] = editor
+        return editor
     
     # ============================================================================
-    # Calculation Methods
+    # Model Binding
     # ============================================================================
     
-    def _on_section_value_changed(self, section_key, tab_name):
-        """Called when paid_lead, organic_lead, or agents changes in a CALL section"""
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        
-        # Calculate the new total
-        calculated_total = self._calculate_section_total(widgets_dict[section_key])
-        override_amount = overrides_dict.get(section_key, 0)
-        
-        # Apply override if it exists
-        new_total = calculated_total + override_amount
-        
-        widgets_dict[section_key]["total"].blockSignals(True)
-        widgets_dict[section_key]["total"].setValue(new_total)
-        
-        # Update styling based on override
-        if override_amount != 0:
-            widgets_dict[section_key]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict[section_key]["total"].setToolTip(f"Override: {override_amount:+d} from calculated value")
-        else:
-            widgets_dict[section_key]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict[section_key]["total"].setToolTip("")
-        
-        widgets_dict[section_key]["total"].blockSignals(False)
-        
-        # Recalculate grand total
-        self._recalculate_grand_total(tab_name)
-        self.mark_dirty()
-        self.autosave()
-    
-    def _on_section_total_manually_changed(self, section_key, tab_name):
-        """Called when user manually edits a section total"""
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        
-        # Calculate what it should be automatically
-        auto_total = self._calculate_section_total(widgets_dict[section_key])
-        manual_total = widgets_dict[section_key]["total"].value()
-        
-        # Store the difference as the override amount
-        overrides_dict[section_key] = manual_total - auto_total
-        
-        # Apply visual indicator if there's an override
-        if overrides_dict[section_key] != 0:
-            widgets_dict[section_key]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict[section_key]["total"].setToolTip(f"Override: {overrides_dict[section_key]:+d} from calculated value")
-        else:
-            widgets_dict[section_key]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict[section_key]["total"].setToolTip("")
-        
-        # Recalculate grand total
-        self._recalculate_grand_total(tab_name)
-        self.mark_dirty()
-        self.autosave()
-    
-    def _on_other_value_changed(self, tab_name):
-        """Called when SMS or Email changes in OTHER section"""
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        
-        # Calculate the new total
-        calculated_total = widgets_dict["other"]["sms"].value() + widgets_dict["other"]["email"].value()
-        override_amount = overrides_dict.get("other", 0)
-        
-        # Apply override if it exists
-        new_total = calculated_total + override_amount
-        
-        widgets_dict["other"]["total"].blockSignals(True)
-        widgets_dict["other"]["total"].setValue(new_total)
-        
-        # Update styling based on override
-        if override_amount != 0:
-            widgets_dict["other"]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict["other"]["total"].setToolTip(f"Override: {override_amount:+d} from calculated value")
-        else:
-            widgets_dict["other"]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict["other"]["total"].setToolTip("")
-        
-        widgets_dict["other"]["total"].blockSignals(False)
-        
-        # Recalculate grand total
-        self._recalculate_grand_total(tab_name)
-        self.mark_dirty()
-        self.autosave()
-    
-    def _on_other_total_manually_changed(self, tab_name):
-        """Called when user manually edits OTHER total"""
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        
-        # Calculate what it should be automatically
-        auto_total = widgets_dict["other"]["sms"].value() + widgets_dict["other"]["email"].value()
-        manual_total = widgets_dict["other"]["total"].value()
-        
-        # Store the difference as the override amount
-        overrides_dict["other"] = manual_total - auto_total
-        
-        # Apply visual indicator if there's an override
-        if overrides_dict["other"] != 0:
-            widgets_dict["other"]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict["other"]["total"].setToolTip(f"Override: {overrides_dict['other']:+d} from calculated value")
-        else:
-            widgets_dict["other"]["total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict["other"]["total"].setToolTip("")
-        
-        self._recalculate_grand_total(tab_name)
-        self.mark_dirty()
-        self.autosave()
-    
-    def _on_additional_metric_changed(self, metric_name, tab_name):
-        """Called when enrolment_packs, quotes, or cpd_booked changes"""
-        self._recalculate_grand_total_2(tab_name)
+    def _on_metrics_changed(self, top_left, bottom_right, roles=None):
+        """Single entry point for every metric change; the mappers update the editors"""
         self.mark_dirty()
         self.autosave()
     
-    def _on_total_manually_changed(self, total_type, tab_name):
-        """Called when user manually edits grand_total or grand_total_2"""
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        
-        # Calculate what it should be automatically
-        if total_type == "grand_total":
-            auto_total = (widgets_dict["call_connects"]["total"].value() +
-                         widgets_dict["call_nonconnects"]["total"].value() +
-                         widgets_dict["call_inbetweens"]["total"].value() +
-                         widgets_dict["other"]["total"].value())
-        else:  # grand_total_2
-            auto_total = (widgets_dict["enrolment_packs"].value() +
-                         widgets_dict["quotes"].value() +
-                         widgets_dict["cpd_booked"].value())
-        
-        manual_total = widgets_dict[total_type].value()
-        
-        # Store the difference as the override amount
-        overrides_dict[total_type] = manual_total - auto_total
-        
-        # Apply visual indicator if there's an override
-        if overrides_dict[total_type] != 0:
-            widgets_dict[total_type].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict[total_type].setToolTip(f"Override: {overrides_dict[total_type]:+d} from calculated value")
-        else:
-            widgets_dict[total_type].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict[total_type].setToolTip("")
-        
-        self.mark_dirty()
-        self.autosave()
-    
-    def _calculate_section_total(self, section_widgets):
-        """Calculate total for a CALL section"""
-        return (section_widgets["paid_lead"].value() + 
-                section_widgets["organic_lead"].value() + 
-                section_widgets["agents"].value())
-    
-    def _recalculate_grand_total(self, tab_name):
-        """Recalculate GRAND TOTAL (sum of all CALL sections + OTHER)"""
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        
-        # Calculate the new total
-        calculated_total = (widgets_dict["call_connects"]["total"].value() +
-                           widgets_dict["call_nonconnects"]["total"].value() +
-                           widgets_dict["call_inbetweens"]["total"].value() +
-                           widgets_dict["other"]["total"].value())
-        override_amount = overrides_dict.get("grand_total", 0)
-        
-        # Apply override if it exists
-        new_total = calculated_total + override_amount
-        
-        widgets_dict["grand_total"].blockSignals(True)
-        widgets_dict["grand_total"].setValue(new_total)
-        
-        # Update styling based on override
-        if override_amount != 0:
-            widgets_dict["grand_total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict["grand_total"].setToolTip(f"Override: {override_amount:+d} from calculated value")
-        else:
-            widgets_dict["grand_total"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict["grand_total"].setToolTip("")
-        
-        widgets_dict["grand_total"].blockSignals(False)
-    
-    def _recalculate_grand_total_2(self, tab_name):
-        """Recalculate GRAND TOTAL 2 (sum of additional metrics)"""
-        widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-        overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-        
-        # Calculate the new total
-        calculated_total = (widgets_dict["enrolment_packs"].value() +
-                           widgets_dict["quotes"].value() +
-                           widgets_dict["cpd_booked"].value())
-        override_amount = overrides_dict.get("grand_total_2", 0)
-        
-        # Apply override if it exists
-        new_total = calculated_total + override_amount
-        
-        widgets_dict["grand_total_2"].blockSignals(True)
-        widgets_dict["grand_total_2"].setValue(new_total)
-        
-        # Update styling based on override
-        if override_amount != 0:
-            widgets_dict["grand_total_2"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; background-color: #FFFACD !important; }")
-            widgets_dict["grand_total_2"].setToolTip(f"Override: {override_amount:+d} from calculated value")
-        else:
-            widgets_dict["grand_total_2"].setStyleSheet("QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }")
-            widgets_dict["grand_total_2"].setToolTip("")
-        
-        widgets_dict["grand_total_2"].blockSignals(False)
-    
-    def _recalculate_all_totals(self):
-        """Recalculate all totals for both tabs"""
-        for tab_name in ["current_leads", "prospects"]:
-            widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-            overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-            
-            # Recalculate section totals
-            for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-                if not overrides_dict.get(section_key, False):
-                    total = self._calculate_section_total(widgets_dict[section_key])
-                    widgets_dict[section_key]["total"].blockSignals(True)
-                    widgets_dict[section_key]["total"].setValue(total)
-                    widgets_dict[section_key]["total"].blockSignals(False)
-            
-            # Recalculate other total
-            if not overrides_dict.get("other", False):
-                total = widgets_dict["other"]["sms"].value() + widgets_dict["other"]["email"].value()
-                widgets_dict["other"]["total"].blockSignals(True)
-                widgets_dict["other"]["total"].setValue(total)
-                widgets_dict["other"]["total"].blockSignals(False)
-            
-            # Recalculate grand totals
-            self._recalculate_grand_total(tab_name)
-            self._recalculate_grand_total_2(tab_name)
+    def _on_metrics_reset(self):
+        """Repopulate every editor after a new entry was loaded into the model"""
+        for tab_name, mapper in self.metric_mappers.items():
+            mapper.setCurrentIndex(self.metrics_model.tabs.index(tab_name))
     
     # ============================================================================
     # Existing Methods (to be updated)
@@ -681,50 +377,19 @@ class MainWindow(QMainWindow):
         else:
             date_str = self.date_edit.date().toString("yyyy-MM-dd")
         
-        # Extract data from both tabs
-        current_leads_data = self._extract_tab_data(self.current_leads_widgets)
-        prospects_data = self._extract_tab_data(self.prospects_widgets)
-        
         entry_data = {
             "user": self.user_combo.currentText(),
-            "date": date_str,
-            "current_leads": current_leads_data,
-            "prospects": prospects_data,
-            "comments": self.comments_edit.toPlainText()
+            "date": date_str
         }
+        # Extract data from both tabs
+        for tab_name, _ in TABS:
+            entry_data[tab_name] = self.metrics_model.section_data(tab_name)
+        entry_data["comments"] = self.comments_edit.toPlainText()
         
-        self.data_manager.save_entry(entry_data)
-        self.dirty = False
+        # Stay dirty if the save failed (e.g. another instance held the file lock)
+        # so the next change retries and closing still warns
+        self.dirty = not self.data_manager.save_entry(entry_data)
     
-    def _extract_tab_data(self, widgets_dict):
-        """Extract data from widget dictionary into save format"""
-        data = {}
-        
-        # Extract CALL sections
-        for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-            data[section_key] = {
-                "paid_lead": widgets_dict[section_key]["paid_lead"].value(),
-                "organic_lead": widgets_dict[section_key]["organic_lead"].value(),
-                "agents": widgets_dict[section_key]["agents"].value(),
-                "total": widgets_dict[section_key]["total"].value()
-            }
-        
-        # Extract OTHER section
-        data["other"] = {
-            "sms": widgets_dict["other"]["sms"].value(),
-            "email": widgets_dict["other"]["email"].value(),
-            "total": widgets_dict["other"]["total"].value()
-        }
-        
-        # Extract standalone fields
-        data["grand_total"] = widgets_dict["grand_total"].value()
-        data["enrolment_packs"] = widgets_dict["enrolment_packs"].value()
-        data["quotes"] = widgets_dict["quotes"].value()
-        data["cpd_booked"] = widgets_dict["cpd_booked"].value()
-        data["grand_total_2"] = widgets_dict["grand_total_2"].value()
-        
-        return data
-
     def load_user_entry(self):
         """Load existing entry data for the selected user and date into the UI."""
         self.current_date_str = self.date_edit.date().toString("yyyy-MM-dd")
@@ -733,150 +398,122 @@ class MainWindow(QMainWindow):
             return
         
         date_str = self.date_edit.date().toString("yyyy-MM-dd")
-        entry = self.data_manager.get_entry_for_user_and_date(user, date_str)
-        
-        # Block all signals during load
-        self._block_all_signals(True)
-        
-        if entry:
-            # Load current leads data
-            self._populate_tab_widgets(self.current_leads_widgets, entry.get("current_leads", {}))
-            # Load prospects data
-            self._populate_tab_widgets(self.prospects_widgets, entry.get("prospects", {}))
-            # Load comments
-            self.comments_edit.setText(entry.get("comments", ""))
-        else:
-            # Clear all to zeros
-            self._clear_all_widgets()
-        
-        # Unblock signals
-        self._block_all_signals(False)
-        
-        # Reset override flags (data loaded from file is not considered overridden)
-        self._reset_all_overrides()
-        
-        # Recalculate all totals to ensure consistency
-        self._recalculate_all_totals()
+        entry = self.data_manager.query().where(user=user, date=date_str).first()
+        
+        # Suspend repaints so the whole form is redrawn once at the end
+        self.central_widget.setUpdatesEnabled(False)
+        try:
+            # Totals are recalculated and overrides cleared by the model;
+            # editors are refreshed from its modelReset signal
+            self.metrics_model.load_entry(entry)
+            
+            comments = entry.get("comments", "") if entry else ""
+            if self.comments_edit.toPlainText() != comments:
+                self.comments_edit.blockSignals(True)
+                self.comments_edit.setText(comments)
+                self.comments_edit.blockSignals(False)
+            self.update_read_only_state(date_str)
+        finally:
+            self.central_widget.setUpdatesEnabled(True)
         
         self.update_calendar_styles()
         self.dirty = False
     
-    def _populate_tab_widgets(self, widgets_dict, data):
-        """Populate widgets from loaded data"""
-        # Populate CALL sections
-        for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-            section_data = data.get(section_key, {})
-            for field in ["paid_lead", "organic_lead", "agents", "total"]:
-                value = section_data.get(field, 0)
-                widgets_dict[section_key][field].setValue(value)
-        
-        # Populate OTHER section
-        other_data = data.get("other", {})
-        for field in ["sms", "email", "total"]:
-            value = other_data.get(field, 0)
-            widgets_dict["other"][field].setValue(value)
-        
-        # Populate standalone fields
-        widgets_dict["grand_total"].setValue(data.get("grand_total", 0))
-        widgets_dict["enrolment_packs"].setValue(data.get("enrolment_packs", 0))
-        widgets_dict["quotes"].setValue(data.get("quotes", 0))
-        widgets_dict["cpd_booked"].setValue(data.get("cpd_booked", 0))
-        widgets_dict["grand_total_2"].setValue(data.get("grand_total_2", 0))
-    
-    def _clear_all_widgets(self):
-        """Clear all widgets to zero"""
-        for widgets_dict in [self.current_leads_widgets, self.prospects_widgets]:
-            # Clear CALL sections
-            for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-                for field in ["paid_lead", "organic_lead", "agents", "total"]:
-                    widgets_dict[section_key][field].setValue(0)
-            
-            # Clear OTHER section
-            for field in ["sms", "email", "total"]:
-                widgets_dict["other"][field].setValue(0)
-            
-            # Clear standalone fields
-            widgets_dict["grand_total"].setValue(0)
-            widgets_dict["enrolment_packs"].setValue(0)
-            widgets_dict["quotes"].setValue(0)
-            widgets_dict["cpd_booked"].setValue(0)
-            widgets_dict["grand_total_2"].setValue(0)
-        
-        self.comments_edit.clear()
-    
-    def _block_all_signals(self, block):
-        """Block or unblock signals for all widgets"""
-        for widgets_dict in [self.current_leads_widgets, self.prospects_widgets]:
-            # Block CALL sections
-            for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-                for widget in widgets_dict[section_key].values():
-                    widget.blockSignals(block)
-            
-            # Block OTHER section
-            for widget in widgets_dict["other"].values():
-                widget.blockSignals(block)
-            
-            # Block standalone fields
-            widgets_dict["grand_total"].blockSignals(block)
-            widgets_dict["enrolment_packs"].blockSignals(block)
-            widgets_dict["quotes"].blockSignals(block)
-            widgets_dict["cpd_booked"].blockSignals(block)
-            widgets_dict["grand_total_2"].blockSignals(block)
-        
-        self.comments_edit.blockSignals(block)
-    
-    def _reset_all_overrides(self):
-        """Reset all override flags and styling"""
-        for tab_name in ["current_leads", "prospects"]:
-            widgets_dict = self.current_leads_widgets if tab_name == "current_leads" else self.prospects_widgets
-            overrides_dict = self.current_leads_overrides if tab_name == "current_leads" else self.prospects_overrides
-            
-            # Reset section overrides
-            for section_key in ["call_connects", "call_nonconnects", "call_inbetweens"]:
-                overrides_dict[section_key] = False
-                widgets_dict[section_key]["total"].setStyleSheet("")
-                widgets_dict[section_key]["total"].setToolTip("")
-            
-            # Reset other override
-            overrides_dict["other"] = False
-            widgets_dict["other"]["total"].setStyleSheet("")
-            widgets_dict["other"]["total"].setToolTip("")
-            
-            # Reset grand total overrides
-            overrides_dict["grand_total"] = False
-            widgets_dict["grand_total"].setStyleSheet("")
-            widgets_dict["grand_total"].setToolTip("")
-            
-            overrides_dict["grand_total_2"] = False
-            widgets_dict["grand_total_2"].setStyleSheet("")
-            widgets_dict["grand_total_2"].setToolTip("")
+    def update_read_only_state(self, date_str):
+        """Days before the archive cutoff are archived and can be viewed but not edited"""
+        archived = self.data_manager.is_archived(date_str)
+        if archived == self.comments_edit.isReadOnly():
+            return
+        for editors in self.metric_editors.values():
+            for editor in editors.values():
+                editor.setReadOnly(archived)
+        self.comments_edit.setReadOnly(archived)
+        self.comments_edit.setPlaceholderText("Archived (read-only)" if archived else "Notes...")
     
     def show_report_dialog(self):
         user = self.user_combo.currentText()
-        report_dialog = ReportDialog(self.data_manager)
+        report_dialog = ReportDialog(self.data_manager, self.settings_manager)
         if user:
             report_dialog.setWindowTitle(f"Report for {user}")
         report_dialog.exec()
     
-    def update_calendar_styles(self):
-        """Update the date picker's calendar to bold dates with call stats for the selected user."""
+    def show_maintenance_dialog(self):
+        maintenance_dialog = MaintenanceDialog(self.data_manager, self)
+        maintenance_dialog.exec()
+        # Deliver any changes (e.g. a de-duplicated user list) to the form
+        self.reload_data()
+    
+    def show_search_dialog(self):
+        # Modeless and kept around, so several hits can be visited in turn
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self.data_manager, self)
+            self.search_dialog.entry_selected.connect(self.go_to_entry)
+        self.search_dialog.update_users()
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+        self.search_dialog.search_edit.setFocus()
+    
+    def go_to_entry(self, user, date_str):
+        """Show the entry for a user and date in the form"""
+        if self.user_combo.findText(user) < 0:
+            return
+        self.user_combo.setCurrentText(user)
+        self.date_edit.setDate(QDate.fromString(date_str, "yyyy-MM-dd"))
+    
+    def on_scheduled_reports_finished(self, summary, warn):
+        if warn:
+            QMessageBox.warning(self, "Scheduled Reports", summary)
+        else:
+            # The first line has the counts and folder; the full summary is in the folder's log
+            self.statusBar().showMessage(summary.splitlines()[0], 30000)
+    
+    def show_trends_dialog(self):
+        trends_dialog = TrendsDialog(self.data_manager, self.user_combo.currentText(), self)
+        trends_dialog.exec()
+    
+    def show_leaderboard_dialog(self):
+        # Modeless so it can stay open beside the form
+        if self.leaderboard_dialog is None:
+            self.leaderboard_dialog = LeaderboardDialog(self.data_manager, self)
+        self.leaderboard_dialog.show()
+        self.leaderboard_dialog.raise_()
+        self.leaderboard_dialog.activateWindow()
+    
+    def show_export_dialog(self):
+        export_dialog = ExportDialog(self.data_manager, self)
+        export_dialog.exec()
+    
+    def update_calendar_styles(self, year=None, month=None):
+        """Style the date picker's calendar for the selected user: dates with stats are bold and,
+        in heatmap mode, shaded by the chosen metric. Only the visible month is computed."""
         calendar = self.date_edit.calendarWidget()
         if not calendar:
             return
         
-        # Clear formatting for the current year's dates.
-        fmt_default = QTextCharFormat()
-        current_year = QDate.currentDate().year()
-        dt = QDate(current_year, 1, 1)
-        end_date = QDate(current_year, 12, 31)
-        while dt <= end_date:
-            calendar.setDateTextFormat(dt, fmt_default)
-            dt = dt.addDays(1)
+        # A null date clears every date format
+        calendar.setDateTextFormat(QDate(), QTextCharFormat())
         
         selected_user = self.user_combo.currentText()
         if not selected_user:
             return
         
+        if year is None or month is None:
+            shown = self.date_edit.date()
+            year, month = shown.year(), shown.month()
+        # Include the neighbouring weeks that the calendar grid also shows
+        first_day = QDate(year, month, 1).addDays(-7)
+        last_day = QDate(year, month, 1).addMonths(1).addDays(14)
+        
+        heatmap = self.settings_manager.get('calendar_heatmap', False)
+        metric = self.settings_manager.get('calendar_heatmap_metric') if heatmap else ENTRY_COUNT
+        date_range = (first_day.toString("yyyy-MM-dd"), last_day.toString("yyyy-MM-dd"))
+        daily = self.data_manager.query().where(user=selected_user, date_between=date_range) \
+            .group_by("date").sum(metric)
+        if not daily:
+            return
+        daily_totals = {date_str: totals[metric] for date_str, totals in daily.items()}
+        
         # Retrieve the base font from the calendar widget.
         default_font = calendar.font()
         boldFont = QFont(default_font)
@@ -884,25 +521,61 @@ class MainWindow(QMainWindow):
         boldFormat = QTextCharFormat()
         boldFormat.setFont(boldFont)
         
-        # Bold the dates for which the selected user has stats.
-        data = self.data_manager._load_data()  # Using internal load.
-        for entry in data.get("entries", []):
-            if entry.get("user") == selected_user:
-                date_val = entry.get("date")
-                if not isinstance(date_val, str):
-                    continue  # Skip if date is not a string.
-                qdate = QDate.fromString(date_val, "yyyy-MM-dd")
-                if qdate.isValid():
-                    calendar.setDateTextFormat(qdate, boldFormat)
+        max_value = max(daily_totals.values()) if heatmap else 0
+        for date_str, value in daily_totals.items():
+            fmt = boldFormat
+            if max_value > 0 and value > 0:
+                fmt = QTextCharFormat(boldFormat)
+                fmt.setBackground(self._heatmap_color(value / max_value))
+            calendar.setDateTextFormat(QDate.fromString(date_str, "yyyy-MM-dd"), fmt)
+    
+    def _heatmap_color(self, intensity):
+        """Blend from white towards the theme cyan (#00BCD4) by intensity in [0, 1]"""
+        intensity = 0.15 + 0.85 * intensity
+        return QColor(round(255 - (255 - 0x00) * intensity),
+                      round(255 - (255 - 0xBC) * intensity),
+                      round(255 - (255 - 0xD4) * intensity))
+    
+    def on_setting_changed(self, key, value):
+        if key in ('calendar_heatmap', 'calendar_heatmap_metric'):
+            self.update_calendar_styles()
+    
+    def watch_data_file(self):
+        """Watch the data file and its folder. Saves replace the file, which drops it from the watch list."""
+        paths = [os.path.abspath(self.data_manager.file_path)]
+        paths.append(os.path.dirname(paths[0]))
+        watched = set(self.data_watcher.files()) | set(self.data_watcher.directories())
+        for path in paths:
+            if path not in watched and os.path.exists(path):
+                self.data_watcher.addPath(path)
+    
+    def schedule_data_reload(self, path=None):
+        self.reload_timer.start()
+    
+    def reload_data(self):
+        self.watch_data_file()
+        self.data_manager.reload_if_changed()
+    
+    def on_data_changed(self, changed_keys, users_changed):
+        """Refresh the view after another instance changed the data file"""
+        if users_changed:
+            self.update_user_dropdown()
+        user = self.user_combo.currentText()
+        if not user:
+            return
+        if (user, self.date_edit.date().toString("yyyy-MM-dd")) in changed_keys:
+            self.load_user_entry()
+        elif any(changed_user == user for changed_user, _ in changed_keys):
+            self.update_calendar_styles()
     
     def closeEvent(self, a0):
         self.save_window_geometry()
+        self.data_manager.save_snapshot()
         if a0 is not None and hasattr(a0, 'accept'):
             a0.accept()
 
     def autosave(self):
         self.save_data()
-        self.dirty = False
 
     def mark_dirty(self):
         self.dirty = True
@@ -919,6 +592,7 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.StandardButton.No:
                 return
         self.save_window_geometry()
+        self.data_manager.save_snapshot()
         QApplication.quit()
 
     def apply_window_geometry(self):
@@ -0,0 +1,55 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton,
+                           QMessageBox)
+from PyQt6.QtGui import QFontDatabase
+from src.data.maintenance import format_storage_report, format_compaction_result
+
+class MaintenanceDialog(QDialog):
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        
+        self.setWindowTitle("Storage Maintenance")
+        self.setMinimumSize(520, 420)
+        
+        layout = QVBoxLayout(self)
+        
+        self.report_display = QPlainTextEdit()
+        self.report_display.setReadOnly(True)
+        self.report_display.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.report_display)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        
+        self.compact_btn = QPushButton("Compact...")
+        self.compact_btn.setToolTip("Merge duplicate entries, drop unused fields and sort entries (a backup is kept)")
+        self.compact_btn.clicked.connect(self.compact)
+        buttons_layout.addWidget(self.compact_btn)
+        
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(close_button)
+        
+        layout.addLayout(buttons_layout)
+        
+        self.refresh_report()
+    
+    def refresh_report(self):
+        self.report_display.setPlainText(format_storage_report(self.data_manager.get_storage_stats()))
+    
+    def compact(self):
+        reply = QMessageBox.question(
+            self,
+            "Compact Data File",
+            "Rewrite the data file with duplicate entries merged, unused fields removed and entries sorted?\n\n"
+            "A backup of the current file is kept next to it.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        result = self.data_manager.compact(backup=True)
+        if result is None:
+            QMessageBox.critical(self, "Error", "Compaction failed; the data file was not changed.")
+            return
+        self.refresh_report()
+        QMessageBox.information(self, "Storage Maintenance", format_compaction_result(result))
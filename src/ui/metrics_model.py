@@ -0,0 +1,211 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtWidgets import QStyledItemDelegate, QSpinBox, QSizePolicy
+from src.data.schema import (TABS, CALL_SECTIONS, CALL_FIELDS, OTHER_FIELDS, ADDITIONAL_METRICS,
+                             section_metric_paths, section_total_rules, get_metric, set_metric)
+
+SPINBOX_STYLE = "QSpinBox { padding: 4px 4px 4px 4px !important; padding-left: 6px !important; }"
+
+OverrideRole = Qt.ItemDataRole.UserRole + 1
+
+
+def form_blocks():
+    """Describe how a tab is laid out: (group title or None, [(path, label)], total path or None).
+    Blocks without a title are standalone grand totals."""
+    blocks = []
+    for section_key, title in CALL_SECTIONS:
+        fields = [(f"{section_key}.{field}", label) for field, label in CALL_FIELDS]
+        blocks.append((title, fields, f"{section_key}.total"))
+    blocks.append(("OTHER", [(f"other.{field}", label) for field, label in OTHER_FIELDS], "other.total"))
+    blocks.append((None, [], "grand_total"))
+    blocks.append(("Additional Metrics", list(ADDITIONAL_METRICS), None))
+    blocks.append((None, [], "grand_total_2"))
+    return blocks
+
+
+def editor_maximum(path):
+    """Upper bound of the editor for a metric path"""
+    if path in ("grand_total", "grand_total_2"):
+        return 99999
+    if path.endswith(".total"):
+        return 9999
+    return 999
+
+
+class MetricsModel(QAbstractTableModel):
+    """Numeric fields of the current entry: one row per tab, one column per metric path.
+    Totals are recalculated here; a manual edit of a total is kept as an override
+    relative to its calculated value."""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tabs = [tab_key for tab_key, _ in TABS]
+        self.paths = list(section_metric_paths())
+        self.columns = {path: column for column, path in enumerate(self.paths)}
+        self.maximums = [editor_maximum(path) for path in self.paths]
+        
+        # Totals as (total column, component columns), in dependency order
+        self.total_rules = [(self.columns[total], [self.columns[p] for p in components])
+                            for total, components in section_total_rules()]
+        self.total_columns = {total for total, _ in self.total_rules}
+        
+        self._values = [[0] * len(self.paths) for _ in self.tabs]
+        self._overrides = [[0] * len(self.paths) for _ in self.tabs]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tabs)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+    
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.paths[section]
+        return self.tabs[section]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._values[row][column]
+        if role == OverrideRole:
+            return self._overrides[row][column]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            override_amount = self._overrides[row][column]
+            return f"Override: {override_amount:+d} from calculated value" if override_amount else ""
+        return None
+    
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        """Set a metric and recalculate dependent totals, emitting a single dataChanged.
+        Setting a total records the difference from its calculated value as an override."""
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        value = self._clamp(column, int(value))
+        values = self._values[row]
+        if values[column] == value:
+            return False
+        
+        values[column] = value
+        changed = [column]
+        if column in self.total_columns:
+            self._overrides[row][column] = value - self._calculated(row, column)
+        changed.extend(self._recalculate(row, after=column))
+        
+        self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+        return True
+    
+    def value(self, tab_key, path):
+        return self._values[self.tabs.index(tab_key)][self.columns[path]]
+    
+    def override(self, tab_key, path):
+        return self._overrides[self.tabs.index(tab_key)][self.columns[path]]
+    
+    def index_for(self, tab_key, path):
+        return self.index(self.tabs.index(tab_key), self.columns[path])
+    
+    def load_entry(self, entry):
+        """Replace all values from an entry (or zeros if None).
+        Loaded data is not considered overridden, so totals are recalculated."""
+        self.beginResetModel()
+        for row, tab_key in enumerate(self.tabs):
+            section = entry.get(tab_key, {}) if entry else {}
+            self._values[row] = [self._clamp(column, get_metric(section, path))
+                                 for column, path in enumerate(self.paths)]
+            self._overrides[row] = [0] * len(self.paths)
+            self._recalculate(row)
+        self.endResetModel()
+    
+    def section_data(self, tab_key):
+        """Return the values of a tab in the nested save format"""
+        values = self._values[self.tabs.index(tab_key)]
+        section = {}
+        for column, path in enumerate(self.paths):
+            set_metric(section, path, values[column])
+        return section
+    
+    def _clamp(self, column, value):
+        return max(0, min(value, self.maximums[column]))
+    
+    def _calculated(self, row, total_column):
+        values = self._values[row]
+        for total, components in self.total_rules:
+            if total == total_column:
+                return sum(values[c] for c in components)
+        return 0
+    
+    def _recalculate(self, row, after=None):
+        """Recompute totals (calculated value plus override) and return the columns that changed.
+        If after is given, only totals depending on that column, directly or indirectly, are touched."""
+        values = self._values[row]
+        overrides = self._overrides[row]
+        dirty = None if after is None else {after}
+        changed = []
+        for total, components in self.total_rules:
+            if dirty is not None and not dirty.intersection(components):
+                continue
+            new_total = self._clamp(total, sum(values[c] for c in components) + overrides[total])
+            if values[total] != new_total:
+                values[total] = new_total
+                changed.append(total)
+                if dirty is not None:
+                    dirty.add(total)
+        return changed
+
+
+class MetricDelegate(QStyledItemDelegate):
+    """Creates and updates the spinbox editors used by the metrics form.
+    Editors commit every change straight away, so the form saves as values are stepped."""
+    
+    def createEditor(self, parent, option, index):
+        return self.create_spinbox(parent, index.model(), index.column())
+    
+    def create_spinbox(self, parent, model, column):
+        """Create the editor for a model column; used directly by forms built on QDataWidgetMapper"""
+        path = model.paths[column]
+        spinbox = QSpinBox(parent)
+        spinbox.setMinimum(0)
+        spinbox.setMaximum(editor_maximum(path))
+        is_total = column in model.total_columns
+        spinbox.setMinimumWidth(60 if is_total else 80)
+        spinbox.setMinimumHeight(32)  # Increased to 32 to prevent bottom cutoff
+        spinbox.setMaximumHeight(32)
+        spinbox.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        # Reduce internal padding and adjust alignment for better number visibility
+        spinbox.setStyleSheet(SPINBOX_STYLE)
+        spinbox.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        if is_total:
+            spinbox.setObjectName("grand-total" if "." not in path else "total-field")
+            font = spinbox.font()
+            font.setBold(True)
+            spinbox.setFont(font)
+        spinbox.valueChanged.connect(lambda _value, editor=spinbox: self.commitData.emit(editor))
+        return spinbox
+    
+    def setEditorData(self, editor, index):
+        """Push the model value into the editor without re-emitting valueChanged.
+        The value, tooltip and override property are only touched when they differ."""
+        if not index.isValid():
+            return  # A mapper populates editors before its current row is set
+        value = index.data(Qt.ItemDataRole.EditRole)
+        if editor.value() != value:
+            editor.blockSignals(True)
+            editor.setValue(value)
+            editor.blockSignals(False)
+        tooltip = index.data(Qt.ItemDataRole.ToolTipRole)
+        if editor.toolTip() != tooltip:
+            editor.setToolTip(tooltip)
+        # Override highlighting comes from styles.qss; re-polish only when the state flips
+        overridden = bool(index.data(OverrideRole))
+        if bool(editor.property("overridden")) != overridden:
+            editor.setProperty("overridden", overridden)
+            editor.style().unpolish(editor)
+            editor.style().polish(editor)
+    
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.value(), Qt.ItemDataRole.EditRole)
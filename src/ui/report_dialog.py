@@ -1,14 +1,39 @@
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, 
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QComboBox,
                            QDateEdit, QPushButton, QTextEdit, QLineEdit,
                            QMessageBox, QFormLayout, QSizePolicy, QHBoxLayout)
-from PyQt6.QtCore import QDate
+from PyQt6.QtCore import QDate, QObject, pyqtSignal
 import webbrowser
 import urllib.parse # Re-add for mailto URL encoding
+from src.settings.settings_manager import get_settings_manager
+from src.reports.report_engine import (collect_report_data, collect_comparison_data,
+                                       previous_period, same_period_last_year)
+from src.reports.renderer import render_report, render_comparison
+from src.mail.email_queue import SmtpConfig, get_email_queue, SENT, FAILED, RETRYING
+
+# Comparison modes: label -> function mapping the report period to the one it is compared with
+# (None for no comparison; a custom range is entered in the dialog)
+COMPARE_MODES = [
+    ("Nothing", None),
+    ("Previous Period", previous_period),
+    ("Same Period Last Year", same_period_last_year),
+    ("Custom Range", None),
+]
+
+class EmailStatusRelay(QObject):
+    """Carries delivery status from the email worker thread to the dialog"""
+    status_changed = pyqtSignal(str, str)
+    
+    def __init__(self, recipients, subject, body):
+        super().__init__()
+        self.recipients = recipients
+        self.subject = subject
+        self.body = body
 
 class ReportDialog(QDialog):
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, settings_manager=None):
         super().__init__()
         self.data_manager = data_manager
+        self.settings_manager = settings_manager or get_settings_manager()
         
         self.setWindowTitle("Generate Report")
         self.setMinimumSize(300, 400)
@@ -36,6 +61,28 @@ class ReportDialog(QDialog):
         self.end_date.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         date_form.addRow("End Date:", self.end_date)
         
+        # Optional period-over-period comparison
+        self.compare_combo = QComboBox()
+        for label, _ in COMPARE_MODES:
+            self.compare_combo.addItem(label)
+        self.compare_combo.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        date_form.addRow("Compare With:", self.compare_combo)
+        
+        self.compare_start_date = QDateEdit()
+        self.compare_start_date.setCalendarPopup(True)
+        self.compare_start_date.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        date_form.addRow("Compare Start:", self.compare_start_date)
+        
+        self.compare_end_date = QDateEdit()
+        self.compare_end_date.setCalendarPopup(True)
+        self.compare_end_date.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        date_form.addRow("Compare End:", self.compare_end_date)
+        
+        self.compare_combo.currentIndexChanged.connect(self.update_compare_dates)
+        self.start_date.dateChanged.connect(self.update_compare_dates)
+        self.end_date.dateChanged.connect(self.update_compare_dates)
+        self.update_compare_dates()
+        
         layout.addLayout(date_form)
         
         # Generate report button
@@ -60,8 +107,18 @@ class ReportDialog(QDialog):
             self.email_to.setText(default_emails)
         email_layout.addRow("Email To:", self.email_to)
         
+        # Follow changes to the default recipients while the dialog is open
+        self.settings_manager.subscribe(self.on_setting_changed)
+        self.finished.connect(lambda: self.settings_manager.unsubscribe(self.on_setting_changed))
+        
         layout.addLayout(email_layout)
         
+        # SMTP delivery progress
+        self.delivery_status = QLabel("")
+        self.delivery_status.setWordWrap(True)
+        self.delivery_status.setVisible(False)
+        layout.addWidget(self.delivery_status)
+        
         # Buttons layout
         buttons_layout = QHBoxLayout()
         buttons_layout.addStretch() # Add stretch to push buttons to the right
@@ -79,146 +136,68 @@ class ReportDialog(QDialog):
         
         layout.addLayout(buttons_layout) # Add the horizontal buttons layout to the main vertical layout
     
+    def update_compare_dates(self):
+        """Fill in the comparison range for the chosen mode; only a custom range is editable"""
+        label = self.compare_combo.currentText()
+        previous_range = dict(COMPARE_MODES)[label]
+        custom = label == "Custom Range"
+        self.compare_start_date.setEnabled(custom)
+        self.compare_end_date.setEnabled(custom)
+        if previous_range is not None and self.start_date.date() <= self.end_date.date():
+            start_date_str, end_date_str = previous_range(self.start_date.date().toString("yyyy-MM-dd"),
+                                                          self.end_date.date().toString("yyyy-MM-dd"))
+            self.compare_start_date.setDate(QDate.fromString(start_date_str, "yyyy-MM-dd"))
+            self.compare_end_date.setDate(QDate.fromString(end_date_str, "yyyy-MM-dd"))
+    
+    def comparison_range(self):
+        """The inclusive (start, end) range to compare with, or None when not comparing"""
+        if self.compare_combo.currentText() == "Nothing":
+            return None
+        return (self.compare_start_date.date().toString("yyyy-MM-dd"),
+                self.compare_end_date.date().toString("yyyy-MM-dd"))
+    
     def generate_report(self):
         start_date_str = self.start_date.date().toString("yyyy-MM-dd")
         end_date_str = self.end_date.date().toString("yyyy-MM-dd")
-        data = self.data_manager.get_data_for_date_range(start_date_str, end_date_str)
-        user_name = None
-        if data:
-            user_name = data[0].get("user", None)
-        if not data:
+        compare_range = self.comparison_range()
+        for label, (range_start, range_end) in [("Report", (start_date_str, end_date_str)),
+                                                ("Comparison", compare_range or ("", ""))]:
+            if range_start > range_end:
+                QMessageBox.warning(self, "Invalid Date Range",
+                                    f"{label} start date must be on or before its end date.")
+                return
+        if compare_range is not None:
+            self.generate_comparison((start_date_str, end_date_str), compare_range)
+            return
+        # A snapshot, so the report is consistent even if an autosave lands while it is built
+        report_data = collect_report_data(self.data_manager.snapshot(), start_date_str, end_date_str)
+        if report_data is None:
             self.report_display.setText("No data found for the selected date range.")
             self.send_btn.setEnabled(False)
             return
         
-        def aggregate_new_structure(data, section_key):
-            """Aggregate data for new schema structure"""
-            result = {
-                'call_connects': {'paid_lead': 0, 'organic_lead': 0, 'agents': 0, 'total': 0},
-                'call_nonconnects': {'paid_lead': 0, 'organic_lead': 0, 'agents': 0, 'total': 0},
-                'call_inbetweens': {'paid_lead': 0, 'organic_lead': 0, 'agents': 0, 'total': 0},
-                'other': {'sms': 0, 'email': 0, 'total': 0},
-                'grand_total': 0,
-                'enrolment_packs': 0,
-                'quotes': 0,
-                'cpd_booked': 0,
-                'grand_total_2': 0
-            }
-            
-            for entry in data:
-                section = entry.get(section_key, {})
-                if not section:
-                    continue
-                
-                # Aggregate each call section
-                for call_section in ['call_connects', 'call_nonconnects', 'call_inbetweens']:
-                    call_data = section.get(call_section, {})
-                    for field in ['paid_lead', 'organic_lead', 'agents', 'total']:
-                        try:
-                            result[call_section][field] += int(call_data.get(field, 0))
-                        except (ValueError, TypeError):
-                            pass
-                
-                # Aggregate OTHER
-                other_data = section.get('other', {})
-                for field in ['sms', 'email', 'total']:
-                    try:
-                        result['other'][field] += int(other_data.get(field, 0))
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Aggregate grand totals and additional metrics
-                try:
-                    result['grand_total'] += int(section.get('grand_total', 0))
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    result['enrolment_packs'] += int(section.get('enrolment_packs', 0))
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    result['quotes'] += int(section.get('quotes', 0))
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    result['cpd_booked'] += int(section.get('cpd_booked', 0))
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    result['grand_total_2'] += int(section.get('grand_total_2', 0))
-                except (ValueError, TypeError):
-                    pass
-            
-            return result
-        
-        report_lines = []
-        if user_name:
-            report_lines.append(f"Touch-Point Tracker Report for {user_name}")
-        else:
-            report_lines.append("Touch-Point Tracker Report")
-        report_lines.append(f"Period: {start_date_str} to {end_date_str}")
-        
-        for tab_label, section_key in [("Current Leads", "current_leads"), ("Prospects", "prospects")]:
-            report_lines.append(f"\n=== {tab_label} ===")
-            agg = aggregate_new_structure(data, section_key)
-            
-            # CALL - Connects
-            report_lines.append("\nCALL - Connects:")
-            report_lines.append(f"  Paid Lead: {agg['call_connects']['paid_lead']}")
-            report_lines.append(f"  Organic Lead: {agg['call_connects']['organic_lead']}")
-            report_lines.append(f"  Agents: {agg['call_connects']['agents']}")
-            report_lines.append(f"  Total: {agg['call_connects']['total']}")
-            
-            # CALL - Non-Connects
-            report_lines.append("\nCALL - Non-Connects:")
-            report_lines.append(f"  Paid Lead: {agg['call_nonconnects']['paid_lead']}")
-            report_lines.append(f"  Organic Lead: {agg['call_nonconnects']['organic_lead']}")
-            report_lines.append(f"  Agents: {agg['call_nonconnects']['agents']}")
-            report_lines.append(f"  Total: {agg['call_nonconnects']['total']}")
-            
-            # CALL - In Betweens
-            report_lines.append("\nCALL - In Betweens:")
-            report_lines.append(f"  Paid Lead: {agg['call_inbetweens']['paid_lead']}")
-            report_lines.append(f"  Organic Lead: {agg['call_inbetweens']['organic_lead']}")
-            report_lines.append(f"  Agents: {agg['call_inbetweens']['agents']}")
-            report_lines.append(f"  Total: {agg['call_inbetweens']['total']}")
-            
-            # OTHER
-            report_lines.append("\nOTHER:")
-            report_lines.append(f"  SMS: {agg['other']['sms']}")
-            report_lines.append(f"  Email: {agg['other']['email']}")
-            report_lines.append(f"  Total: {agg['other']['total']}")
-            
-            # GRAND TOTAL
-            report_lines.append(f"\nGRAND TOTAL: {agg['grand_total']}")
-            
-            # Additional Metrics
-            report_lines.append(f"\nEnrolment Packs: {agg['enrolment_packs']}")
-            report_lines.append(f"Quotes: {agg['quotes']}")
-            report_lines.append(f"CPD Booked: {agg['cpd_booked']}")
-            
-            # GRAND TOTAL 2
-            report_lines.append(f"\nGRAND TOTAL: {agg['grand_total_2']}")
-        
-        # Add comments/notes section
-        comments_with_dates = []
-        for entry in data:
-            comment = entry.get("comments", "").strip()
-            if comment:
-                date = entry.get("date", "")
-                comments_with_dates.append((date, comment))
-        
-        if comments_with_dates:
-            # Sort by date
-            comments_with_dates.sort(key=lambda x: x[0])
-            report_lines.append("\n=== Notes ===")
-            for date, comment in comments_with_dates:
-                report_lines.append(f"\n{date}:")
-                report_lines.append(f"  {comment}")
+        # Plain text for mailto, HTML for the preview and SMTP email body
+        user_name, totals, notes = report_data
+        self.current_generated_text = render_report(user_name, start_date_str, end_date_str, totals, notes, "text")
+        self.current_generated_html = render_report(user_name, start_date_str, end_date_str, totals, notes, "html")
+        self.current_subject = f"Touch-Point Tracker Report {start_date_str} to {end_date_str}"
+        self.report_display.setHtml(self.current_generated_html)
+        self.send_btn.setEnabled(True)
+    
+    def generate_comparison(self, period, compare_range):
+        # Both periods are read from the same snapshot
+        report_data = collect_comparison_data(self.data_manager.snapshot(), period, compare_range)
+        if report_data is None:
+            self.report_display.setText("No data found for either date range.")
+            self.send_btn.setEnabled(False)
+            return
         
-        report_text = "\n".join(report_lines)
-        self.report_display.setText(report_text)
-        self.current_generated_text = report_text
+        user_name, totals, previous_totals = report_data
+        self.current_generated_text = render_comparison(user_name, period, compare_range, totals, previous_totals, "text")
+        self.current_generated_html = render_comparison(user_name, period, compare_range, totals, previous_totals, "html")
+        self.current_subject = (f"Touch-Point Tracker Report {period[0]} to {period[1]} "
+                                f"vs {compare_range[0]} to {compare_range[1]}")
+        self.report_display.setHtml(self.current_generated_html)
         self.send_btn.setEnabled(True)
 
     def send_report(self):
@@ -229,30 +208,61 @@ class ReportDialog(QDialog):
             
             report_plain_text = self.current_generated_text
             
-            to_email = self.email_to.text().strip()
-            start_date_str = self.start_date.date().toString("yyyy-MM-dd")
-            end_date_str = self.end_date.date().toString("yyyy-MM-dd")
-            subject = f"Touch-Point Tracker Report {start_date_str} to {end_date_str}"
-
-            mailto_parts = []
-            if to_email:
-                # Handle multiple recipients if your UI supports it (e.g., semicolon separated)
-                recipients = [r.strip() for r in to_email.split(';') if r.strip()]
-                if recipients:
-                    mailto_parts.append(",".join(recipients)) # mailto typically uses comma for multiple To's
-            
-            # Encode subject and body for the mailto URL
-            encoded_subject = urllib.parse.quote(subject)
-            encoded_body = urllib.parse.quote(report_plain_text)
-            
-            mailto_url = f"mailto:{';'.join(mailto_parts)}?subject={encoded_subject}&body={encoded_body}"
+            # Handle multiple recipients (semicolon separated)
+            recipients = [r.strip() for r in self.email_to.text().split(';') if r.strip()]
+            # Describes the periods the report was generated for, even if the dates were changed since
+            subject = self.current_subject
             
-            webbrowser.open(mailto_url)
+            # Deliver directly when SMTP is configured, otherwise hand over to the email application
+            if recipients and SmtpConfig.from_settings(self.settings_manager).is_usable():
+                self.send_via_smtp(recipients, subject, report_plain_text, self.current_generated_html)
+            else:
+                self.open_email_client(recipients, subject, report_plain_text)
 
         except Exception as e:
             QMessageBox.critical(self, "Error Opening Email Client", f"Failed to open email client: {str(e)}")
 
+    def open_email_client(self, recipients, subject, body):
+        # Encode subject and body for the mailto URL
+        encoded_subject = urllib.parse.quote(subject)
+        encoded_body = urllib.parse.quote(body)
+        
+        # mailto typically uses comma for multiple To's
+        mailto_url = f"mailto:{','.join(recipients)}?subject={encoded_subject}&body={encoded_body}"
+        
+        webbrowser.open(mailto_url)
+
+    def send_via_smtp(self, recipients, subject, body, html_body=None):
+        relay = EmailStatusRelay(recipients, subject, body)
+        relay.status_changed.connect(self.on_delivery_status)
+        self.delivery_status.setText("Queued for delivery...")
+        self.delivery_status.setVisible(True)
+        # The job keeps the relay alive until delivery finishes, even if the dialog is closed
+        get_email_queue(self.settings_manager).send(
+            recipients, subject, body, lambda status, detail: relay.status_changed.emit(status, detail), html_body)
+
+    def on_delivery_status(self, status, detail):
+        relay = self.sender()
+        if status == SENT:
+            self.delivery_status.setText(f"Report sent. {detail}")
+        elif status == RETRYING:
+            self.delivery_status.setText(f"Delivery problem: {detail}")
+        elif status == FAILED:
+            self.delivery_status.setText(f"Delivery failed: {detail}")
+            answer = QMessageBox.question(
+                self, "Email Delivery Failed",
+                f"The report could not be sent via SMTP:\n{detail}\n\nOpen it in your email application instead?")
+            if answer == QMessageBox.StandardButton.Yes:
+                self.open_email_client(relay.recipients, relay.subject, relay.body)
+        else:
+            self.delivery_status.setText("Sending...")
+
     def load_default_emails(self):
-        from src.settings.settings_manager import SettingsManager
-        settings_manager = SettingsManager()
-        return settings_manager.get('default_emails', '')
\ No newline at end of file
+        # Remember what was filled in so later changes only replace an untouched default
+        self.loaded_default_emails = self.settings_manager.get('default_emails', '')
+        return self.loaded_default_emails
+
+    def on_setting_changed(self, key, value):
+        if key == 'default_emails' and self.email_to.text() == self.loaded_default_emails:
+            self.email_to.setText(value)
+            self.loaded_default_emails = value
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.reports.batch import DEFAULT_OUTPUT_DIR, last_week_range, run_batch, format_summary
+
+class ReportScheduler(QObject):
+    """Generates last week's report for every caller once a week while the app is running.
+    Enabled from Settings; the batch runs on a background thread using the batch job's process pool.
+    Each run's outcome is appended to LOG_FILE_NAME in the output folder and sent with report_status.
+    A failed week is retried after RETRY_DELAY, and only its first failure asks for a warning."""
+    # Week start, summary text, success; emitted from the batch thread
+    batch_finished = pyqtSignal(str, str, bool)
+    # Summary text, whether to warn the user
+    report_status = pyqtSignal(str, bool)
+    
+    LOG_FILE_NAME = "scheduled_reports.log"
+    CHECK_INTERVAL_MS = 60 * 60 * 1000
+    STARTUP_DELAY_MS = 10 * 1000
+    RETRY_DELAY = timedelta(hours=6)
+    
+    def __init__(self, data_file, settings_manager, parent=None):
+        super().__init__(parent)
+        self.data_file = data_file
+        self.settings_manager = settings_manager
+        self._running = False
+        self.batch_finished.connect(self.on_batch_finished)
+        self.settings_manager.subscribe(self.on_setting_changed)
+        
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.CHECK_INTERVAL_MS)
+        self.timer.timeout.connect(self.run_if_due)
+        self.timer.start()
+        # First check shortly after startup so it doesn't slow the window appearing
+        QTimer.singleShot(self.STARTUP_DELAY_MS, self.run_if_due)
+    
+    def is_due(self, now=None):
+        if not self.settings_manager.get('scheduled_reports', False):
+            return False
+        now = now or datetime.now()
+        week_start, _ = last_week_range(now.date())
+        if self.settings_manager.get('scheduled_reports_last_week', '') >= week_start:
+            return False
+        # Backing off after a failed attempt
+        return self.settings_manager.get('scheduled_reports_retry_after', '') <= now.isoformat(timespec='seconds')
+    
+    def output_folder(self):
+        return self.settings_manager.get('scheduled_reports_folder', '') or DEFAULT_OUTPUT_DIR
+    
+    def run_if_due(self):
+        if self._running or not self.is_due():
+            return
+        self._running = True
+        start_date, end_date = last_week_range()
+        thread = threading.Thread(target=self._run_batch, args=(start_date, end_date, self.output_folder()), daemon=True)
+        thread.start()
+    
+    def _run_batch(self, start_date, end_date, output_dir):
+        started = time.perf_counter()
+        try:
+            results = run_batch([self.data_file], start_date, end_date, output_dir)
+            written = sum(1 for result in results if result.output_path)
+            failed = sum(1 for result in results if result.error)
+            summary = (f"Scheduled reports for {start_date} to {end_date}: {written} written, {failed} failed, "
+                       f"in {os.path.abspath(output_dir)}\n"
+                       f"{format_summary(results, time.perf_counter() - started)}")
+            success = True
+        except Exception as e:
+            summary = f"Scheduled reports for {start_date} to {end_date} failed: {e}"
+            success = False
+        self._write_log(output_dir, summary)
+        self.batch_finished.emit(start_date, summary, success)
+    
+    def _write_log(self, output_dir, summary):
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, self.LOG_FILE_NAME), 'a', encoding='utf-8') as f:
+                f.write(f"[{datetime.now().isoformat(timespec='seconds')}] {summary}\n")
+        except OSError:
+            pass  # The outcome still reaches the window through batch_finished
+    
+    def on_batch_finished(self, week_start, summary, success, now=None):
+        self._running = False
+        if success:
+            with self.settings_manager.batch():
+                self.settings_manager.set('scheduled_reports_last_week', week_start)
+                self.settings_manager.set('scheduled_reports_retry_after', '')
+            self.report_status.emit(summary, False)
+            return
+        now = now or datetime.now()
+        first_failure = self.settings_manager.get('scheduled_reports_failed_week', '') != week_start
+        with self.settings_manager.batch():
+            self.settings_manager.set('scheduled_reports_failed_week', week_start)
+            self.settings_manager.set('scheduled_reports_retry_after',
+                                      (now + self.RETRY_DELAY).isoformat(timespec='seconds'))
+        # Retries of a week that already failed only go to the log and the status bar
+        self.report_status.emit(summary, first_failure)
+    
+    def on_setting_changed(self, key, value):
+        if key == 'scheduled_reports_folder':
+            # A new folder may fix what failed, so don't wait out the backoff
+            self.settings_manager.set('scheduled_reports_retry_after', '')
+            self.run_if_due()
+        elif key == 'scheduled_reports' and value:
+            self.run_if_due()
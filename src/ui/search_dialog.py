@@ -0,0 +1,135 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QLineEdit,
+                           QPushButton, QLabel, QTableView, QHeaderView, QAbstractItemView)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+# Most matches listed at once; narrow the search to see older ones
+MAX_RESULTS = 500
+
+class SearchResultsModel(QAbstractTableModel):
+    """Read-only table of (date, user, comment) search results"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+    
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
+            return None
+        return ["Date", "Caller", "Note"][section]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == 2:
+            return value
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == 2:
+            # One line per row; the full note is in the tooltip
+            return " ".join(value.split())
+        return str(value)
+
+class SearchDialog(QDialog):
+    """Search notes across all dates; activating a result emits entry_selected(user, date)"""
+    entry_selected = pyqtSignal(str, str)
+    
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        
+        self.setWindowTitle("Search Notes")
+        self.setMinimumSize(560, 440)
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Words from a note, e.g. callback")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.search)
+        self.search_edit.returnPressed.connect(self.go_to_selected)
+        form.addRow("Search:", self.search_edit)
+        
+        self.user_combo = QComboBox()
+        form.addRow("Caller:", self.user_combo)
+        self.update_users()
+        self.user_combo.currentIndexChanged.connect(self.search)
+        
+        layout.addLayout(form)
+        
+        self.summary_label = QLabel("")
+        layout.addWidget(self.summary_label)
+        
+        self.model = SearchResultsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.table.activated.connect(self.go_to_row)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        go_button = QPushButton("Go to Date")
+        go_button.clicked.connect(self.go_to_selected)
+        buttons_layout.addWidget(go_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        buttons_layout.addWidget(close_button)
+        layout.addLayout(buttons_layout)
+    
+    def update_users(self):
+        """Refresh the caller filter, keeping the current choice if it still exists"""
+        current = self.user_combo.currentData()
+        self.user_combo.blockSignals(True)
+        self.user_combo.clear()
+        self.user_combo.addItem("All callers", None)
+        for user in self.data_manager.get_users():
+            self.user_combo.addItem(user, user)
+        position = self.user_combo.findData(current)
+        self.user_combo.setCurrentIndex(max(position, 0))
+        self.user_combo.blockSignals(False)
+    
+    def search(self):
+        text = self.search_edit.text()
+        if not text.strip():
+            self.model.set_rows([])
+            self.summary_label.setText("")
+            return
+        rows = self.data_manager.search_comments(text, self.user_combo.currentData(), MAX_RESULTS + 1)
+        if len(rows) > MAX_RESULTS:
+            self.summary_label.setText(f"Showing the newest {MAX_RESULTS} matches")
+            rows = rows[:MAX_RESULTS]
+        else:
+            self.summary_label.setText(f"{len(rows)} match{'es' if len(rows) != 1 else ''}")
+        self.model.set_rows(rows)
+        if rows:
+            self.table.selectRow(0)
+    
+    def go_to_row(self, index):
+        if not index.isValid():
+            return
+        date_str, user, _ = self.model.rows[index.row()]
+        self.entry_selected.emit(user, date_str)
+    
+    def go_to_selected(self):
+        selected = self.table.selectionModel().selectedRows()
+        if selected:
+            self.go_to_row(selected[0])
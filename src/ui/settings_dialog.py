@@ -1,13 +1,15 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QLineEdit, QPushButton, QCheckBox, QFormLayout, QGroupBox, QMessageBox, QTabWidget, QWidget)
+                           QLineEdit, QPushButton, QCheckBox, QFormLayout, QGroupBox, QMessageBox, QTabWidget, QWidget,
+                           QComboBox, QSpinBox, QFileDialog)
 from src.settings.settings_manager import SettingsManager
+from src.data.schema import entry_metric_paths, metric_label
 
 class SettingsDialog(QDialog):
     def __init__(self, settings_manager: SettingsManager, parent=None):
         super().__init__(parent)
         self.settings_manager = settings_manager # Use the passed instance
         self.setWindowTitle("Settings")
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 480)
         self.setModal(True)
         
         self.init_ui()
@@ -32,6 +34,39 @@ class SettingsDialog(QDialog):
         window_layout.addRow(self.remember_position_cb)
         
         general_layout.addWidget(window_group)
+        
+        # Calendar settings group
+        calendar_group = QGroupBox("Calendar")
+        calendar_layout = QFormLayout(calendar_group)
+        
+        self.heatmap_cb = QCheckBox("Shade days by metric (heatmap)")
+        calendar_layout.addRow(self.heatmap_cb)
+        
+        self.heatmap_metric_combo = QComboBox()
+        for path in entry_metric_paths():
+            self.heatmap_metric_combo.addItem(metric_label(path), path)
+        calendar_layout.addRow("Metric:", self.heatmap_metric_combo)
+        
+        general_layout.addWidget(calendar_group)
+        
+        # Scheduled reports group
+        scheduled_group = QGroupBox("Scheduled Reports")
+        scheduled_layout = QFormLayout(scheduled_group)
+        
+        self.scheduled_reports_cb = QCheckBox("Generate last week's report for every caller")
+        self.scheduled_reports_cb.setToolTip("Runs once a week while the app is open")
+        scheduled_layout.addRow(self.scheduled_reports_cb)
+        
+        folder_layout = QHBoxLayout()
+        self.scheduled_folder_edit = QLineEdit()
+        self.scheduled_folder_edit.setPlaceholderText("reports")
+        folder_layout.addWidget(self.scheduled_folder_edit)
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self.browse_reports_folder)
+        folder_layout.addWidget(browse_button)
+        scheduled_layout.addRow("Folder:", folder_layout)
+        
+        general_layout.addWidget(scheduled_group)
         general_layout.addStretch()
         tab_widget.addTab(general_tab, "General")
         
@@ -53,12 +88,55 @@ class SettingsDialog(QDialog):
         default_recipients_form_layout.addRow(default_email_label, self.default_emails_edit)
         
         # Info label about mailto
-        info_label = QLabel("Note: Reports are sent using your default email application (e.g., Outlook).")
+        info_label = QLabel("Note: Reports are sent using your default email application (e.g., Outlook) "
+                            "unless SMTP delivery is enabled below.")
         info_label.setWordWrap(True)
         info_label.setStyleSheet("color: gray; font-style: italic;")
         
+        # SMTP delivery group
+        smtp_group = QGroupBox("SMTP Delivery (Optional)")
+        smtp_layout = QFormLayout(smtp_group)
+        
+        self.smtp_enabled_cb = QCheckBox("Send reports directly via SMTP")
+        smtp_layout.addRow(self.smtp_enabled_cb)
+        
+        self.smtp_host_edit = QLineEdit()
+        self.smtp_host_edit.setPlaceholderText("e.g. smtp.office365.com")
+        smtp_layout.addRow("Server:", self.smtp_host_edit)
+        
+        self.smtp_port_spin = QSpinBox()
+        self.smtp_port_spin.setRange(1, 65535)
+        smtp_layout.addRow("Port:", self.smtp_port_spin)
+        
+        self.smtp_tls_cb = QCheckBox("Use STARTTLS")
+        smtp_layout.addRow(self.smtp_tls_cb)
+        
+        self.smtp_username_edit = QLineEdit()
+        smtp_layout.addRow("Username:", self.smtp_username_edit)
+        
+        self.smtp_password_edit = QLineEdit()
+        self.smtp_password_edit.setEchoMode(QLineEdit.EchoMode.Password)
+        smtp_layout.addRow("Password:", self.smtp_password_edit)
+        
+        # Say where the password ends up, as the fallback is not encrypted
+        secrets = self.settings_manager.secrets
+        if secrets.uses_keyring:
+            storage_note = "The password is kept in the system keyring."
+        else:
+            storage_note = (f"The password is kept unencrypted in {secrets.secrets_file} (on macOS and Linux "
+                            "readable only by your account). Install the keyring package to store it in the "
+                            "system keyring instead.")
+        self.smtp_password_note = QLabel(storage_note)
+        self.smtp_password_note.setWordWrap(True)
+        smtp_layout.addRow(self.smtp_password_note)
+        
+        self.smtp_from_edit = QLineEdit()
+        self.smtp_from_edit.setPlaceholderText("Defaults to the username")
+        smtp_layout.addRow("From:", self.smtp_from_edit)
+        
         email_layout.addWidget(default_recipients_group)
         email_layout.addWidget(info_label)
+        email_layout.addWidget(smtp_group)
         email_layout.addStretch()
         tab_widget.addTab(email_tab, "Email")
         
@@ -80,17 +158,52 @@ class SettingsDialog(QDialog):
         # Load general settings
         remember_pos = self.settings_manager.get('remember_window_position', False)
         self.remember_position_cb.setChecked(bool(remember_pos))
+        self.heatmap_cb.setChecked(bool(self.settings_manager.get('calendar_heatmap', False)))
+        self.scheduled_reports_cb.setChecked(bool(self.settings_manager.get('scheduled_reports', False)))
+        self.scheduled_folder_edit.setText(self.settings_manager.get('scheduled_reports_folder', ''))
+        metric_index = self.heatmap_metric_combo.findData(self.settings_manager.get('calendar_heatmap_metric'))
+        if metric_index >= 0:
+            self.heatmap_metric_combo.setCurrentIndex(metric_index)
         
         # Load default emails
         default_emails = self.settings_manager.get('default_emails', '')
         self.default_emails_edit.setText(str(default_emails))
+        
+        # Load SMTP settings
+        self.smtp_enabled_cb.setChecked(bool(self.settings_manager.get('smtp_enabled')))
+        self.smtp_host_edit.setText(self.settings_manager.get('smtp_host'))
+        self.smtp_port_spin.setValue(int(self.settings_manager.get('smtp_port')))
+        self.smtp_tls_cb.setChecked(bool(self.settings_manager.get('smtp_use_tls')))
+        self.smtp_username_edit.setText(self.settings_manager.get('smtp_username'))
+        self.smtp_password_edit.setText(self.settings_manager.get('smtp_password'))
+        self.smtp_from_edit.setText(self.settings_manager.get('smtp_from'))
+
+    def browse_reports_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Reports Folder", self.scheduled_folder_edit.text())
+        if folder:
+            self.scheduled_folder_edit.setText(folder)
 
     def accept_settings(self):
-        # Save general settings
-        self.settings_manager.set('remember_window_position', self.remember_position_cb.isChecked())
-        
-        # Save default emails
-        self.settings_manager.set('default_emails', self.default_emails_edit.text())
+        # Write all changes to disk once
+        with self.settings_manager.batch():
+            # Save general settings
+            self.settings_manager.set('remember_window_position', self.remember_position_cb.isChecked())
+            self.settings_manager.set('calendar_heatmap', self.heatmap_cb.isChecked())
+            self.settings_manager.set('calendar_heatmap_metric', self.heatmap_metric_combo.currentData())
+            self.settings_manager.set('scheduled_reports_folder', self.scheduled_folder_edit.text().strip())
+            self.settings_manager.set('scheduled_reports', self.scheduled_reports_cb.isChecked())
+            
+            # Save default emails
+            self.settings_manager.set('default_emails', self.default_emails_edit.text())
+            
+            # Save SMTP settings
+            self.settings_manager.set('smtp_enabled', self.smtp_enabled_cb.isChecked())
+            self.settings_manager.set('smtp_host', self.smtp_host_edit.text().strip())
+            self.settings_manager.set('smtp_port', self.smtp_port_spin.value())
+            self.settings_manager.set('smtp_use_tls', self.smtp_tls_cb.isChecked())
+            self.settings_manager.set('smtp_username', self.smtp_username_edit.text().strip())
+            self.settings_manager.set('smtp_password', self.smtp_password_edit.text())
+            self.settings_manager.set('smtp_from', self.smtp_from_edit.text().strip())
         
         QMessageBox.information(self, "Settings", "Settings saved successfully!")
         self.accept()
\ No newline at end of file
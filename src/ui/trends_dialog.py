@@ -0,0 +1,139 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QDateEdit,
+                           QPushButton, QLabel, QTableView, QHeaderView, QSizePolicy)
+from PyQt6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
+from src.data.schema import entry_metric_paths, metric_label
+
+TREND_WINDOWS = [7, 30, 90]
+
+class TrendsModel(QAbstractTableModel):
+    """Read-only table of (date, value, window sum, window average) rows"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.window = TREND_WINDOWS[0]
+    
+    def set_rows(self, rows, window):
+        self.beginResetModel()
+        self.rows = rows
+        self.window = window
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 4
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
+            return None
+        return ["Date", "Value", f"{self.window}-Day Sum", f"{self.window}-Day Avg"][section]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() > 0:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        value = self.rows[index.row()][index.column()]
+        if index.column() == 3:
+            return f"{value:.2f}"
+        return str(value)
+
+class TrendsDialog(QDialog):
+    def __init__(self, data_manager, user=None, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        
+        self.setWindowTitle("Trends")
+        self.setMinimumSize(480, 500)
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        self.user_combo = QComboBox()
+        self.user_combo.addItems(self.data_manager.get_users())
+        if user:
+            self.user_combo.setCurrentText(user)
+        form.addRow("Caller:", self.user_combo)
+        
+        self.metric_combo = QComboBox()
+        for path in entry_metric_paths():
+            self.metric_combo.addItem(metric_label(path), path)
+        self.metric_combo.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        form.addRow("Metric:", self.metric_combo)
+        
+        self.window_combo = QComboBox()
+        for window in TREND_WINDOWS:
+            self.window_combo.addItem(f"{window} days", window)
+        form.addRow("Rolling Window:", self.window_combo)
+        
+        # Default to the last 90 days
+        current_date = QDate.currentDate()
+        self.start_date = QDateEdit()
+        self.start_date.setDate(current_date.addDays(-89))
+        self.start_date.setCalendarPopup(True)
+        form.addRow("Start Date:", self.start_date)
+        
+        self.end_date = QDateEdit()
+        self.end_date.setDate(current_date)
+        self.end_date.setCalendarPopup(True)
+        form.addRow("End Date:", self.end_date)
+        
+        layout.addLayout(form)
+        
+        show_button = QPushButton("Show Trend")
+        show_button.clicked.connect(self.show_trend)
+        layout.addWidget(show_button)
+        
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.model = TrendsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        done_button = QPushButton("Done")
+        done_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(done_button)
+        layout.addLayout(buttons_layout)
+    
+    def show_trend(self):
+        user = self.user_combo.currentText()
+        if not user:
+            self.summary_label.setText("Please select a caller.")
+            return
+        start_date_str = self.start_date.date().toString("yyyy-MM-dd")
+        end_date_str = self.end_date.date().toString("yyyy-MM-dd")
+        if start_date_str > end_date_str:
+            self.summary_label.setText("Start date must be on or before the end date.")
+            return
+        
+        path = self.metric_combo.currentData()
+        window = self.window_combo.currentData()
+        rows = self.data_manager.get_trend(user, path, start_date_str, end_date_str, window)
+        # Most recent first
+        rows.reverse()
+        self.model.set_rows(rows, window)
+        
+        # Compare the latest window with the one before it
+        latest = rows[0][3]
+        previous = rows[window][3] if len(rows) > window else None
+        summary = f"{metric_label(path)}: latest {window}-day average {latest:.2f}"
+        if previous is not None:
+            if latest > previous:
+                direction = "up"
+            elif latest < previous:
+                direction = "down"
+            else:
+                direction = "flat"
+            summary += f" ({direction} from {previous:.2f} the {window} days before)"
+        self.summary_label.setText(summary)
@@ -0,0 +1,63 @@
+"""
+Test script for archiving old entries into compressed per-year archives
+"""
+import json
+import tempfile
+from datetime import date
+from src.data.data_manager import DataManager
+from src.data.archive import cutoff_for_months
+from sample_data import make_data_manager
+
+def _queries(dm):
+    return {
+        "totals": dm.get_range_totals(None, "2023-01-01", "2025-12-31"),
+        "ann_totals": dm.get_range_totals("Ann", "2023-06-15", "2025-01-20"),
+        "total": dm.get_range_total("Bob", "current_leads.quotes", "2024-02-10", "2025-02-03"),
+        "daily": dm.get_daily_totals("Ann", "current_leads.quotes", "2024-12-01", "2025-01-31"),
+        "trend": dm.get_trend("Bob", "current_leads.quotes", "2024-12-01", "2025-01-31", 30),
+        "rollups": dm.get_rollups(None, "prospects.call_connects.paid_lead", "2024-10-01", "2025-02-28", "month"),
+        "entries": list(dm.iter_entries("2024-12-20", "2025-01-10")),
+        "range_data": len(dm.get_data_for_date_range("2024-12-20", "2025-01-10")),
+    }
+
+def test_archived_queries_match():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = make_data_manager(temp_dir, seed=7, start_date="2023-03-01", end_date="2025-02-28",
+                               coverage=0.6, comment_rate=0.1)
+        data_file = dm.file_path
+        before = _queries(dm)
+        entry_count = len(dm._load_data()["entries"])
+        
+        moved = dm.archive_before("2025-01-01")
+        with open(data_file) as f:
+            live = json.load(f)["entries"]
+        assert moved + len(live) == entry_count
+        assert all(entry["date"] >= "2025-01-01" for entry in live)
+        assert dm.archive.years() == [2023, 2024]
+        
+        # A fresh instance sees the same numbers, and whole months come from the summary index
+        other = DataManager(data_file)
+        other.get_range_totals(None, "2023-01-01", "2024-12-31")
+        assert other.archive._year_entries == {}
+        assert _queries(other) == before
+        assert _queries(dm) == before
+        
+        # Archived days can be read but not changed
+        archived_entry = next(other.iter_entries("2024-05-01", "2024-05-31", ["Ann"]))
+        assert other.get_entry_for_user_and_date("Ann", archived_entry["date"]) == archived_entry
+        archived_entry["current_leads"]["quotes"] = 99
+        assert other.save_entry(archived_entry) is False
+        
+        # Archiving more merges into the existing year archive
+        assert other.archive_before("2025-02-01") > 0
+        assert _queries(other) == before
+        assert other.archive.cutoff() == "2025-02-01"
+
+def test_cutoff_for_months():
+    assert cutoff_for_months(1, date(2025, 3, 14)) == "2025-03-01"
+    assert cutoff_for_months(12, date(2025, 3, 14)) == "2024-04-01"
+
+if __name__ == "__main__":
+    test_archived_queries_match()
+    test_cutoff_for_months()
+    print("Archive tests passed")
@@ -4,7 +4,16 @@ Run this to verify Phase 1 implementation
 """
 import json
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 from src.data.data_manager import DataManager
+from src.data.file_lock import FileLock, LockTimeout
+from src.data.comment_store import CommentStore, comments_dir_for
+from src.data.maintenance import format_compaction_result
 
 def test_data_manager():
     print("Testing DataManager Phase 1 Implementation\n")
@@ -210,9 +219,378 @@ def test_data_manager():
     
     # Clean up test file
     os.remove(test_file)
+    os.remove(test_file + ".lock")
+    shutil.rmtree(comments_dir_for(test_file))
     print("\n" + "=" * 60)
     print("✓ All Phase 1 tests passed!")
     print("DataManager is ready for Phase 2 integration")
 
+def test_skip_unchanged_writes():
+    print("\nTesting no-op write skipping\n")
+    test_file = "data/test_skip_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    
+    dm = DataManager(test_file)
+    entry = dm.create_empty_entry_structure()
+    entry["user"] = "TestUser"
+    entry["date"] = "2025-10-23"
+    entry["current_leads"]["quotes"] = 4
+    dm.save_entry(entry)
+    assert dm.skipped_writes == 0
+    
+    # Saving the same content again must not touch the file
+    mtime_before = os.stat(test_file).st_mtime_ns
+    dm.save_entry(entry)
+    assert dm.skipped_writes == 1
+    assert os.stat(test_file).st_mtime_ns == mtime_before
+    print("   ✓ Identical entry skipped")
+    
+    # A fresh manager recognises the persisted entry after reading it back
+    dm2 = DataManager(test_file)
+    dm2.save_entry(dm2.get_entry_for_user_and_date("TestUser", "2025-10-23"))
+    assert dm2.skipped_writes == 1
+    print("   ✓ Entry loaded from file skipped")
+    
+    # A real change is still written
+    entry["current_leads"]["quotes"] = 5
+    dm.save_entry(entry)
+    assert dm.skipped_writes == 1
+    assert dm2.get_entry_for_user_and_date("TestUser", "2025-10-23")["current_leads"]["quotes"] == 5
+    print("   ✓ Changed entry written")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+
+def test_snapshot_cache():
+    print("\nTesting sidecar snapshot cache\n")
+    test_file = "data/test_snapshot_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    
+    dm = DataManager(test_file)
+    dm.add_user("TestUser")
+    entry = dm.create_empty_entry_structure()
+    entry["user"] = "TestUser"
+    entry["date"] = "2025-10-23"
+    entry["prospects"]["quotes"] = 3
+    dm.save_entry(entry)
+    dm.save_snapshot()
+    assert os.path.exists(dm.snapshot_path)
+    
+    # A new manager starts from the snapshot
+    dm2 = DataManager(test_file)
+    assert dm2.get_users() == ["TestUser"]
+    assert dm2.loaded_from_snapshot
+    assert dm2.get_range_total("TestUser", "prospects.quotes", "2025-10-01", "2025-10-31") == 3
+    print("   ✓ Snapshot used when the file is unchanged")
+    
+    # Editing the JSON file by hand invalidates the snapshot
+    with open(test_file, 'r') as f:
+        data = json.load(f)
+    data["users"].append("HandEdited")
+    with open(test_file, 'w') as f:
+        json.dump(data, f)
+    dm3 = DataManager(test_file)
+    assert dm3.get_users() == ["TestUser", "HandEdited"]
+    assert not dm3.loaded_from_snapshot
+    print("   ✓ Stale snapshot ignored")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+    os.remove(dm.snapshot_path)
+
+def test_reload_from_other_writer():
+    print("\nTesting incremental reload of changes from another writer\n")
+    test_file = "data/test_reload_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    
+    dm = DataManager(test_file)
+    other = DataManager(test_file)
+    for day in ["2025-10-22", "2025-10-23"]:
+        entry = dm.create_empty_entry_structure()
+        entry["user"] = "TestUser"
+        entry["date"] = day
+        entry["current_leads"]["quotes"] = 1
+        dm.save_entry(entry)
+    assert dm.get_range_total("TestUser", "current_leads.quotes", "2025-10-01", "2025-10-31") == 2
+    
+    notifications = []
+    dm.subscribe(lambda keys, users_changed: notifications.append((keys, users_changed)))
+    
+    # Another instance edits one entry and adds a user
+    entry = other.get_entry_for_user_and_date("TestUser", "2025-10-23")
+    entry["current_leads"]["quotes"] = 5
+    other.save_entry(entry)
+    other.add_user("Other")
+    
+    changed = dm.reload_if_changed()
+    assert changed == {("TestUser", "2025-10-23")}
+    assert notifications == [({("TestUser", "2025-10-23")}, True)]
+    assert dm.get_range_total("TestUser", "current_leads.quotes", "2025-10-01", "2025-10-31") == 6
+    print("   ✓ Changed entry detected and index updated")
+    
+    # Nothing new to report on the next poll
+    assert dm.reload_if_changed() == set()
+    assert len(notifications) == 1
+    print("   ✓ No notification without changes")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+
+def test_concurrent_saves_merge():
+    print("\nTesting locked saves from concurrent instances\n")
+    test_file = "data/test_lock_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    
+    first = DataManager(test_file)
+    second = DataManager(test_file)
+    first.get_users()
+    second.get_users()
+    
+    # Both instances hold stale copies; each save must keep the other's entry
+    for dm, user in [(first, "Alice"), (second, "Bob")]:
+        entry = dm.create_empty_entry_structure()
+        entry["user"] = user
+        entry["date"] = "2025-10-22"
+        entry["current_leads"]["quotes"] = 3
+        assert dm.save_entry(entry)
+    with open(test_file) as f:
+        saved = json.load(f)
+    assert sorted(e["user"] for e in saved["entries"]) == ["Alice", "Bob"]
+    for user in ["Alice", "Bob"]:
+        assert second.get_range_total(user, "current_leads.quotes", "2025-10-01", "2025-10-31") == 3
+    print("   ✓ Stale writer merged instead of overwriting")
+    
+    # A save waits for another instance to release the lock
+    lock = FileLock(first.lock_path)
+    lock.acquire()
+    threading.Timer(0.2, lock.release).start()
+    started = time.monotonic()
+    first.add_user("Carol")
+    assert time.monotonic() - started >= 0.15
+    assert "Carol" in second.get_users()
+    print("   ✓ Save waited for the lock")
+    
+    # The lock dies with a crashed holder, so a leftover lock file does not block
+    holder = subprocess.Popen([sys.executable, "-c",
+                               "import sys, time; from src.data.file_lock import FileLock; "
+                               f"FileLock({first.lock_path!r}).acquire(); print('locked', flush=True); time.sleep(60)"],
+                              stdout=subprocess.PIPE, text=True)
+    assert holder.stdout.readline().strip() == "locked"
+    held = FileLock(first.lock_path, timeout=0.1)
+    try:
+        held.acquire()
+        assert False, "expected LockTimeout"
+    except LockTimeout:
+        pass
+    holder.kill()
+    holder.wait()
+    holder.stdout.close()
+    assert os.path.exists(first.lock_path)
+    first.add_user("Dave")
+    assert "Dave" in second.get_users()
+    print("   ✓ Crashed holder's lock released")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+
+def test_storage_compaction():
+    print("\nTesting storage report and compaction\n")
+    test_file = "data/test_compact_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    
+    dm = DataManager(test_file)
+    entries = []
+    for user, day, quotes, comments in [("Bob", "2025-10-23", 2, ""), ("Ann", "2025-10-22", 1, "first"),
+                                        ("Ann", "2025-10-22", 7, "second")]:
+        entry = dm.create_empty_entry_structure()
+        entry["user"] = user
+        entry["date"] = day
+        entry["current_leads"]["quotes"] = quotes
+        entry["comments"] = comments
+        entry["calls"] = 12  # Legacy field
+        entries.append(entry)
+    dm._save_data({"users": ["Ann", "Bob", "Ann"], "entries": entries})
+    
+    stats = dm.get_storage_stats()
+    assert stats["entries"] == 3 and stats["duplicates"] == 1
+    assert stats["duplicate_keys"] == [("Ann", "2025-10-22")]
+    assert stats["entries_per_user_year"] == {"Bob": {"2025": 1}, "Ann": {"2025": 2}}
+    assert stats["wasted_bytes"]["calls"] > 0
+    print("   ✓ Duplicates and legacy fields reported")
+    
+    result = dm.compact(backup=True)
+    assert result["duplicates_merged"] == 1 and result["after_bytes"] < result["before_bytes"]
+    assert result["duplicate_keys"] == [("Ann", "2025-10-22")]
+    assert "2025-10-22 Ann" in format_compaction_result(result)
+    with open(test_file) as f:
+        compacted = json.load(f)
+    assert compacted["users"] == ["Ann", "Bob"]
+    assert [(e["user"], e["date"]) for e in compacted["entries"]] == [("Ann", "2025-10-22"), ("Bob", "2025-10-23")]
+    assert "calls" not in compacted["entries"][0]
+    # The duplicates' metrics are added together and both comments are kept
+    ann = dm.get_entry_for_user_and_date("Ann", "2025-10-22")
+    assert ann["current_leads"]["quotes"] == 8 and ann["comments"] == "first\nsecond"
+    assert dm.get_range_total("Ann", "current_leads.quotes", "2025-10-01", "2025-10-31") == 8
+    with open(result["backup_path"]) as f:
+        assert len(json.load(f)["entries"]) == 3
+    print("   ✓ File compacted with a backup")
+    
+    os.remove(result["backup_path"])
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+    shutil.rmtree(comments_dir_for(test_file))
+
+def test_comments_stored_separately():
+    print("\nTesting comments kept apart from counters\n")
+    test_file = "data/test_comments_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    shutil.rmtree(comments_dir_for(test_file), ignore_errors=True)
+    
+    dm = DataManager(test_file)
+    entry = dm.create_empty_entry_structure()
+    entry["user"] = "TestUser"
+    entry["date"] = "2025-10-23"
+    entry["current_leads"]["quotes"] = 1
+    entry["comments"] = "Client asked for a callback"
+    assert dm.save_entry(entry)
+    with open(test_file) as f:
+        assert "comments" not in json.load(f)["entries"][0]
+    shard_path = os.path.join(comments_dir_for(test_file), "comments_2025.json")
+    assert os.path.exists(shard_path)
+    print("   ✓ Comment written to the comment store, not the data file")
+    
+    # A counter change leaves the comment store alone, a comment change leaves the data file alone
+    shard_stat = os.stat(shard_path)
+    entry["current_leads"]["quotes"] = 2
+    dm.save_entry(entry)
+    assert os.stat(shard_path).st_mtime_ns == shard_stat.st_mtime_ns
+    data_stat = os.stat(test_file)
+    version = dm.get_version()
+    entry["comments"] = "Callback booked"
+    dm.save_entry(entry)
+    assert os.stat(test_file).st_mtime_ns == data_stat.st_mtime_ns
+    assert dm.get_version() != version
+    loaded = DataManager(test_file).get_entry_for_user_and_date("TestUser", "2025-10-23")
+    assert loaded["current_leads"]["quotes"] == 2 and loaded["comments"] == "Callback booked"
+    print("   ✓ Counters and comments saved independently")
+    
+    # Comment changes from another instance are picked up on reload
+    other = DataManager(test_file)
+    entry = other.get_entry_for_user_and_date("TestUser", "2025-10-23")
+    entry["comments"] = "Sent quote"
+    other.save_entry(entry)
+    assert dm.reload_if_changed() == {("TestUser", "2025-10-23")}
+    assert dm.get_entry_for_user_and_date("TestUser", "2025-10-23")["comments"] == "Sent quote"
+    print("   ✓ Comment change from another instance detected")
+    
+    # Comments left inline by older versions are moved out on the next save
+    with open(test_file) as f:
+        data = json.load(f)
+    data["entries"][0]["comments"] = "Written by an older version"
+    with open(test_file, "w") as f:
+        json.dump(data, f, indent=2)
+    dm.reload_if_changed()
+    assert dm.get_entry_for_user_and_date("TestUser", "2025-10-23")["comments"] == "Written by an older version"
+    dm.add_user("Other")
+    with open(test_file) as f:
+        assert "comments" not in json.load(f)["entries"][0]
+    assert DataManager(test_file).get_entry_for_user_and_date("TestUser", "2025-10-23")["comments"] == \
+        "Written by an older version"
+    print("   ✓ Inline comments migrated")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+    shutil.rmtree(comments_dir_for(test_file))
+
+def test_read_snapshots():
+    print("\nTesting copy-on-write read snapshots\n")
+    test_file = "data/test_read_snapshot_tally_data.json"
+    if os.path.exists(test_file):
+        os.remove(test_file)
+    shutil.rmtree(comments_dir_for(test_file), ignore_errors=True)
+    
+    dm = DataManager(test_file)
+    dm.add_user("Ann")
+    for day in ["2025-10-22", "2025-10-23"]:
+        entry = dm.create_empty_entry_structure()
+        entry["user"] = "Ann"
+        entry["date"] = day
+        entry["current_leads"]["quotes"] = 1
+        entry["comments"] = f"Note for {day}"
+        dm.save_entry(entry)
+    
+    snapshot = dm.snapshot()
+    assert snapshot.version == dm.get_version()
+    entries = snapshot.iter_entries("2025-10-01", "2025-10-31")
+    assert next(entries)["date"] == "2025-10-22"
+    
+    # Saves after the snapshot was taken, some while it is being iterated
+    entry = dm.get_entry_for_user_and_date("Ann", "2025-10-23")
+    entry["current_leads"]["quotes"] = 9
+    entry["comments"] = "Changed"
+    dm.save_entry(entry)
+    entry["date"] = "2025-10-24"
+    dm.save_entry(entry)
+    dm.add_user("Bob")
+    
+    rest = list(entries)
+    assert [(e["date"], e["current_leads"]["quotes"], e["comments"]) for e in rest] == [("2025-10-23", 1, "Note for 2025-10-23")]
+    assert snapshot.get_range_total("Ann", "current_leads.quotes", "2025-10-01", "2025-10-31") == 2
+    assert snapshot.get_users() == ["Ann"]
+    assert snapshot.version != dm.get_version()
+    assert dm.get_range_total("Ann", "current_leads.quotes", "2025-10-01", "2025-10-31") == 19
+    assert dm.get_entry_for_user_and_date("Ann", "2025-10-23")["comments"] == "Changed"
+    print("   ✓ Snapshot unchanged by later saves")
+    
+    # Archiving after a snapshot neither hides nor double counts its entries
+    dm.archive_before("2025-10-23")
+    assert snapshot.get_range_total("Ann", "current_leads.quotes", "2025-10-01", "2025-10-31") == 2
+    assert len(snapshot.get_data_for_date_range("2025-10-01", "2025-10-31")) == 2
+    print("   ✓ Snapshot unaffected by archiving")
+    
+    os.remove(test_file)
+    os.remove(test_file + ".lock")
+    shutil.rmtree(comments_dir_for(test_file))
+    shutil.rmtree(dm.archive.archive_dir)
+
+def test_snapshot_reads_comments_lazily():
+    print("\nTesting lazy comment loading in snapshots\n")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        CommentStore(temp_dir).set_many({("Ann", f"{year}-05-01"): f"Note {year}" for year in range(2021, 2026)})
+        
+        store = CommentStore(temp_dir)
+        assert store.get("Ann", "2025-05-01") == "Note 2025"
+        reads = []
+        read_shard = store._read_shard
+        store._read_shard = lambda shard: reads.append(shard) or read_shard(shard)
+        
+        frozen = store.frozen()
+        assert reads == []
+        assert frozen.get("Ann", "2025-05-01") == "Note 2025"
+        assert frozen.get("Ann", "2023-05-01") == "Note 2023"
+        assert reads == ["2023"]
+        print("   ✓ Snapshot reads only the years asked for")
+        
+        # A year the snapshot has not read yet is still seen as it was when the snapshot was taken
+        store.set_many({("Ann", "2022-05-01"): "Changed", ("Ann", "2025-05-01"): "Changed"})
+        assert frozen.get("Ann", "2022-05-01") == "Note 2022"
+        assert frozen.get("Ann", "2025-05-01") == "Note 2025"
+        assert store.get("Ann", "2022-05-01") == "Changed"
+        print("   ✓ Later saves do not reach the snapshot")
+
 if __name__ == "__main__":
     test_data_manager()
+    test_skip_unchanged_writes()
+    test_snapshot_cache()
+    test_reload_from_other_writer()
+    test_concurrent_saves_merge()
+    test_storage_compaction()
+    test_comments_stored_separately()
+    test_read_snapshots()
+    test_snapshot_reads_comments_lazily()
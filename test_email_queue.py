@@ -0,0 +1,106 @@
+"""
+Test script for the background SMTP email queue
+"""
+import smtplib
+import threading
+from src.mail.email_queue import EmailQueue, SmtpConfig, SENDING, SENT, FAILED, RETRYING
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; fails the first `failures` connections"""
+    connections = 0
+    failures = 0
+    sent = []
+    gate = None
+    
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+        if FakeSMTP.connections <= FakeSMTP.failures:
+            raise ConnectionRefusedError("connection refused")
+    
+    def starttls(self, context=None):
+        pass
+    
+    def login(self, username, password):
+        pass
+    
+    def send_message(self, message):
+        if FakeSMTP.gate is not None:
+            FakeSMTP.gate.wait()
+        if "bad@" in message["To"]:
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"No such user")})
+        FakeSMTP.sent.append((message["To"], message["Subject"]))
+    
+    def close(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        pass
+
+def _reset(failures=0):
+    FakeSMTP.connections = 0
+    FakeSMTP.failures = failures
+    FakeSMTP.sent = []
+    FakeSMTP.gate = None
+
+def _make_queue(max_attempts=3):
+    config = SmtpConfig(enabled=True, host="localhost", port=8025, use_tls=False, sender="tracker@example.com")
+    return EmailQueue(lambda: config, max_attempts=max_attempts, backoff=0.01, smtp_factory=FakeSMTP)
+
+def test_batch_shares_connection():
+    _reset()
+    FakeSMTP.gate = threading.Event()
+    email_queue = _make_queue()
+    statuses = {}
+    sending = threading.Event()
+    
+    def first_status(status, detail):
+        statuses.setdefault("first", []).append(status)
+        if status == SENDING:
+            sending.set()
+    
+    # The first message holds the worker so the rest queue up behind it
+    email_queue.send(["a@example.com"], "First", "body", first_status)
+    sending.wait()
+    for i in range(3):
+        email_queue.send([f"m{i}@example.com"], f"Report {i}", "body",
+                         lambda status, detail, i=i: statuses.setdefault(i, []).append(status))
+    FakeSMTP.gate.set()
+    email_queue.join()
+    assert len(FakeSMTP.sent) == 4
+    # One connection for the first message, one shared by the three queued behind it
+    assert FakeSMTP.connections == 2
+    assert all(s[-1] == SENT for s in statuses.values())
+
+def test_retry_with_backoff():
+    _reset(failures=2)
+    email_queue = _make_queue()
+    statuses = []
+    email_queue.send(["a@example.com"], "Report", "body", lambda status, detail: statuses.append(status))
+    email_queue.join()
+    assert statuses.count(RETRYING) == 2 and statuses[-1] == SENT
+    assert FakeSMTP.sent == [("a@example.com", "Report")]
+
+def test_failures_reported():
+    _reset(failures=5)
+    email_queue = _make_queue(max_attempts=2)
+    statuses = []
+    email_queue.send(["a@example.com"], "Report", "body", lambda status, detail: statuses.append(status))
+    email_queue.join()
+    assert statuses[-1] == FAILED and FakeSMTP.sent == []
+    
+    # A refused recipient fails only its own message
+    _reset()
+    results = {}
+    for to in ["bad@example.com", "good@example.com"]:
+        email_queue.send([to], "Report", "body", lambda status, detail, to=to: results.__setitem__(to, status))
+    email_queue.join()
+    assert results == {"bad@example.com": FAILED, "good@example.com": SENT}
+
+if __name__ == "__main__":
+    test_batch_shares_connection()
+    test_retry_with_backoff()
+    test_failures_reported()
+    print("Email queue tests passed")
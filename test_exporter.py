@@ -0,0 +1,49 @@
+"""
+Test script for the streaming CSV / JSON Lines exporter
+"""
+import csv
+import json
+import os
+import tempfile
+from src.data.exporter import export_entries
+from src.data.schema import entry_metric_paths, get_metric
+from sample_data import make_data_manager
+
+def test_export_csv():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = make_data_manager(temp_dir, comment="Call back", comment_rate=0.5)
+        out_path = os.path.join(temp_dir, "export.csv")
+        
+        # A small chunk size exercises the chunked write path
+        count = export_entries(dm, out_path, "csv", "2025-03-02", "2025-03-04", chunk_size=4)
+        assert count == 6
+        
+        with open(out_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 6
+        assert list(rows[0].keys()) == ["user", "date"] + list(entry_metric_paths()) + ["comments"]
+        # Ordered by date then user
+        assert [(r["date"], r["user"]) for r in rows[:2]] == [("2025-03-02", "Ann"), ("2025-03-02", "Bob")]
+        for row in rows:
+            entry = dm.get_entry_for_user_and_date(row["user"], row["date"])
+            assert [row[path] for path in entry_metric_paths()] == \
+                [str(get_metric(entry, path)) for path in entry_metric_paths()]
+            assert row["comments"] == entry["comments"]
+
+def test_export_jsonl_user_filter():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = make_data_manager(temp_dir)
+        out_path = os.path.join(temp_dir, "export.jsonl")
+        
+        count = export_entries(dm, out_path, users=["Bob"])
+        assert count == 5
+        
+        with open(out_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        assert [e["user"] for e in entries] == ["Bob"] * 5
+        assert entries == list(dm.iter_entries(None, None, ["Bob"]))
+
+if __name__ == "__main__":
+    test_export_csv()
+    test_export_jsonl_user_filter()
+    print("✓ All exporter tests passed!")
@@ -0,0 +1,137 @@
+"""
+Test script for the prefix-sum index used for date-range totals
+"""
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from src.data.data_manager import DataManager
+from src.data.schema import entry_metric_paths, get_metric
+
+def _brute_force_total(dm, user, path, start_date, end_date):
+    return sum(get_metric(entry, path) for entry in dm.iter_entries(start_date, end_date, [user]))
+
+def test_range_totals_match_scan():
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+        first_day = date(2024, 1, 1)
+        
+        # Save out of order so the index has to grow in both directions and update past days
+        days = list(range(0, 120, 3))
+        rng.shuffle(days)
+        for offset in days:
+            for user in ["Ann", "Bob"]:
+                entry = dm.create_empty_entry_structure()
+                entry["user"] = user
+                entry["date"] = (first_day + timedelta(days=offset)).isoformat()
+                entry["current_leads"]["call_connects"]["paid_lead"] = rng.randint(0, 9)
+                entry["current_leads"]["call_connects"]["total"] = rng.randint(0, 20)
+                entry["prospects"]["quotes"] = rng.randint(0, 5)
+                dm.save_entry(entry)
+        
+        # Overwrite an existing entry
+        entry = dm.get_entry_for_user_and_date("Ann", (first_day + timedelta(days=days[0])).isoformat())
+        entry["prospects"]["quotes"] = 50
+        dm.save_entry(entry)
+        
+        paths = ["current_leads.call_connects.paid_lead", "current_leads.call_connects.total", "prospects.quotes"]
+        for _ in range(30):
+            start = first_day + timedelta(days=rng.randint(-10, 130))
+            end = start + timedelta(days=rng.randint(0, 60))
+            for user in ["Ann", "Bob", "Nobody"]:
+                for path in paths:
+                    expected = _brute_force_total(dm, user, path, start.isoformat(), end.isoformat())
+                    assert dm.get_range_total(user, path, start.isoformat(), end.isoformat()) == expected
+        
+        # A fresh manager builds the same index from the file
+        dm2 = DataManager(dm.file_path)
+        totals = dm2.get_range_totals("Ann", "2024-01-01", "2024-12-31")
+        for path in entry_metric_paths():
+            expected = _brute_force_total(dm, "Ann", path, "2024-01-01", "2024-12-31")
+            assert get_metric(totals, path) == expected
+        
+        # Totals across every user
+        all_totals = dm2.get_range_totals(None, "2024-01-01", "2024-12-31")
+        assert all_totals["prospects"]["quotes"] == (
+            _brute_force_total(dm, "Ann", "prospects.quotes", "2024-01-01", "2024-12-31") +
+            _brute_force_total(dm, "Bob", "prospects.quotes", "2024-01-01", "2024-12-31"))
+
+def test_reversed_range_is_empty():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+        for day in ["2025-10-20", "2025-10-22"]:
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = "Ann"
+            entry["date"] = day
+            entry["prospects"]["quotes"] = 4
+            dm.save_entry(entry)
+        index = dm.get_prefix_index()
+        assert index.range_total("Ann", "prospects.quotes", "2025-10-20", "2025-10-22") == 8
+        assert index.range_total("Ann", "prospects.quotes", "2025-10-23", "2025-10-21") == 0
+        assert not any(index.range_totals("Ann", "2025-10-30", "2025-10-20").values())
+        assert not any(index.range_totals("Nobody", "2025-10-30", "2025-10-20").values())
+
+def test_rolling_trend():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+        # Entries every other day with quotes equal to the day of the month
+        for day in range(1, 31, 2):
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = "Ann"
+            entry["date"] = f"2025-04-{day:02d}"
+            entry["current_leads"]["quotes"] = day
+            dm.save_entry(entry)
+        
+        rows = dm.get_trend("Ann", "current_leads.quotes", "2025-04-01", "2025-04-30", 7)
+        assert len(rows) == 30
+        assert rows[0] == ("2025-04-01", 1, 1, 1.0)
+        # 2025-04-10: window 04-04..04-10 holds days 5, 7 and 9
+        assert rows[9] == ("2025-04-10", 0, 21, 7.0)
+
+def test_comment_search():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+        notes = {
+            ("Ann", "2024-03-04"): "Client asked for callback on Friday",
+            ("Bob", "2024-03-05"): "Spring campaign launch",
+            ("Ann", "2025-01-06"): "Callback booked, spring campaign",
+        }
+        for (user, date_str), comment in notes.items():
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = user
+            entry["date"] = date_str
+            entry["comments"] = comment
+            dm.save_entry(entry)
+        
+        # Every word must match; words also match as prefixes; newest first
+        assert [hit[:2] for hit in dm.search_comments("callback")] == [("2025-01-06", "Ann"), ("2024-03-04", "Ann")]
+        assert [hit[:2] for hit in dm.search_comments("spring camp")] == [("2025-01-06", "Ann"), ("2024-03-05", "Bob")]
+        assert dm.search_comments("spring", user="Bob") == [("2024-03-05", "Bob", "Spring campaign launch")]
+        assert dm.search_comments("nothing here") == []
+        
+        # Saves update the index in place
+        entry = dm.get_entry_for_user_and_date("Bob", "2024-03-05")
+        entry["comments"] = "Autumn campaign"
+        dm.save_entry(entry)
+        assert [hit[1] for hit in dm.search_comments("spring")] == ["Ann"]
+        assert [hit[1] for hit in dm.search_comments("autumn")] == ["Bob"]
+        
+        # Changes saved by another instance are picked up on reload
+        other = DataManager(dm.file_path)
+        entry = other.get_entry_for_user_and_date("Ann", "2024-03-04")
+        entry["comments"] = ""
+        other.save_entry(entry)
+        dm.reload_if_changed()
+        assert [hit[0] for hit in dm.search_comments("callback")] == ["2025-01-06"]
+        
+        # Archived notes stay searchable
+        dm.archive_before("2025-01-01")
+        assert [hit[0] for hit in dm.search_comments("campaign")] == ["2025-01-06", "2024-03-05"]
+
+if __name__ == "__main__":
+    test_range_totals_match_scan()
+    test_reversed_range_is_empty()
+    test_rolling_trend()
+    test_comment_search()
+    print("✓ All index tests passed!")
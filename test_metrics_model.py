@@ -0,0 +1,71 @@
+"""
+Test script for the metrics form model: edits, recalculated totals and overrides
+"""
+from PyQt6.QtCore import Qt
+from src.ui.metrics_model import MetricsModel, OverrideRole
+
+def _set(model, tab_key, path, value):
+    return model.setData(model.index_for(tab_key, path), value)
+
+def test_totals_recalculate():
+    model = MetricsModel()
+    changes = []
+    model.dataChanged.connect(lambda top_left, bottom_right: changes.append((top_left.column(), bottom_right.column())))
+    
+    assert _set(model, "current_leads", "call_connects.paid_lead", 3)
+    assert _set(model, "current_leads", "call_connects.agents", 2)
+    assert _set(model, "current_leads", "other.sms", 4)
+    assert model.value("current_leads", "call_connects.total") == 5
+    assert model.value("current_leads", "other.total") == 4
+    assert model.value("current_leads", "grand_total") == 9
+    # The other tab is a separate row
+    assert model.value("prospects", "grand_total") == 0
+    
+    # One dataChanged per edit, spanning the edited column and the totals it changed
+    first, last = changes[0]
+    assert first == model.columns["call_connects.paid_lead"]
+    assert last == model.columns["grand_total"]
+    assert len(changes) == 3
+    
+    # Setting the same value again changes nothing
+    assert not _set(model, "current_leads", "call_connects.agents", 2)
+    assert len(changes) == 3
+    
+    # Values are clamped to the editor range
+    _set(model, "prospects", "quotes", 5000)
+    assert model.value("prospects", "quotes") == 999
+    assert model.value("prospects", "grand_total_2") == 999
+    
+    # Only the edit role is accepted
+    assert not model.setData(model.index_for("prospects", "quotes"), 1, Qt.ItemDataRole.DisplayRole)
+
+def test_overrides():
+    model = MetricsModel()
+    _set(model, "current_leads", "call_connects.paid_lead", 3)
+    _set(model, "current_leads", "call_connects.total", 10)
+    assert model.override("current_leads", "call_connects.total") == 7
+    index = model.index_for("current_leads", "call_connects.total")
+    assert index.data(OverrideRole) == 7
+    assert "+7" in index.data(Qt.ItemDataRole.ToolTipRole)
+    assert model.value("current_leads", "grand_total") == 10
+    
+    # The override is kept relative to the calculated value as components change
+    _set(model, "current_leads", "call_connects.organic_lead", 2)
+    assert model.value("current_leads", "call_connects.total") == 12
+    assert model.value("current_leads", "grand_total") == 12
+    
+    # Loading an entry recalculates totals and clears overrides
+    entry = {"current_leads": model.section_data("current_leads"), "prospects": {}}
+    model.load_entry(entry)
+    assert model.override("current_leads", "call_connects.total") == 0
+    assert model.value("current_leads", "call_connects.total") == 5
+    assert model.value("current_leads", "call_connects.organic_lead") == 2
+    
+    model.load_entry(None)
+    assert model.value("current_leads", "grand_total") == 0
+    assert model.section_data("prospects")["grand_total_2"] == 0
+
+if __name__ == "__main__":
+    test_totals_recalculate()
+    test_overrides()
+    print("All metrics model tests passed")
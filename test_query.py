@@ -0,0 +1,84 @@
+"""
+Test script for the query layer: index-backed aggregates must match a plain scan
+"""
+import tempfile
+from datetime import date
+from src.data.query import expand_metric_paths
+from sample_data import make_data_manager
+
+def _make_data_manager(temp_dir):
+    return make_data_manager(temp_dir, seed=11, users=("Ann", "Bob", "Cy"), start_date="2024-09-01",
+                             end_date="2025-03-31", coverage=0.5, comment="hot lead")
+
+def _scan(query):
+    # A predicate that accepts everything forces the scan path
+    return query.where(predicate=lambda entry: True)
+
+def _check_matches_scan(dm):
+    for date_range in [("2024-10-15", "2025-02-20"), ("2025-02-20", "2024-10-15")]:
+        _check_range_matches_scan(dm, date_range)
+
+def _check_range_matches_scan(dm, date_range):
+    for keys in [(), ("user",), ("week",), ("user", "month"), ("date",), ("year", "user")]:
+        for users in [None, ["Bob"], ["Ann", "Nobody"]]:
+            indexed = dm.query().where(users=users, date_between=date_range).group_by(*keys)
+            assert indexed.explain() == "prefix"
+            scanned = _scan(dm.query().where(users=users, date_between=date_range).group_by(*keys))
+            assert scanned.explain() == "scan"
+            patterns = ("current_leads.call_connects.*", "prospects.quotes")
+            assert indexed.sum(*patterns) == scanned.sum(*patterns)
+            assert indexed.count() == scanned.count()
+
+def test_query_paths_agree():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = _make_data_manager(temp_dir)
+        _check_matches_scan(dm)
+        
+        weekly = dm.query().where(user="Ann", date_between=("2025-01-01", "2025-01-31")) \
+            .group_by("user", "week").sum("current_leads.call_connects.*")
+        assert all(user == "Ann" and date.fromisoformat(week).weekday() == 0 for user, week in weekly)
+        assert list(next(iter(weekly.values()))) == expand_metric_paths(["current_leads.call_connects.*"])
+        
+        # Grouping by a field path and filtering with a predicate scan the entries
+        by_comment = dm.query().where(date_between=("2024-09-01", "2025-03-31")).group_by("comments").count()
+        assert sum(by_comment.values()) == dm.query().count()
+        hot = dm.query().where(predicate=lambda entry: entry["comments"] == "hot lead")
+        assert hot.count() == by_comment["hot lead"] == len(hot.entries())
+        
+        # Exact lookups use the entry map
+        entry = dm.query().where(date_between=("2025-01-01", None)).first()
+        lookup = dm.query().where(user=entry["user"], date=entry["date"])
+        assert lookup.explain(aggregate=False) == "hash"
+        assert lookup.first() == entry
+        assert dm.query().where(user="Nobody", date=entry["date"]).first() is None
+        
+        # Archived months are answered from the archive summary
+        dm.archive_before("2024-12-01")
+        _check_matches_scan(dm)
+
+def test_leaderboard():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = _make_data_manager(temp_dir)
+        dm.archive_before("2024-12-01")
+        date_range = ("2024-11-01", "2025-01-31")
+        path = "prospects.quotes"
+        scanned = _scan(dm.query().where(date_between=date_range).group_by("user")).sum(path)
+        ranked = sorted(((user, totals[path]) for user, totals in scanned.items()),
+                        key=lambda item: (-item[1], item[0]))
+        assert dm.get_leaderboard(path, *date_range, top=2) == ranked[:2]
+        assert dm.get_leaderboard(path, *date_range, top=10) == ranked
+        assert dm.snapshot().get_leaderboard(path, *date_range) == ranked
+        assert dm.get_leaderboard(path, "2030-01-01", "2030-01-31") == []
+
+def test_unknown_metric():
+    try:
+        expand_metric_paths(["current_leads.no_such_metric"])
+    except ValueError:
+        return
+    assert False, "expected ValueError"
+
+if __name__ == "__main__":
+    test_query_paths_agree()
+    test_leaderboard()
+    test_unknown_metric()
+    print("All query tests passed")
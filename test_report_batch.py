@@ -0,0 +1,53 @@
+"""
+Test script for the shared report engine and batch report generation
+"""
+import os
+import tempfile
+from datetime import date
+from src.data.data_manager import DataManager
+from src.reports.batch import run_batch, last_week_range, report_file_name
+from src.reports.report_engine import generate_report
+
+def _make_data_file(temp_dir, users):
+    data_file = os.path.join(temp_dir, "tally_data.json")
+    dm = DataManager(data_file)
+    for number, user in enumerate(users, start=1):
+        dm.add_user(user)
+        for day in ["2025-03-03", "2025-03-05"]:
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = user
+            entry["date"] = day
+            entry["current_leads"]["quotes"] = number
+            entry["comments"] = f"{user} on {day}"
+            dm.save_entry(entry)
+    dm.add_user("Idle")
+    return data_file
+
+def test_last_week_range():
+    assert last_week_range(date(2025, 3, 12)) == ("2025-03-03", "2025-03-09")
+    assert last_week_range(date(2025, 3, 10)) == ("2025-03-03", "2025-03-09")
+
+def test_batch_matches_engine():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = _make_data_file(temp_dir, ["Ann", "Bob"])
+        output_dir = os.path.join(temp_dir, "reports")
+        results = run_batch([data_file], "2025-03-03", "2025-03-09", output_dir, workers=2)
+        assert [r.user for r in results] == ["Ann", "Bob", "Idle"]
+        assert results[2].output_path is None and results[2].error is None
+        
+        dm = DataManager(data_file)
+        for result in results[:2]:
+            assert result.output_path == os.path.join(output_dir, report_file_name(result.user, "2025-03-03", "2025-03-09"))
+            with open(result.output_path, encoding="utf-8") as f:
+                text = f.read()
+            # Same engine as the report dialog, limited to the one caller
+            assert text == generate_report(dm, "2025-03-03", "2025-03-09", result.user)
+            assert text.startswith(f"Touch-Point Tracker Report for {result.user}")
+        with open(results[1].output_path, encoding="utf-8") as f:
+            text = f.read()
+        assert "Quotes: 4" in text and "Ann on" not in text
+
+if __name__ == "__main__":
+    test_last_week_range()
+    test_batch_matches_engine()
+    print("Report batch tests passed")
@@ -0,0 +1,112 @@
+"""
+Test script for the compiled report templates and period comparisons
+"""
+import os
+import tempfile
+from src.data.data_manager import DataManager
+from src.data.schema import TABS, section_metric_paths, set_metric
+from src.reports.renderer import render_report, render_comparison, get_template
+from src.reports.report_engine import collect_comparison_data, previous_period, same_period_last_year
+
+def _sample_totals():
+    totals = {}
+    for number, (tab_key, _) in enumerate(TABS):
+        section = {}
+        for offset, path in enumerate(section_metric_paths()):
+            set_metric(section, path, number * 100 + offset)
+        totals[tab_key] = section
+    return totals
+
+def _reference_text(user_name, start_date_str, end_date_str, totals, notes):
+    """The report text as ReportDialog originally built it, line by line"""
+    lines = [f"Touch-Point Tracker Report for {user_name}" if user_name else "Touch-Point Tracker Report",
+             f"Period: {start_date_str} to {end_date_str}"]
+    for tab_label, section_key in [("Current Leads", "current_leads"), ("Prospects", "prospects")]:
+        agg = totals[section_key]
+        lines.append(f"\n=== {tab_label} ===")
+        for title, key in [("CALL - Connects", "call_connects"), ("CALL - Non-Connects", "call_nonconnects"),
+                           ("CALL - In Betweens", "call_inbetweens")]:
+            lines.append(f"\n{title}:")
+            lines.append(f"  Paid Lead: {agg[key]['paid_lead']}")
+            lines.append(f"  Organic Lead: {agg[key]['organic_lead']}")
+            lines.append(f"  Agents: {agg[key]['agents']}")
+            lines.append(f"  Total: {agg[key]['total']}")
+        lines.append("\nOTHER:")
+        lines.append(f"  SMS: {agg['other']['sms']}")
+        lines.append(f"  Email: {agg['other']['email']}")
+        lines.append(f"  Total: {agg['other']['total']}")
+        lines.append(f"\nGRAND TOTAL: {agg['grand_total']}")
+        lines.append(f"\nEnrolment Packs: {agg['enrolment_packs']}")
+        lines.append(f"Quotes: {agg['quotes']}")
+        lines.append(f"CPD Booked: {agg['cpd_booked']}")
+        lines.append(f"\nGRAND TOTAL: {agg['grand_total_2']}")
+    if notes:
+        lines.append("\n=== Notes ===")
+        for date, comment in notes:
+            lines.append(f"\n{date}:")
+            lines.append(f"  {comment}")
+    return "\n".join(lines)
+
+def test_text_matches_original_layout():
+    totals = _sample_totals()
+    for user_name, notes in [("Ann", []), (None, [("2025-03-03", "Call {back} <soon>")])]:
+        expected = _reference_text(user_name, "2025-03-03", "2025-03-09", totals, notes)
+        assert render_report(user_name, "2025-03-03", "2025-03-09", totals, notes) == expected
+    # Compiled once and reused
+    assert get_template("text") is get_template("text")
+    # Every schema metric is in the report, in schema order
+    assert [(tab_key, path) for tab_key, _ in TABS for path in section_metric_paths()] == \
+        get_template("text").fields
+
+def test_html_and_markdown():
+    totals = _sample_totals()
+    notes = [("2025-03-03", "Tom & Jerry <b>\nsecond line")]
+    html = render_report("O'Brien & Co", "2025-03-03", "2025-03-09", totals, notes, "html")
+    assert "O&#x27;Brien &amp; Co" in html
+    assert "Tom &amp; Jerry &lt;b&gt;<br>second line" in html
+    assert f"<td width=\"60\" align=\"right\">{totals['prospects']['call_connects']['paid_lead']}</td>" in html
+    
+    markdown = render_report("Ann", "2025-03-03", "2025-03-09", totals, notes, "markdown")
+    assert markdown.startswith("# Touch-Point Tracker Report for Ann")
+    assert f"| Paid Lead | {totals['current_leads']['call_connects']['paid_lead']} |" in markdown
+    assert f"**GRAND TOTAL: {totals['prospects']['grand_total_2']}**" in markdown
+
+def test_comparison():
+    assert previous_period("2025-03-03", "2025-03-09") == ("2025-02-24", "2025-03-02")
+    assert previous_period("2025-03-01", "2025-03-31") == ("2025-02-01", "2025-02-28")
+    assert same_period_last_year("2024-02-01", "2024-02-29") == ("2023-02-01", "2023-02-28")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dm = DataManager(os.path.join(temp_dir, "tally_data.json"))
+        dm.add_user("Ann")
+        for day, quotes in [("2025-02-26", 4), ("2025-03-04", 5), ("2025-03-05", 1)]:
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = "Ann"
+            entry["date"] = day
+            entry["current_leads"]["quotes"] = quotes
+            dm.save_entry(entry)
+        
+        period = ("2025-03-03", "2025-03-09")
+        user_name, totals, previous_totals = collect_comparison_data(dm, period, previous_period(*period))
+        assert user_name == "Ann"
+        assert (totals["current_leads"]["quotes"], previous_totals["current_leads"]["quotes"]) == (6, 4)
+        assert collect_comparison_data(dm, ("2030-01-01", "2030-01-07"), ("2029-12-25", "2029-12-31")) is None
+        try:
+            collect_comparison_data(dm, period, ("2025-10-23", "2025-10-21"))
+            assert False, "a reversed range should be rejected"
+        except ValueError:
+            pass
+        
+        text = render_comparison(user_name, period, previous_period(*period), totals, previous_totals)
+        assert "Compared with: 2025-02-24 to 2025-03-02" in text
+        assert "\nQuotes: 6 vs 4 (+2, +50.0%)" in text
+        assert "  Paid Lead: 0 vs 0 (+0)" in text
+        html = render_comparison(user_name, period, previous_period(*period), totals, previous_totals, "html")
+        assert "Quotes: 6 vs 4 (+2, +50.0%)" in html
+    assert get_template("text", True) is not get_template("text")
+
+if __name__ == "__main__":
+    test_text_matches_original_layout()
+    test_html_and_markdown()
+    test_comparison()
+    print("Report renderer tests passed")
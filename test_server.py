@@ -0,0 +1,97 @@
+"""
+Test script for the HTTP/JSON API server
+"""
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from src.data.data_manager import DataManager
+from src.server import make_server
+
+def _get(base_url, path, etag=None):
+    request = urllib.request.Request(base_url + path)
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers.get("ETag"), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, e.headers.get("ETag"), json.loads(body) if body else None
+
+def test_server_endpoints():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "tally_data.json")
+        dm = DataManager(data_file)
+        dm.add_user("Ann")
+        for day, quotes in [("2025-03-03", 1), ("2025-03-09", 2), ("2025-03-10", 4), ("2025-04-01", 8)]:
+            entry = dm.create_empty_entry_structure()
+            entry["user"] = "Ann"
+            entry["date"] = day
+            entry["current_leads"]["quotes"] = quotes
+            dm.save_entry(entry)
+        
+        server = make_server(data_file, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            status, etag, body = _get(base_url, "/users")
+            assert status == 200 and body == {"users": ["Ann"]}
+            
+            status, _, body = _get(base_url, "/entries?start=2025-03-05&end=2025-03-31")
+            assert [e["date"] for e in body["entries"]] == ["2025-03-09", "2025-03-10"]
+            
+            status, _, body = _get(base_url, "/totals?start=2025-03-01&end=2025-03-31&user=Ann")
+            assert body["totals"]["current_leads"]["quotes"] == 7
+            
+            status, _, body = _get(base_url, "/rollups?start=2025-03-01&end=2025-03-16"
+                                             "&metric=current_leads.quotes&period=week")
+            assert [(r["start"], r["end"], r["total"]) for r in body["rollups"]] == [
+                ("2025-03-01", "2025-03-02", 0),
+                ("2025-03-03", "2025-03-09", 3),
+                ("2025-03-10", "2025-03-16", 4),
+            ]
+            status, _, body = _get(base_url, "/rollups?start=2025-03-01&end=2025-04-30"
+                                             "&metric=current_leads.quotes")
+            assert [r["total"] for r in body["rollups"]] == [7, 8]
+            
+            status, _, body = _get(base_url, "/leaderboard?start=2025-03-01&end=2025-03-31"
+                                             "&metric=current_leads.quotes&top=3")
+            assert body["leaders"] == [{"rank": 1, "user": "Ann", "total": 7}]
+            status, _, _ = _get(base_url, "/leaderboard?start=2025-03-01&end=2025-03-31"
+                                          "&metric=current_leads.quotes&top=0")
+            assert status == 400
+            
+            status, _, body = _get(base_url, "/totals?start=2025-03-01")
+            assert status == 400
+            status, _, _ = _get(base_url, "/nothing")
+            assert status == 404
+            
+            # Unchanged data answers conditional requests with 304, without building a response
+            server.RequestHandlerClass.service._responses.clear()
+            status, _, _ = _get(base_url, "/totals?start=2025-03-01&end=2025-03-31", etag)
+            assert status == 304
+            assert not server.RequestHandlerClass.service._responses
+            
+            # Unexpected errors are answered with a 500 instead of a dropped connection
+            service = server.RequestHandlerClass.service
+            service.routes["/users"] = lambda snapshot, query: 1 / 0
+            status, _, body = _get(base_url, "/users")
+            assert status == 500 and body == {"error": "Internal server error"}
+            service.routes["/users"] = service._users
+            
+            # A save from another writer changes the version
+            dm.add_user("Bob")
+            status, new_etag, body = _get(base_url, "/users", etag)
+            assert status == 200 and new_etag != etag
+            assert body == {"users": ["Ann", "Bob"]}
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    test_server_endpoints()
+    print("Server tests passed")
@@ -0,0 +1,115 @@
+"""
+Test script for settings storage: secrets are kept out of the settings file,
+batched writes and change notifications
+"""
+import json
+import os
+import stat
+import tempfile
+from src.settings import secret_store
+from src.settings.settings_manager import SettingsManager
+
+def test_password_kept_out_of_settings_file():
+    saved_keyring = secret_store.keyring
+    secret_store.keyring = None  # Exercise the file fallback
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            settings_file = os.path.join(temp_dir, "app_settings.json")
+            # A settings file from an older version, with the password inline
+            with open(settings_file, "w") as f:
+                json.dump({"smtp_host": "smtp.example.com", "smtp_password": "hunter2"}, f)
+            
+            settings = SettingsManager(settings_file)
+            assert settings.get("smtp_password") == "hunter2"
+            with open(settings_file) as f:
+                assert "smtp_password" not in json.load(f)
+            secrets_file = settings.secrets.secrets_file
+            assert not settings.secrets.uses_keyring
+            if os.name == "posix":
+                assert stat.S_IMODE(os.stat(secrets_file).st_mode) == 0o600
+            
+            changes = []
+            settings.subscribe(lambda key, value: changes.append((key, value)))
+            settings.set("smtp_password", "correct horse")
+            assert changes == [("smtp_password", "correct horse")]
+            assert SettingsManager(settings_file).get("smtp_password") == "correct horse"
+            with open(settings_file) as f:
+                assert "correct horse" not in f.read()
+            
+            settings.set("smtp_password", "")
+            assert not os.path.exists(secrets_file)
+            assert settings.get("smtp_host") == "smtp.example.com"
+    finally:
+        secret_store.keyring = saved_keyring
+
+def _counting_saves(settings):
+    saves = []
+    save_settings = settings.save_settings
+    def counted():
+        saves.append(dict(settings.settings))
+        save_settings()
+    settings.save_settings = counted
+    return saves
+
+def test_batch_saves_once_and_notifies_after():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings_file = os.path.join(temp_dir, "app_settings.json")
+        settings = SettingsManager(settings_file)
+        saves = _counting_saves(settings)
+        changes = []
+        def on_change(key, value):
+            # Subscribers run after the batch has been written
+            changes.append((key, value, len(saves)))
+        settings.subscribe(on_change)
+        settings.subscribe(on_change)  # Subscribing twice is a no-op
+        
+        with settings.batch():
+            settings.set("smtp_host", "mail.example.com")
+            settings.set("smtp_port", 2525)
+            settings.set("smtp_port", 465)
+            settings.set("smtp_host", "mail.example.com")
+            with settings.batch():
+                settings.set("default_emails", "team@example.com")
+            assert saves == [] and changes == []
+        
+        assert len(saves) == 1
+        assert changes == [("smtp_host", "mail.example.com", 1), ("smtp_port", 465, 1),
+                           ("default_emails", "team@example.com", 1)]
+        with open(settings_file) as f:
+            assert json.load(f)["smtp_port"] == 465
+        
+        # Outside a batch each change is written and notified straight away
+        settings.set("smtp_port", 587)
+        assert len(saves) == 2 and changes[-1] == ("smtp_port", 587, 2)
+        # Unchanged values are neither written nor notified
+        settings.set("smtp_port", 587)
+        assert len(saves) == 2 and len(changes) == 4
+        
+        settings.unsubscribe(on_change)
+        settings.set("smtp_port", 25)
+        assert len(saves) == 3 and len(changes) == 4
+
+def test_batch_released_on_error():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings = SettingsManager(os.path.join(temp_dir, "app_settings.json"))
+        saves = _counting_saves(settings)
+        changes = []
+        settings.subscribe(lambda key, value: changes.append(key))
+        try:
+            with settings.batch():
+                settings.set("smtp_host", "mail.example.com")
+                raise RuntimeError("dialog failed")
+        except RuntimeError:
+            pass
+        # What was set before the error is still written and notified
+        assert len(saves) == 1 and changes == ["smtp_host"]
+        
+        # And the manager is out of batch mode again
+        settings.set("smtp_port", 2525)
+        assert len(saves) == 2 and changes == ["smtp_host", "smtp_port"]
+
+if __name__ == "__main__":
+    test_password_kept_out_of_settings_file()
+    test_batch_saves_once_and_notifies_after()
+    test_batch_released_on_error()
+    print("Settings tests passed")